@@ -0,0 +1,90 @@
+"""
+TwoEchelonRouter (monolithic MIP) vs BendersTwoEchelonRouter.
+
+Both routers are solved to optimality on small random instances with
+integer demands; the objectives must agree. Wall times are reported for
+the monolithic model and for Benders with in-process and parallel
+subproblems.
+
+Usage (from the repository root):
+    python benchmarks/bench_benders.py
+    python benchmarks/bench_benders.py --candidates 3 --customers 7 --seeds 0 1 2 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Make src/ importable when running from the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from common.data_gen import ProblemInstance
+from common.vehicles import create_fleet
+from modules.decomposition import BendersTwoEchelonRouter
+from modules.routers import TwoEchelonRouter
+
+
+def make_instance(n_candidates, n_customers, seed):
+    rng = np.random.default_rng(seed)
+    return ProblemInstance(
+        np.array([0, 0]),
+        rng.uniform(10, 30, size=(n_candidates, 2)),
+        rng.uniform(30, 80, size=(n_customers, 2)),
+        demand=rng.integers(1, 4, size=n_customers).astype(float),
+    )
+
+
+def timed_objective(router, **kwargs):
+    start = time.perf_counter()
+    res = router.solve(params={"OutputFlag": 0}, **kwargs)
+    return res["truck_dist"] + res["total_sec_cost"], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--candidates", type=int, default=3)
+    parser.add_argument("--customers", type=int, default=6)
+    parser.add_argument("--fleet", default="mix_2")
+    parser.add_argument("--vehicles", type=int, default=2, help="Vehicles per depot")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    args = parser.parse_args()
+
+    fleet = create_fleet(args.fleet)[: args.vehicles]
+    print(
+        f"{'Seed':>4} {'Loop':>6} | {'MIP':>10} {'Benders':>10} | "
+        f"{'MIP (s)':>8} {'B x1 (s)':>8} {'B par (s)':>9}"
+    )
+    print("-" * 68)
+    failures = 0
+    for seed in args.seeds:
+        inst = make_instance(args.candidates, args.customers, seed)
+        for open_loop in (False, True):
+            mip, t_mip = timed_objective(
+                TwoEchelonRouter(inst, inst.mobile_depots, fleet),
+                open_loop=open_loop,
+            )
+            ben, t_seq = timed_objective(
+                BendersTwoEchelonRouter(inst, inst.mobile_depots, fleet, workers=1),
+                open_loop=open_loop,
+            )
+            _, t_par = timed_objective(
+                BendersTwoEchelonRouter(inst, inst.mobile_depots, fleet),
+                open_loop=open_loop,
+            )
+            ok = abs(mip - ben) <= 1e-6 * max(1.0, abs(mip))
+            failures += not ok
+            print(
+                f"{seed:>4} {'open' if open_loop else 'closed':>6} | "
+                f"{mip:>10.4f} {ben:>10.4f} | "
+                f"{t_mip:>8.2f} {t_seq:>8.2f} {t_par:>9.2f}"
+                f"{'' if ok else '  MISMATCH'}"
+            )
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Make src/ importable when running from the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from common.distances import build_distance_matrix
+
+
+def legacy_distance_matrix(D, C, open_loop=False):
+    """Nested-loop construction used by the routers before common.distances."""
+    num_depots = len(D)
+    num_customers = len(C)
+
+    D_nodes = list(range(num_depots))
+    C_nodes = list(range(num_depots, num_depots + num_customers))
+    All_nodes = D_nodes + C_nodes
+
+    coords = {}
+    for i in range(num_depots):
+        coords[i] = D[i]
+    for i in range(num_customers):
+        coords[num_depots + i] = C[i]
+
+    dist = np.zeros((len(All_nodes), len(All_nodes)))
+    for i in All_nodes:
+        for j in All_nodes:
+            cost = np.linalg.norm(coords[i] - coords[j])
+            if open_loop and i in C_nodes and j in D_nodes:
+                cost = 0.0
+            dist[i, j] = cost
+    return dist
+
+
+def best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    rng = np.random.default_rng(42)
+    main_depot = np.array([0.0, 0.0])
+
+    print(f"{'Customers':>10} | {'Legacy (s)':>12} | {'Vectorized (s)':>14} | {'Speedup':>8}")
+    print("-" * 54)
+
+    for n_customers in [20, 100, 300, 1000]:
+        D = rng.uniform(10, 30, size=(4, 2))
+        C = rng.uniform(30, 80, size=(n_customers, 2))
+
+        # Sanity check: both constructions agree
+        n = len(D) + len(C)
+        fast = build_distance_matrix(D, C, main_depot, open_loop=True)[:n, :n]
+        if n_customers <= 300:
+            assert np.allclose(fast, legacy_distance_matrix(D, C, open_loop=True))
+
+        repeats = 1 if n_customers >= 1000 else 3
+        t_legacy = best_of(lambda: legacy_distance_matrix(D, C, True), repeats)
+        t_fast = best_of(lambda: build_distance_matrix(D, C, main_depot, True), 20)
+
+        print(
+            f"{n_customers:>10} | {t_legacy:>12.4f} | {t_fast:>14.6f} | {t_legacy / t_fast:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
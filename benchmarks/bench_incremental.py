@@ -0,0 +1,101 @@
+"""
+DynamicVRPPlanner (in-place edits) vs rebuilding VRPRouter after each change.
+
+A random stream of add/remove/move updates is applied to a small instance.
+After every update both approaches are re-solved to optimality; the
+objectives must agree. Per-update latencies (model update + optimize) are
+reported.
+
+Usage (from the repository root):
+    python benchmarks/bench_incremental.py
+    python benchmarks/bench_incremental.py --customers 6 --updates 10 --seed 1
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Make src/ importable when running from the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from common.data_gen import ProblemInstance
+from common.vehicles import create_fleet
+from modules.planner import DynamicVRPPlanner
+from modules.routers import VRPRouter
+
+PARAMS = {"OutputFlag": 0, "MIPGap": 0}
+
+
+def objective(res, fleet):
+    sec = sum(fleet[k].cost_factor * d for k, d in res["veh_dists"].items())
+    return res["max_dist"] + 0.001 * (res["truck_dist"] + sec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--candidates", type=int, default=3)
+    parser.add_argument("--customers", type=int, default=5)
+    parser.add_argument("--updates", type=int, default=8)
+    parser.add_argument("--fleet", default="mix_2")
+    parser.add_argument("--open-loop", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    fleet = create_fleet(args.fleet)
+    inst = ProblemInstance(
+        np.array([0, 0]),
+        rng.uniform(10, 30, size=(args.candidates, 2)),
+        rng.uniform(30, 80, size=(args.customers, 2)),
+    )
+    planner = DynamicVRPPlanner(
+        inst, inst.mobile_depots, fleet, open_loop=args.open_loop, params=PARAMS
+    )
+    capacity = sum(v.capacity for v in fleet)
+
+    print(f"{'#':>3} {'Update':<16} | {'Objective':>10} | {'Rebuild (ms)':>12} {'Incremental (ms)':>16}")
+    print("-" * 66)
+    failures = 0
+    for step in range(args.updates + 1):
+        if step == 0:
+            op = "initial"
+        else:
+            n = len(planner.customers)
+            op = rng.choice(["add_customer", "remove_customer", "move_depot"])
+            if op == "add_customer" and n >= capacity:
+                op = "remove_customer"
+            if op == "remove_customer" and n <= 2:
+                op = "add_customer"
+            if op == "add_customer":
+                planner.add_customer(rng.uniform(30, 80, size=2))
+            elif op == "remove_customer":
+                planner.remove_customer(int(rng.choice(planner.customers)))
+            else:
+                planner.move_depot(int(rng.choice(planner.depots)), rng.uniform(10, 30, size=2))
+
+        res = planner.solve()
+        latency = planner.history[-1]["latency"]
+
+        start = time.perf_counter()
+        current = planner.instance()
+        ref = VRPRouter(current, current.mobile_depots, fleet).solve(
+            open_loop=args.open_loop, params=PARAMS
+        )
+        rebuild = time.perf_counter() - start
+
+        obj, ref_obj = objective(res, fleet), objective(ref, fleet)
+        ok = abs(obj - ref_obj) <= 1e-6 * max(1.0, abs(ref_obj))
+        failures += not ok
+        print(
+            f"{step:>3} {op:<16} | {obj:>10.4f} | {rebuild * 1e3:>12.1f} {latency * 1e3:>16.1f}"
+            f"{'' if ok else '  MISMATCH'}"
+        )
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
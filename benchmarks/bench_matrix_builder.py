@@ -0,0 +1,111 @@
+"""
+TwoEchelonRouter: loop builder vs matrix-API builder.
+
+1. Equivalence: both builders are solved on small instances (every
+   formulation, closed and open loop) and must reach the same objective.
+2. Build time: model construction only, on larger instances. Optimize is
+   not needed for this, so a size-limited Gurobi license is enough.
+
+Usage (from the repository root):
+    python benchmarks/bench_matrix_builder.py
+    python benchmarks/bench_matrix_builder.py --sizes 4x50 10x100
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import gurobipy as gp
+
+# Make src/ importable when running from the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from common.data_gen import ProblemInstance
+from common.timing import PhaseTimer
+from common.vehicles import create_fleet
+from modules.routers import FORMULATIONS, TwoEchelonRouter
+
+
+def make_instance(n_candidates, n_customers, seed):
+    rng = np.random.default_rng(seed)
+    return ProblemInstance(
+        np.array([0, 0]),
+        rng.uniform(10, 30, size=(n_candidates, 2)),
+        rng.uniform(30, 80, size=(n_customers, 2)),
+    )
+
+
+def objective(res):
+    return res["truck_dist"] + res["total_sec_cost"]
+
+
+def check_equivalence(seeds, tol=1e-6):
+    print("Equivalence (2 candidates, 5 customers, 2 vehicles per depot):")
+    failures = 0
+    for seed in seeds:
+        inst = make_instance(2, 5, seed)
+        fleet = create_fleet("mix_2")[:2]
+        for formulation in FORMULATIONS:
+            for open_loop in (False, True):
+                objs = []
+                for builder in ("loops", "matrix"):
+                    res = TwoEchelonRouter(inst, inst.mobile_depots, fleet).solve(
+                        open_loop=open_loop,
+                        formulation=formulation,
+                        builder=builder,
+                        params={"OutputFlag": 0},
+                    )
+                    objs.append(objective(res))
+                ok = abs(objs[0] - objs[1]) <= tol * max(1.0, abs(objs[0]))
+                failures += not ok
+                print(
+                    f"  seed={seed} {formulation:<8} open={open_loop!s:<5} "
+                    f"loops={objs[0]:.4f} matrix={objs[1]:.4f} "
+                    f"{'OK' if ok else 'MISMATCH'}"
+                )
+    return failures
+
+
+def build_time(inst, builder):
+    """Wall time of model construction (optimize may fail on a size-limited license)."""
+    timer = PhaseTimer()
+    router = TwoEchelonRouter(inst, inst.mobile_depots, create_fleet("homog"), timer=timer)
+    try:
+        router.solve(builder=builder, params={"OutputFlag": 0, "TimeLimit": 1})
+    except gp.GurobiError:
+        pass
+    return timer.wall("router.build")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["2x20", "4x50", "10x100"],
+        help="Build-time sizes as <candidates>x<customers>",
+    )
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    args = parser.parse_args()
+
+    failures = check_equivalence(args.seeds)
+
+    print("\nBuild time (homog fleet, MTZ):")
+    print(f"{'Size':>10} | {'Loops (s)':>10} | {'Matrix (s)':>10} | {'Speedup':>8}")
+    print("-" * 48)
+    for size in args.sizes:
+        n_cand, n_cust = map(int, size.split("x"))
+        inst = make_instance(n_cand, n_cust, 0)
+        t_loops = build_time(inst, "loops")
+        t_matrix = build_time(inst, "matrix")
+        print(
+            f"{size:>10} | {t_loops:>10.3f} | {t_matrix:>10.3f} | "
+            f"{t_loops / t_matrix:>7.1f}x"
+        )
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Scaling benchmark for VRPRouter, TwoEchelonRouter and PMedianLocator.
+
+Usage (from the repository root):
+    python benchmarks/bench_scaling.py run --output bench_results.json
+    python benchmarks/bench_scaling.py run --customers 10 20 --candidates 2 4 --scenarios 0 3
+    python benchmarks/bench_scaling.py compare baseline.json bench_results.json
+
+Every case runs in a fresh process so that peak RSS is per case.
+Scenario mapping (as in ExperimentRunner):
+    0: VRPRouter on the generated candidates (closed loop)
+    1: PMedianLocator picks the candidates, then VRPRouter (closed loop)
+    2: VRPRouter on the generated candidates, closed or open loop
+    3: PMedianLocator picks the candidates, then TwoEchelonRouter
+"""
+
+import argparse
+import concurrent.futures
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+
+# Make src/ importable when running from the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from common.data_gen import generate_data
+from common.distances import build_distance_matrix
+
+# Phases compared by the `compare` command (lower is better for all of them)
+COMPARED = (
+    "data_gen_time",
+    "distance_time",
+    "locator_build_time",
+    "locator_optimize_time",
+    "build_time",
+    "optimize_time",
+    "extract_time",
+    "num_vars",
+    "num_constrs",
+    "peak_rss_mb",
+)
+CASE_KEYS = ("scenario", "customers", "candidates", "fleet", "loop_type", "seed")
+
+
+def make_instance(n_customers, n_candidates, seed):
+    """Uniform layout of generate_data, scaled to the requested sizes."""
+    return generate_data(
+        seed=seed, mode="uniform", n_customers=n_customers, n_candidates=n_candidates
+    )
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024**2 if sys.platform == "darwin" else rss / 1024
+
+
+def run_case(case, time_limit):
+    """Executes one benchmark case; runs inside a dedicated worker process."""
+    from common.vehicles import create_fleet
+    from modules.locators import PMedianLocator
+    from modules.routers import TwoEchelonRouter, VRPRouter
+
+    row = dict(case)
+    row["status"] = "ok"
+    scenario = case["scenario"]
+    open_loop = scenario in (2, 3) and case["loop_type"] == "open"
+
+    try:
+        t = time.perf_counter()
+        data = make_instance(case["customers"], case["candidates"], case["seed"])
+        row["data_gen_time"] = time.perf_counter() - t
+
+        candidates = data.mobile_depots
+        if scenario in (1, 3):
+            locator = PMedianLocator()
+            candidates = locator.find_depots(data, n_candidates=case["candidates"])
+            row["locator_build_time"] = locator.stats["build_time"]
+            row["locator_optimize_time"] = locator.stats["runtime"]
+            row["locator_vars"] = locator.stats["num_vars"]
+            row["locator_constrs"] = locator.stats["num_constrs"]
+
+        # Timed separately; the routers build the same matrix internally
+        t = time.perf_counter()
+        build_distance_matrix(
+            candidates, data.customers, data.main_depot, open_loop=open_loop
+        )
+        row["distance_time"] = time.perf_counter() - t
+
+        fleet = create_fleet(case["fleet"])
+        if scenario == 3:
+            router = TwoEchelonRouter(data, candidates, fleet)
+        else:
+            router = VRPRouter(data, candidates, fleet)
+        res = router.solve(
+            open_loop=open_loop, params={"OutputFlag": 0, "TimeLimit": time_limit}
+        )
+
+        if res is None:
+            row["status"] = "no_solution"
+        else:
+            stats = res["solver_stats"]
+            for key in ("build_time", "optimize_time", "extract_time"):
+                row[key] = stats[key]
+            row["num_vars"] = stats["num_vars"]
+            row["num_constrs"] = stats["num_constrs"]
+            row["gurobi_status"] = stats["status"]
+            row["mip_gap"] = stats["mip_gap"]
+    except Exception as e:  # e.g. size-limited Gurobi license
+        row["status"] = "error"
+        row["error"] = str(e)
+
+    row["peak_rss_mb"] = peak_rss_mb()
+    return row
+
+
+def build_cases(args):
+    cases = []
+    grid = itertools.product(
+        args.scenarios, args.customers, args.candidates, args.fleets, args.seeds
+    )
+    for scenario, n_cust, n_cand, fleet, seed in grid:
+        # Loop type only changes the model in the open-loop scenarios
+        loops = args.loops if scenario in (2, 3) else ["closed"]
+        for loop in loops:
+            cases.append(
+                {
+                    "scenario": scenario,
+                    "customers": n_cust,
+                    "candidates": n_cand,
+                    "fleet": fleet,
+                    "loop_type": loop,
+                    "seed": seed,
+                }
+            )
+    return cases
+
+
+def cmd_run(args):
+    cases = build_cases(args)
+    print(f"Running {len(cases)} cases (TimeLimit {args.time_limit} s each)...")
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for n, case in enumerate(cases):
+        # One process per case: clean peak RSS, no leaked Gurobi state
+        with concurrent.futures.ProcessPoolExecutor(1, mp_context=ctx) as pool:
+            row = pool.submit(run_case, case, args.time_limit).result()
+        results.append(row)
+        total = sum(
+            row.get(k, 0.0)
+            for k in ("data_gen_time", "distance_time", "build_time", "optimize_time")
+        )
+        print(
+            f"[{n + 1}/{len(cases)}] S{case['scenario']} C={case['customers']} "
+            f"D={case['candidates']} {case['fleet']} {case['loop_type']}: "
+            f"{row['status']} ({total:.2f} s, {row['peak_rss_mb']:.0f} MB)"
+        )
+
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "time_limit": args.time_limit,
+    }
+    try:
+        import gurobipy as gp
+
+        meta["gurobi"] = ".".join(map(str, gp.gurobi.version()))
+    except ImportError:
+        meta["gurobi"] = None
+
+    with open(args.output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def case_id(row):
+    return tuple(row[k] for k in CASE_KEYS)
+
+
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        baseline = {case_id(r): r for r in json.load(f)["results"]}
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+    for row in current:
+        base = baseline.get(case_id(row))
+        if base is None or base["status"] != "ok" or row["status"] != "ok":
+            continue
+        for key in COMPARED:
+            if key not in base or key not in row:
+                continue
+            old, new = float(base[key]), float(row[key])
+            # Relative threshold plus an absolute floor to ignore timer noise
+            floor = args.min_abs if key.endswith("_time") else 0.0
+            if new > old * (1 + args.threshold) and new - old > floor:
+                regressions.append((row, key, old, new))
+
+    matched = sum(1 for row in current if case_id(row) in baseline)
+    print(f"Compared {matched} cases against {args.baseline}")
+    for row, key, old, new in regressions:
+        change = (new / old - 1) * 100 if old > 0 else float("inf")
+        print(
+            f"REGRESSION S{row['scenario']} C={row['customers']} "
+            f"D={row['candidates']} {row['fleet']} {row['loop_type']} "
+            f"seed={row['seed']}: {key} {old:.4g} -> {new:.4g} (+{change:.0f}%)"
+        )
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model build / solve scaling benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmark sweep")
+    run.add_argument("--customers", type=int, nargs="+", default=[10, 20, 50, 100, 200])
+    run.add_argument("--candidates", type=int, nargs="+", default=[2, 4, 8, 12])
+    run.add_argument("--scenarios", type=int, nargs="+", default=[0, 1, 2, 3])
+    run.add_argument(
+        "--fleets", nargs="+", default=["homog", "mix_1", "mix_2"]
+    )
+    run.add_argument("--loops", nargs="+", default=["closed", "open"])
+    run.add_argument("--seeds", type=int, nargs="+", default=[42])
+    run.add_argument(
+        "--time-limit", type=float, default=30.0, help="Gurobi TimeLimit per case"
+    )
+    run.add_argument("--output", default="bench_results.json")
+
+    cmp = sub.add_parser("compare", help="Flag regressions against a baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument(
+        "--threshold", type=float, default=0.2, help="Relative slowdown to flag (0.2 = 20%%)"
+    )
+    cmp.add_argument(
+        "--min-abs",
+        type=float,
+        default=0.01,
+        help="Ignore timing differences below this many seconds",
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        cmd_run(args)
+    else:
+        sys.exit(cmd_compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,27 @@
+import argparse
 from common.runner import ExperimentRunner
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the paper batch")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Experiments run in parallel"
+    )
+    parser.add_argument(
+        "--threads-per-job",
+        type=int,
+        default=None,
+        help="Gurobi Threads per experiment (default: cores // workers)",
+    )
+    parser.add_argument(
+        "--plot",
+        type=str,
+        default="async",
+        choices=["sync", "async", "false"],
+        help="Plot rendering (async: background process, off the solve path)",
+    )
+    args = parser.parse_args()
+
     runner = ExperimentRunner(output_base="batch_results")
 
     # Define the suite of experiments for the paper
@@ -32,13 +52,19 @@ def main():
         },
     ]
 
+    for config in experiments:
+        config["plot"] = args.plot
+
     print(f"Running batch of {len(experiments)} experiments...")
 
-    results = []
-    for config in experiments:
-        print(f"\n--- Starting {config['run_name']} ---")
-        metrics = runner.run_experiment(config)
-        results.append(metrics)
+    results = [None] * len(experiments)
+    for i, metrics in runner.run_many(
+        experiments, workers=args.workers, threads_per_job=args.threads_per_job
+    ):
+        status = "SOLVED" if metrics["solved"] else "FAILED"
+        print(f"\n--- Finished {experiments[i]['run_name']}: {status} ---")
+        results[i] = metrics
+    runner.wait_plots()
 
     # Validation / Comparison Report
     print("\n" + "=" * 30)
@@ -0,0 +1,177 @@
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+
+
+def hash_inputs(*arrays, **params):
+    """
+    SHA-256 over the raw bytes (plus dtype/shape) of every array and a
+    canonical JSON dump of the keyword parameters.
+    """
+    h = hashlib.sha256()
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr, dtype=float)
+        h.update(str(arr.shape).encode())
+        h.update(arr.tobytes())
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed store of finished experiments.
+
+    Layout: <cache_dir>/<key>/ holds a copy of the run's output files
+    (result.json, summary.txt, plot.png) plus metrics.json.
+    Entries older than `max_age_days` are dropped first, then the least
+    recently used ones until the cache fits in `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=".cache/results", max_bytes=2 * 1024**3, max_age_days=30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, instance, fleet, candidates, **params):
+        """Hash of instance arrays, fleet definition, locator output and params."""
+        return hash_inputs(
+            instance.main_depot,
+            instance.mobile_depots,
+            instance.customers,
+            instance.demand,
+            candidates,
+            fleet=[dataclasses.asdict(v) for v in fleet],
+            **params,
+        )
+
+    def get(self, key):
+        """Returns (entry_dir, metrics) on a hit, None on a miss."""
+        entry = os.path.join(self.cache_dir, key)
+        metrics_path = os.path.join(entry, "metrics.json")
+        if not os.path.exists(metrics_path):
+            return None
+        with open(metrics_path) as f:
+            metrics = json.load(f)
+        os.utime(entry)  # LRU bookkeeping
+        return entry, metrics
+
+    def put(self, key, output_dir, metrics, encoder=None):
+        entry = os.path.join(self.cache_dir, key)
+        tmp = entry + f".tmp{os.getpid()}"
+        shutil.copytree(output_dir, tmp, dirs_exist_ok=True)
+        with open(os.path.join(tmp, "metrics.json"), "w") as f:
+            json.dump(metrics, f, default=encoder, indent=2)
+        # Atomic publish; another worker may have stored the same key already
+        if os.path.exists(entry):
+            shutil.rmtree(tmp)
+        else:
+            os.replace(tmp, entry)
+        self.evict()
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(path) or ".tmp" in name:
+                continue
+            mtime = os.path.getmtime(path)
+            if now - mtime > self.max_age_days * 86400:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(root, f))
+                for root, _, files in os.walk(path)
+                for f in files
+            )
+            entries.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+class ModelCache(ResultCache):
+    """
+    Built Gurobi models stored for reuse across solves.
+
+    Layout: <cache_dir>/<key>/ holds model.mps.bz2 (model.mps with
+    compress=False: larger on disk, ~4x faster to read) and index.npz, which
+    maps every named variable group (e.g. z, y, x) from its Python keys to
+    column positions in the model, plus a JSON `meta` dict of build statistics.
+    Start values, parameters and callbacks are not part of an entry; they
+    are applied to the loaded model like to a freshly built one.
+    """
+
+    def __init__(
+        self,
+        cache_dir=".cache/models",
+        compress=True,
+        max_bytes=4 * 1024**3,
+        max_age_days=30,
+    ):
+        super().__init__(cache_dir, max_bytes=max_bytes, max_age_days=max_age_days)
+        self.model_file = "model.mps.bz2" if compress else "model.mps"
+
+    def get(self, key):
+        """Returns (model, {group: tupledict}, meta) on a hit, None on a miss."""
+        import gurobipy as gp
+        from common.gurobi_env import shared_env
+
+        entry = os.path.join(self.cache_dir, key)
+        index_path = os.path.join(entry, "index.npz")
+        if not os.path.exists(index_path):
+            return None
+        try:
+            with np.load(index_path) as npz:
+                index = {name: npz[name] for name in npz.files}
+            m = gp.read(os.path.join(entry, self.model_file), env=shared_env())
+        except (OSError, ValueError, gp.GurobiError):
+            return None  # Corrupt entry, rebuild
+        meta = json.loads(str(index.pop("meta")))
+        if m.NumVars != meta["num_vars"]:
+            m.dispose()
+            return None
+        columns = m.getVars()
+        groups = {}
+        for name in meta["groups"]:
+            keys, cols = index[f"{name}_keys"], index[f"{name}_cols"]
+            # 1-D keys are scalar (e.g. z[d]), 2-D keys are tuples
+            keys = keys.tolist() if keys.ndim == 1 else map(tuple, keys.tolist())
+            groups[name] = gp.tupledict(
+                (k, columns[c]) for k, c in zip(keys, cols.tolist())
+            )
+        os.utime(entry)  # LRU bookkeeping
+        return m, groups, meta
+
+    def put(self, key, m, groups, meta=None):
+        """
+        Writes the (updated) model and the key -> column maps of `groups`
+        ({name: tupledict keyed by ints or int tuples}).
+        """
+        entry = os.path.join(self.cache_dir, key)
+        if os.path.exists(entry):
+            return
+        tmp = entry + f".tmp{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        index = {}
+        for name, td in groups.items():
+            index[f"{name}_keys"] = np.array(list(td.keys()), dtype=np.int64)
+            index[f"{name}_cols"] = np.array([v.index for v in td.values()], dtype=np.int64)
+        meta = dict(meta or {}, groups=list(groups), num_vars=m.NumVars)
+        np.savez(os.path.join(tmp, "index.npz"), meta=json.dumps(meta), **index)
+        m.write(os.path.join(tmp, self.model_file))
+        # Atomic publish; another worker may have stored the same key already
+        if os.path.exists(entry):
+            shutil.rmtree(tmp)
+        else:
+            os.replace(tmp, entry)
+        self.evict()
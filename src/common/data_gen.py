@@ -1,140 +1,244 @@
+import os
 import numpy as np
 
 
 class ProblemInstance:
-    def __init__(self, main_depot, mobile_depots, customers):
+    def __init__(
+        self,
+        main_depot,
+        mobile_depots,
+        customers,
+        demand=None,
+        ready_time=None,
+        due_date=None,
+        service_time=None,
+    ):
+        """
+        :param demand: Per-customer demand (default 1 per customer)
+        :param ready_time, due_date, service_time: Optional per-customer
+            time window data (Solomon instances)
+        """
         self.main_depot = main_depot
         self.mobile_depots = mobile_depots
         self.customers = customers
         self.num_mobile = len(mobile_depots)
         self.num_customers = len(customers)
-
-
-def generate_clustered_data(seed=42, n_customers=20, n_depots=4):
+        if demand is None:
+            demand = np.ones(self.num_customers)
+        self.demand = np.asarray(demand, dtype=float)
+        self.ready_time = ready_time
+        self.due_date = due_date
+        self.service_time = service_time
+
+
+def generate_batch(
+    n_instances,
+    mode="uniform",
+    n_customers=20,
+    n_candidates=4,
+    n_clusters=3,
+    spread=5.0,
+    seed=42,
+):
+    """
+    Draws `n_instances` synthetic instances at once from one
+    np.random.Generator stream (no global RNG state is touched).
+    Modes:
+    - 'uniform': candidates in [10, 30]^2, customers in [30, 80]^2
+    - 'clustered': `n_clusters` centers in [20, 70]^2 with normally
+      scattered customers (std `spread`), candidates in [10, 50]^2.
+      Clusters get n_customers // n_clusters customers, the last one the rest.
+    Returns (mobile_depots, customers) with shapes (B, n_candidates, 2) and
+    (B, n_customers, 2); the main depot is always (0, 0).
+    """
+    if mode not in ("uniform", "clustered"):
+        raise ValueError(f"Unknown synthetic data mode: {mode}")
+    if n_customers < 1 or n_candidates < 1:
+        raise ValueError("n_customers and n_candidates must be positive")
+    rng = np.random.default_rng(seed)
+    B = n_instances
+
+    if mode == "uniform":
+        mobile_depots = rng.uniform(10, 30, size=(B, n_candidates, 2))
+        customers = rng.uniform(30, 80, size=(B, n_customers, 2))
+        return mobile_depots, customers
+
+    if not 1 <= n_clusters <= n_customers:
+        raise ValueError("n_clusters must be between 1 and n_customers")
+    centers = rng.uniform(20, 70, size=(B, n_clusters, 2))
+    sizes = np.full(n_clusters, n_customers // n_clusters)
+    sizes[-1] = n_customers - sizes[:-1].sum()
+    labels = np.repeat(np.arange(n_clusters), sizes)
+    customers = centers[:, labels] + rng.normal(0, spread, size=(B, n_customers, 2))
+    mobile_depots = rng.uniform(10, 50, size=(B, n_candidates, 2))
+    return mobile_depots, customers
+
+
+def generate_instances(n_instances, mode="uniform", seed=42, **params):
+    """generate_batch wrapped into a list of ProblemInstance objects."""
+    mobile_depots, customers = generate_batch(n_instances, mode=mode, seed=seed, **params)
+    return [
+        ProblemInstance(np.array([0, 0]), D, C) for D, C in zip(mobile_depots, customers)
+    ]
+
+
+def generate_clustered_data(seed=42, n_customers=20, n_depots=4, n_clusters=3, spread=5.0):
     """
     Generates clustered data to simulate more realistic scenarios.
     Uses a few centers and scatters customers around them.
     """
-    np.random.seed(seed)
-
-    # Main Depot at (0,0)
-    main_depot = np.array([0, 0])
-
-    # Generate Cluster Centers for Customers
-    # Say we have 3 main clusters for 20 customers
-    n_clusters = 3
-    cluster_centers = np.random.uniform(20, 70, size=(n_clusters, 2))
-
-    customers = []
-    points_per_cluster = n_customers // n_clusters
+    return generate_instances(
+        1,
+        mode="clustered",
+        seed=seed,
+        n_customers=n_customers,
+        n_candidates=n_depots,
+        n_clusters=n_clusters,
+        spread=spread,
+    )[0]
+
+
+def _solomon_arrays(vehicle, table):
+    """Splits the raw (n, 7) CUSTOMER table into named column views."""
+    return {
+        "vehicle_number": int(vehicle[0]),
+        "vehicle_capacity": int(vehicle[1]),
+        "coords": table[:, 1:3],
+        "demand": table[:, 3],
+        "ready_time": table[:, 4],
+        "due_date": table[:, 5],
+        "service_time": table[:, 6],
+    }
+
+
+def _parse_solomon_table(file_path):
+    with open(file_path, "r") as f:
+        text = f.read()
+
+    upper = text.upper()
+    if "VEHICLE" not in upper or "CUST NO." not in upper:
+        raise ValueError(f"Not a Solomon file (missing VEHICLE/CUSTOMER): {file_path}")
+
+    # VEHICLE: header line "NUMBER CAPACITY", then one line of two ints
+    veh_rows = [
+        ln.split()
+        for ln in upper[upper.index("VEHICLE") : upper.index("CUSTOMER")].splitlines()
+    ]
+    veh_rows = [r for r in veh_rows if r and r[0].isdigit()]
+    if not veh_rows:
+        raise ValueError(f"Could not parse VEHICLE section in {file_path}")
+    vehicle = np.array(veh_rows[0][:2], dtype=np.int64)
+
+    # CUSTOMER: numeric rows after the "CUST NO." header, 7 columns each
+    body = text[upper.index("CUST NO.") :].split("\n", 1)[1]
+    table = np.array(body.split(), dtype=float)
+    if table.size % 7 != 0:
+        raise ValueError(f"Malformed CUSTOMER section in {file_path}")
+    table = table.reshape(-1, 7)
+    if table[0, 0] != 0:
+        raise ValueError("Could not find depot (Cust No 0) in file")
+    return vehicle, table
 
-    for i in range(n_clusters):
-        # Scatter points around center
-        # Standard deviation 5.0
-        n_points = (
-            points_per_cluster if i < n_clusters - 1 else n_customers - len(customers)
-        )
-        points = cluster_centers[i] + np.random.normal(0, 5, size=(n_points, 2))
-        customers.extend(points)
 
-    customers = np.array(customers)
+def parse_solomon(file_path):
+    """
+    Parses the VEHICLE and CUSTOMER sections of a Solomon file into arrays.
+    Row 0 of every customer array is the depot (CUST NO. 0).
+    Returns a dict with vehicle_number, vehicle_capacity, coords, demand,
+    ready_time, due_date and service_time.
+    """
+    return _solomon_arrays(*_parse_solomon_table(file_path))
 
-    # Generate Mobile Depots
-    # Maybe place them somewhat between main depot and clusters, or random
-    # Let's keep them somewhat random but in distinct areas
-    mobile_depots = np.random.uniform(10, 50, size=(n_depots, 2))
 
-    return ProblemInstance(main_depot, mobile_depots, customers)
+def load_solomon_arrays(file_path):
+    """
+    parse_solomon with a binary cache: the raw table is stored as
+    `<file>.npz` next to the source and reused while the source is not newer.
+    """
+    cache_path = file_path + ".npz"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(
+        file_path
+    ):
+        try:
+            with np.load(cache_path) as npz:
+                return _solomon_arrays(npz["vehicle"], npz["table"])
+        except (OSError, KeyError, ValueError):
+            pass  # Corrupt cache, re-parse below
+
+    vehicle, table = _parse_solomon_table(file_path)
+    try:
+        np.savez(cache_path, vehicle=vehicle, table=table)
+    except OSError:
+        pass  # Read-only data directory; parsing still works
+    return _solomon_arrays(vehicle, table)
 
 
 def load_solomon_data(file_path, n_customers=None, n_depots=4, seed=42):
     """
-    Parses a Solomon format file (e.g., c101.txt).
-    Extracts Main Depot and Customers.
-    Generates synthetic Mobile Depots bounds of customers.
+    Loads a Solomon format file (e.g., c101.txt).
+    Extracts Main Depot, Customers, their demand and time windows.
+    Generates synthetic Mobile Depots within the bounds of the customers.
     """
-    customers = []
-    main_depot = None
+    arrays = load_solomon_arrays(file_path)
+    sl = slice(1, None if n_customers is None else n_customers + 1)
 
-    with open(file_path, "r") as f:
-        lines = f.readlines()
-
-    # Find CUSTOMER section
-    start_parsing = False
-    for line in lines:
-        if "CUSTOMER" in line:
-            start_parsing = False  # Next line is headers
-            continue
-        if "CUST NO." in line:
-            start_parsing = True
-            continue
-
-        if start_parsing:
-            parts = line.strip().split()
-            if not parts:
-                continue
-
-            # CUST NO.  XCOORD.   YCOORD. ...
-            cust_id = int(parts[0])
-            x = float(parts[1])
-            y = float(parts[2])
-            # demand = float(parts[3]) # Unused for now
-
-            if cust_id == 0:
-                main_depot = np.array([x, y])
-            else:
-                customers.append([x, y])
-
-    if n_customers:
-        customers = customers[:n_customers]
-
-    customers = np.array(customers)
-
-    if main_depot is None:
-        raise ValueError("Could not find depot (Cust No 0) in file")
+    main_depot = arrays["coords"][0]
+    customers = arrays["coords"][sl]
 
     # Generate synthetic mobile depots within customer bounds
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     min_x, min_y = customers.min(axis=0)
     max_x, max_y = customers.max(axis=0)
 
-    mobile_depots = np.random.uniform(
+    mobile_depots = rng.uniform(
         low=[min_x, min_y], high=[max_x, max_y], size=(n_depots, 2)
     )
 
-    return ProblemInstance(main_depot, mobile_depots, customers)
+    return ProblemInstance(
+        main_depot,
+        mobile_depots,
+        customers,
+        demand=arrays["demand"][sl],
+        ready_time=arrays["ready_time"][sl],
+        due_date=arrays["due_date"][sl],
+        service_time=arrays["service_time"][sl],
+    )
 
 
-def generate_data(seed=42, mode="uniform", file_path=None):
+def generate_data(
+    seed=42,
+    mode="uniform",
+    file_path=None,
+    n_customers=20,
+    n_candidates=4,
+    n_clusters=3,
+    spread=5.0,
+):
     """
     Generates dataset based on mode.
     Modes:
     - 'uniform': Original random uniform
     - 'clustered': Clustered customer distribution
-    - 'solomon': Load from Solomon file
+    - 'solomon': Load from Solomon file (first `n_customers`, None = all)
+    Synthetic modes default to 20 customers when `n_customers` is None.
     """
     if mode == "solomon":
         if not file_path:
             raise ValueError("file_path is required for 'solomon' mode")
-        # Defaulting to 25 customers for quick plotting if not specified?
-        # The user said "first 20 customers" in previous turn.
-        # Let's default to 20 for speed/viz unless full
-        return load_solomon_data(file_path, n_customers=20, seed=seed)
+        return load_solomon_data(
+            file_path, n_customers=n_customers, n_depots=n_candidates, seed=seed
+        )
 
     if mode == "clustered":
-        return generate_clustered_data(seed=seed)
+        return generate_clustered_data(
+            seed=seed,
+            n_customers=n_customers or 20,
+            n_depots=n_candidates,
+            n_clusters=n_clusters,
+            spread=spread,
+        )
 
     # Default / Uniform
-    np.random.seed(seed)
-
-    # Main Depot
-    main_depot = np.array([0, 0])
-
-    # 4 Mobile Depots (Potential Locations)
-    # Spread them out a bit to make the choice interesting
-    mobile_depots = np.random.uniform(10, 30, size=(4, 2))
-
-    # 20 Customers
-    customers = np.random.uniform(30, 80, size=(20, 2))
-
-    return ProblemInstance(main_depot, mobile_depots, customers)
+    return generate_instances(
+        1, mode="uniform", seed=seed, n_customers=n_customers or 20, n_candidates=n_candidates
+    )[0]
@@ -0,0 +1,49 @@
+import numpy as np
+from scipy.spatial.distance import cdist
+
+
+def pairwise_distances(a, b):
+    """
+    Euclidean distances between every row of `a` and every row of `b`.
+    Returns an array of shape (len(a), len(b)).
+    """
+    a = np.asarray(a, dtype=float).reshape(-1, 2)
+    b = np.asarray(b, dtype=float).reshape(-1, 2)
+    return cdist(a, b)
+
+
+def build_distance_matrix(depots, customers, main_depot=None, open_loop=False):
+    """
+    Builds the full node distance matrix in a single cdist pass.
+
+    Node indexing (shared by all routers):
+    - 0..N-1: Depots
+    - N..N+M-1: Customers
+    - N+M: Main depot (only if main_depot is given)
+
+    If open_loop: Cost(Customer -> Depot) = 0 (virtual return arc).
+    """
+    depots = np.asarray(depots, dtype=float).reshape(-1, 2)
+    customers = np.asarray(customers, dtype=float).reshape(-1, 2)
+    blocks = [depots, customers]
+    if main_depot is not None:
+        blocks.append(np.asarray(main_depot, dtype=float).reshape(1, 2))
+
+    points = np.vstack(blocks)
+    dist = cdist(points, points)
+
+    if open_loop:
+        num_depots = len(depots)
+        num_nodes = num_depots + len(customers)
+        dist[num_depots:num_nodes, :num_depots] = 0.0
+
+    return dist
+
+
+def truck_distance_matrix(dist, num_depots):
+    """
+    Extracts the truck matrix (Depots 0..N-1, Main = N) from a matrix
+    built by build_distance_matrix with a main depot.
+    """
+    truck_idx = np.append(np.arange(num_depots), len(dist) - 1)
+    return dist[np.ix_(truck_idx, truck_idx)]
@@ -0,0 +1,98 @@
+import os
+import time
+import gurobipy as gp
+
+# Parameters that can be set on the shared environment (inherited by every
+# model built on it; a model's own setParam still overrides them)
+ENV_PARAMS = ("Threads", "MemLimit", "NodefileStart", "LogFile", "OutputFlag")
+
+
+class EnvManager:
+    """
+    One started gp.Env per process, shared by every model the locators and
+    routers build (and read back from the model cache). The environment and
+    its license check are set up once per worker instead of once per model;
+    worker caps (Threads, MemLimit, NodefileStart) and the LogFile are set
+    on it once. A LogFile containing "{pid}" gets the worker's process id,
+    so parallel workers do not write into the same log.
+    """
+
+    def __init__(self):
+        self.params = {}
+        self.env = None
+        self.pid = None
+        self.models = 0  # Models built on the shared env
+        self.envs = 0  # Environments started (1 unless reconfigured)
+        self.setup_time = 0.0  # Seconds spent starting environments
+
+    def configure(self, **params):
+        """Sets the environment parameters (restarts the env if they change)."""
+        unknown = [key for key in params if key not in ENV_PARAMS]
+        if unknown:
+            raise ValueError(f"Unsupported environment parameter(s): {unknown}")
+        params = {key: val for key, val in params.items() if val is not None}
+        if params != self.params:
+            self.close()
+            self.params = params
+
+    def get(self):
+        """The shared env, started on first use (and again after a fork)."""
+        if self.env is None or self.pid != os.getpid():
+            start = time.perf_counter()
+            env = gp.Env(empty=True)
+            for key, val in self.params.items():
+                if key == "LogFile":
+                    val = val.format(pid=os.getpid())
+                env.setParam(key, val)
+            env.start()
+            self.env, self.pid = env, os.getpid()
+            self.envs += 1
+            self.setup_time += time.perf_counter() - start
+        self.models += 1
+        return self.env
+
+    def close(self):
+        if self.env is not None and self.pid == os.getpid():
+            self.env.dispose()
+        self.env = None
+
+    def stats(self):
+        """
+        Usage counters. `saved_time` estimates the setup avoided against
+        starting one environment per model (mean start time x extra models).
+        """
+        per_env = self.setup_time / self.envs if self.envs else 0.0
+        return {
+            "params": dict(self.params),
+            "envs": self.envs,
+            "models": self.models,
+            "setup_time": self.setup_time,
+            "saved_time": per_env * max(self.models - self.envs, 0),
+        }
+
+
+_manager = EnvManager()
+
+
+def configure_env(**params):
+    """Sets Threads / MemLimit / NodefileStart / LogFile / OutputFlag of this process' env."""
+    _manager.configure(**params)
+
+
+def env_params():
+    """Current environment parameters (to configure child worker processes)."""
+    return dict(_manager.params)
+
+
+def init_worker(params):
+    """ProcessPoolExecutor initializer: same env parameters as the parent."""
+    configure_env(**params)
+
+
+def shared_env():
+    """Environment to pass to gp.Model(..., env=shared_env())."""
+    return _manager.get()
+
+
+def env_stats():
+    return _manager.stats()
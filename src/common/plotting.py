@@ -1,39 +1,69 @@
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import numpy as np
 import os
 
+# Customer index labels are skipped above this size (unreadable and slow)
+LABEL_LIMIT = 100
+
+VEHICLE_COLORS = [
+    "#1f77b4",
+    "#ff7f0e",
+    "#2ca02c",
+    "#9467bd",
+    "#e377c2",
+    "#7f7f7f",
+    "#bcbd22",
+    "#17becf",
+]
+
+
+def _route_segments(stops):
+    """(n, 2) stop coordinates -> (n-1, 2, 2) segments for a LineCollection."""
+    stops = np.asarray(stops, dtype=float)
+    return np.stack([stops[:-1], stops[1:]], axis=1)
+
 
 def plot_solution(instance, result, save_path=None):
     """
     Plots the VRP/LRP solution.
     Handles both Single Depot and Multi-Depot (LRP) results.
+    All routes of a kind are drawn as one LineCollection and the legend is
+    assembled once at the end, so large instances render quickly.
     """
-    plt.figure(figsize=(10, 8))
+    fig, ax = plt.subplots(figsize=(10, 8))
+    handles = []
 
     # Common: Plot All Customers
-    plt.scatter(
-        instance.customers[:, 0],
-        instance.customers[:, 1],
-        c="skyblue",
-        edgecolors="blue",
-        s=80,
-        label="Customers",
-        zorder=5,
+    customers = np.asarray(instance.customers)
+    large = len(customers) > LABEL_LIMIT
+    handles.append(
+        ax.scatter(
+            customers[:, 0],
+            customers[:, 1],
+            c="skyblue",
+            edgecolors="blue",
+            s=20 if large else 80,
+            label="Customers",
+            zorder=5,
+        )
     )
-    for i, (x, y) in enumerate(instance.customers):
-        plt.text(x, y + 0.5, str(i), fontsize=8, ha="center", color="darkblue")
+    if not large:
+        for i, (x, y) in enumerate(customers):
+            ax.text(x, y + 0.5, str(i), fontsize=8, ha="center", color="darkblue")
 
     # Common: Plot Main Depot
-    plt.scatter(
-        instance.main_depot[0],
-        instance.main_depot[1],
-        c="black",
-        marker="s",
-        s=100,
-        label="Main Depot",
-        zorder=10,
+    main = np.asarray(instance.main_depot, dtype=float)
+    handles.append(
+        ax.scatter(
+            main[0], main[1], c="black", marker="s", s=100, label="Main Depot", zorder=10
+        )
     )
 
+    truck_style = {"colors": "black", "linewidths": 2, "linestyles": "--"}
+    truck_handle = Line2D([], [], color="black", linewidth=2, linestyle="--", label="Truck")
+
     # Check Mode
     is_lrp = "sec_assignments" in result
 
@@ -41,91 +71,56 @@ def plot_solution(instance, result, save_path=None):
         # --- LRP LOGIC ---
 
         # 1. Plot Depots (Open vs Closed)
-        # All potential depots
-        all_depots = result.get(
-            "all_potential_depots", instance.mobile_depots
-        )  # Fallback if not in result
-        # Open indices
-        open_indices = result["open_depots"]  # e.g. [1, 3]
-
-        for i, loc in enumerate(all_depots):
-            if i in open_indices:
-                plt.scatter(
-                    loc[0],
-                    loc[1],
-                    c="red",
-                    marker="*",
-                    s=200,
-                    label="Active Depot"
-                    if "Active Depot" not in plt.gca().get_legend_handles_labels()[1]
-                    else "",
-                    zorder=10,
-                )
-            else:
-                plt.scatter(loc[0], loc[1], c="lightgray", marker="x", s=50, zorder=1)
-
-        # 2. Truck Route (Edges)
-        # Nodes: 0..N-1 (Depots), N (Main)
-        truck_edges = result["truck_edges"]
-        N = len(all_depots)
-
-        # Helper to get loc
-        def get_loc(idx):
-            if idx == N:
-                return instance.main_depot
-            return all_depots[idx]
-
-        for u, v in truck_edges:
-            p1 = get_loc(u)
-            p2 = get_loc(v)
-            plt.plot(
-                [p1[0], p2[0]],
-                [p1[1], p2[1]],
-                c="black",
-                linewidth=2,
-                linestyle="--",
-                label="Truck"
-                if "Truck" not in plt.gca().get_legend_handles_labels()[1]
-                else "",
+        all_depots = np.asarray(
+            result.get("all_potential_depots", instance.mobile_depots), dtype=float
+        )
+        open_mask = np.zeros(len(all_depots), dtype=bool)
+        open_mask[list(result["open_depots"])] = True
+
+        handles.append(
+            ax.scatter(
+                all_depots[open_mask, 0],
+                all_depots[open_mask, 1],
+                c="red",
+                marker="*",
+                s=200,
+                label="Active Depot",
+                zorder=10,
             )
+        )
+        ax.scatter(
+            all_depots[~open_mask, 0],
+            all_depots[~open_mask, 1],
+            c="lightgray",
+            marker="x",
+            s=50,
+            zorder=1,
+        )
 
-        # 3. Secondary Routes
-        colors = [
-            "#1f77b4",
-            "#ff7f0e",
-            "#2ca02c",
-            "#9467bd",
-            "#e377c2",
-            "#7f7f7f",
-            "#bcbd22",
-            "#17becf",
-        ]
-
-        sec_assignments = result["sec_assignments"]
-        for d_idx, fleets in sec_assignments.items():
-            depot_loc = all_depots[d_idx]
-
+        # 2. Truck Route (Edges). Nodes: 0..N-1 (Depots), N (Main)
+        truck_nodes = np.vstack([all_depots, main])
+        truck_edges = np.asarray(result["truck_edges"], dtype=int).reshape(-1, 2)
+        if len(truck_edges):
+            ax.add_collection(LineCollection(truck_nodes[truck_edges], **truck_style))
+            handles.append(truck_handle)
+
+        # 3. Secondary Routes (closed loops at their depot)
+        segments, seg_colors = [], []
+        for d_idx, fleets in result["sec_assignments"].items():
+            depot_loc = all_depots[int(d_idx)]
             for v_idx, path in fleets.items():
                 if not path:
                     continue
-
-                # Pick color (unique per vehicle globally? or per depot?)
-                # Let's simple rotate colors
-                color = colors[(d_idx * 4 + v_idx) % len(colors)]
-
-                route_coords = [depot_loc]
-                for c_idx in path:
-                    route_coords.append(instance.customers[c_idx])
-                route_coords.append(depot_loc)  # Closed loop always for LRP secondary?
-
-                route_coords = np.array(route_coords)
-                plt.plot(
-                    route_coords[:, 0],
-                    route_coords[:, 1],
-                    c=color,
-                    linewidth=1.5,
-                    alpha=0.8,
+                color = VEHICLE_COLORS[(int(d_idx) * 4 + int(v_idx)) % len(VEHICLE_COLORS)]
+                stops = np.vstack([depot_loc, customers[list(path)], depot_loc])
+                segments.append(_route_segments(stops))
+                seg_colors += [color] * (len(stops) - 1)
+        if segments:
+            ax.add_collection(
+                LineCollection(
+                    np.concatenate(segments), colors=seg_colors, linewidths=1.5, alpha=0.8
                 )
+            )
 
         title_str = f"2-Echelon LRP (Truck Dist: {result['truck_dist']:.1f}, Sec Cost: {result['total_sec_cost']:.1f})"
 
@@ -134,75 +129,77 @@ def plot_solution(instance, result, save_path=None):
 
         # 1. Selected Depot
         sel_idx = result["selected_depot_idx"]
-        sel_loc = instance.mobile_depots[
-            sel_idx
-        ]  # Note: This assumes instance.mobile_depots matches result logic.
-        # In Scen 1/2, 'mobile_depots' in instance might not clear.
-        # But 'result' has 'selected_depot_loc' usually
-        if "selected_depot_loc" in result:
-            sel_loc = result["selected_depot_loc"]
-
-        plt.scatter(
-            sel_loc[0],
-            sel_loc[1],
-            c="red",
-            marker="*",
-            s=200,
-            label="Selected Depot",
-            zorder=10,
+        # 'selected_depot_loc' is authoritative (Scen 1/2 locators replace
+        # the instance's mobile depots)
+        sel_loc = np.asarray(
+            result.get("selected_depot_loc", instance.mobile_depots[sel_idx]),
+            dtype=float,
+        )
+
+        handles.append(
+            ax.scatter(
+                sel_loc[0],
+                sel_loc[1],
+                c="red",
+                marker="*",
+                s=200,
+                label="Selected Depot",
+                zorder=10,
+            )
         )
 
         # Plot others if they exist (for Scen 0)
-        # If result has 'all_potential_depots', use that
         if "all_potential_depots" in result:
-            for i, loc in enumerate(result["all_potential_depots"]):
-                if i != sel_idx:
-                    plt.scatter(loc[0], loc[1], c="lightgray", marker="x", s=30)
+            others = np.asarray(result["all_potential_depots"], dtype=float)
+            others = np.delete(others, sel_idx, axis=0)
+            ax.scatter(others[:, 0], others[:, 1], c="lightgray", marker="x", s=30)
 
         # 2. Truck Route
-        plt.plot(
-            [instance.main_depot[0], sel_loc[0]],
-            [instance.main_depot[1], sel_loc[1]],
-            c="black",
-            linewidth=2,
-            linestyle="--",
-            label="Truck",
-        )
+        ax.add_collection(LineCollection([np.vstack([main, sel_loc])], **truck_style))
+        handles.append(truck_handle)
 
         # 3. Assignments
-        colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#9467bd"]
-        assignments = result["assignments"]
-        for v_idx, path in assignments.items():
+        colors = VEHICLE_COLORS[:4]
+        segments, seg_colors = [], []
+        for v_idx, path in result["assignments"].items():
             if not path:
                 continue
-            color = colors[v_idx % len(colors)]
-
-            route_coords = [sel_loc]
-            for c_idx in path:
-                route_coords.append(instance.customers[c_idx])
-
+            color = colors[int(v_idx) % len(colors)]
+            stops = [sel_loc, customers[list(path)]]
             if not result.get("open_loop", False):
-                route_coords.append(sel_loc)
-
-            route_coords = np.array(route_coords)
-            plt.plot(
-                route_coords[:, 0],
-                route_coords[:, 1],
-                c=color,
-                linewidth=2,
-                alpha=0.8,
-                label=f"Veh {v_idx + 1}",
+                stops.append(sel_loc)
+            stops = np.vstack(stops)
+            segments.append(_route_segments(stops))
+            seg_colors += [color] * (len(stops) - 1)
+            handles.append(
+                Line2D([], [], color=color, linewidth=2, label=f"Veh {int(v_idx) + 1}")
+            )
+        if segments:
+            ax.add_collection(
+                LineCollection(
+                    np.concatenate(segments), colors=seg_colors, linewidths=2, alpha=0.8
+                )
             )
 
         title_str = f"VRP Solution (Max Dist: {result.get('max_dist', 0):.2f})"
 
-    plt.title(title_str)
-    plt.legend(loc="upper left", bbox_to_anchor=(1, 1))
-    plt.grid(True, linestyle=":", alpha=0.6)
+    ax.autoscale_view()
+    ax.set_title(title_str)
+    ax.legend(handles=handles, loc="upper left", bbox_to_anchor=(1, 1))
+    ax.grid(True, linestyle=":", alpha=0.6)
 
     if save_path:
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        plt.savefig(save_path, dpi=150, bbox_inches="tight")
-        plt.close()
+        fig.savefig(save_path, dpi=150, bbox_inches="tight")
+        plt.close(fig)
     else:
         plt.show()
+
+
+def plot_worker(instance, result, save_path):
+    """Background-process entry point: renders one plot with the Agg backend."""
+    import matplotlib
+
+    matplotlib.use("Agg")  # Never opens a window; safe without a display
+    plot_solution(instance, result, save_path=save_path)
+    return save_path
@@ -1,18 +1,173 @@
 import os
 import time
 import json
+import cProfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import shutil
 import numpy as np
+from common.cache import ModelCache, ResultCache
 from common.data_gen import generate_data
-from common.plotting import plot_solution
+from common.gurobi_env import configure_env, env_stats
+from common.store import ResultStore
+from common.plotting import plot_solution, plot_worker
+from common.timing import PhaseTimer
+from common.tuning import param_key, tuned_params
 from common.vehicles import create_fleet
 from modules.locators import FixedCandidateLocator, PMedianLocator, CentroidLocator
 from modules.routers import VRPRouter, TwoEchelonRouter
+from modules.alns import ALNSRouter
+from modules.decomposition import BendersTwoEchelonRouter
+
+
+def np_encoder(o):
+    """JSON fallback for numpy scalars/arrays in results and metrics."""
+    if isinstance(o, np.integer):
+        return int(o)
+    if isinstance(o, np.floating):
+        return float(o)
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    return str(o)
+
+
+PLOT_MODES = ("sync", "async", "false")
+
+
+def _run_worker(output_base, cache_dir, store_name, env_params, config):
+    """Process-pool entry point: one experiment per call."""
+    import matplotlib
+
+    matplotlib.use("Agg")  # Worker processes never open windows
+    if config.get("plot") == "async":
+        # The pool worker is already off the main process' critical path,
+        # and a per-call plot process would not outlive this call
+        config = dict(config, plot="sync")
+    return ExperimentRunner(
+        output_base, cache_dir=cache_dir, store_name=store_name, env_params=env_params
+    )._run_safe(config)
 
 
 class ExperimentRunner:
-    def __init__(self, output_base="solutions"):
+    def __init__(
+        self,
+        output_base="solutions",
+        cache_dir=".cache/results",
+        store_name="results.sqlite",
+        env_params=None,
+    ):
+        """
+        :param cache_dir: Result cache location (None disables caching)
+        :param store_name: ResultStore file inside output_base that every
+            run is appended to (None disables the store)
+        :param env_params: Parameters of the Gurobi environment shared by all
+            models of a process (common.gurobi_env), e.g. {"Threads": 2,
+            "MemLimit": 8, "NodefileStart": 4, "LogFile": "gurobi_{pid}.log"}.
+            Worker processes of run_many get the same parameters.
+        """
         self.output_base = output_base
         os.makedirs(self.output_base, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.cache = ResultCache(cache_dir) if cache_dir else None
+        self.store_name = store_name
+        self.store = (
+            ResultStore(os.path.join(output_base, store_name)) if store_name else None
+        )
+        self._plot_pool = None
+        self._plot_jobs = []
+        self.env_params = env_params or {}
+        configure_env(**self.env_params)
+
+    def _run_safe(self, config):
+        try:
+            return self.run_experiment(config)
+        except Exception as e:
+            print(f"Error running {config.get('run_name')}: {e}")
+            metrics = {"config": config, "solved": False, "error": str(e)}
+            self._record(config, metrics)
+            return metrics
+
+    def _record(self, config, metrics, res=None):
+        """Appends the run to the ResultStore (metrics['run_id'] is set)."""
+        if self.store is None:
+            return
+        try:
+            metrics["run_id"] = self.store.append(config, metrics, res)
+        except Exception as e:
+            # A locked/broken store must not lose the experiment itself
+            print(f"Could not record {config.get('run_name')} in the result store: {e}")
+
+    def _submit_plot(self, data, res, plot_path):
+        """Renders a plot in the background plot process (Agg backend)."""
+        if self._plot_pool is None:
+            # One long-lived process; spawn avoids forking Gurobi/GUI state
+            self._plot_pool = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            )
+        job = self._plot_pool.submit(plot_worker, data, res, plot_path)
+        self._plot_jobs.append(job)
+        return job
+
+    def wait_plots(self):
+        """Blocks until all async plots are written and stops the plot process."""
+        for job in self._plot_jobs:
+            try:
+                job.result()
+            except Exception as e:
+                print(f"Plot failed: {e}")
+        self._plot_jobs = []
+        if self._plot_pool is not None:
+            self._plot_pool.shutdown()
+            self._plot_pool = None
+
+    def run_many(self, configs, workers=1, threads_per_job=None, prepare=None):
+        """
+        Runs experiments in a process pool and yields (index, metrics) as each
+        one finishes (not in submission order).
+
+        :param workers: Parallel jobs (1 = run in this process)
+        :param threads_per_job: Gurobi Threads per job. Defaults to
+            cpu_count // workers so that workers x threads matches the machine.
+        :param prepare: Optional hook called with each config right before it
+            is submitted (used by BudgetScheduler to assign time limits).
+        """
+        if threads_per_job is None and workers > 1:
+            threads_per_job = max(1, (os.cpu_count() or 1) // workers)
+
+        def submit_config(i):
+            config = configs[i]
+            if threads_per_job is not None:
+                config["threads"] = threads_per_job
+            if prepare is not None:
+                prepare(i, config)
+            return config
+
+        if workers <= 1:
+            for i in range(len(configs)):
+                config = submit_config(i)
+                yield i, self._run_safe(config)
+            return
+
+        # Keep at most `workers` jobs in flight so `prepare` sees fresh state
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            next_idx = 0
+            while next_idx < len(configs) or pending:
+                while next_idx < len(configs) and len(pending) < workers:
+                    config = submit_config(next_idx)
+                    fut = pool.submit(
+                        _run_worker,
+                        self.output_base,
+                        self.cache_dir,
+                        self.store_name,
+                        self.env_params,
+                        config,
+                    )
+                    pending[fut] = next_idx
+                    next_idx += 1
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield pending.pop(fut), fut.result()
 
     def run_experiment(self, config):
         """
@@ -23,20 +178,84 @@ class ExperimentRunner:
         - scenario (int): 0-3
         - locator (str): 'fixed', 'p-median', 'centroid'
         - candidates (int): Number of candidates (Scen 3/1)
+        - pmedian_mode (str): 'auto' (default; exact enumeration for P=1,
+          greedy + Teitz-Bart otherwise), 'heuristic' or 'mip' (exact,
+          warm-started from the heuristic)
+        - centroid_restarts (int): k-means++ restarts of the centroid locator
+          (default 8)
+        - centroid_truck_weight (float): Weight of the main-depot distance in
+          the centroid locator objective (default 0)
         - fleet_mode (str): 'homog', 'mix_1', 'mix_2'
         - loop_type (str): 'closed', 'open'
         - seed (int): Random seed for data generation
+        - n_customers (int): Customers to generate, or to read from a Solomon
+          file (default 20; None = whole Solomon file)
+        - n_candidates (int): Candidate depot sites to generate (default 4)
+        - n_clusters (int): Customer clusters in 'clustered' mode (default 3)
+        - cluster_spread (float): Std of customers around a cluster center
+          in 'clustered' mode (default 5)
+        - unit_demand (bool): Ignore file demands, 1 per customer (default False)
+        - formulation (str): 'mtz' (default) or 'dfj-lazy' subtour elimination
+        - symmetry_breaking (bool): Order identical vehicles (default False)
+        - warm_start (bool): Savings/sweep heuristic as MIP start (default False)
+        - builder (str): 2E-LRP model builder, 'loops' (default) or 'matrix'
+        - tuned_params (bool): Apply the tuned Gurobi parameters of the
+          scenario class from tuned_params.json (src/tune.py) to the exact
+          routers (default True; explicit time_limit/mip_gap/threads win)
+        - model_cache (bool): Reuse built 2E-LRP models from .cache/models
+          (MPS + variable index), skipping model construction (default False)
+        - router (str): 'exact' (Gurobi, default), 'alns' (no Gurobi license)
+          or 'benders' (Scenario 3: master + per-depot VRP subproblems)
+        - benders_workers (int): Subproblem processes for 'benders'
+          (default: one per candidate, capped at the CPU count)
+        - alns_iterations (int): ALNS iteration budget (default 5000)
+        - alns_time_limit (float): ALNS time budget in seconds (default 60)
+        - time_limit (float): Router TimeLimit in seconds (also caps ALNS)
+        - mip_gap (float): Router MIPGap termination
+        - stall_time (float): Stop after N seconds without incumbent improvement
+        - threads (int): Gurobi Threads for locator and router models
+        - force (bool): Re-solve even if an identical run is cached
+        - profile (bool): Dump a cProfile of the run to profile.prof
+        - plot (str): 'sync' (default), 'async' (background process; call
+          wait_plots() before exiting) or 'false'
         - run_name (str): Identifier for saving results
         """
+        profiler = cProfile.Profile() if config.get("profile") else None
+        if profiler is None:
+            return self._run_experiment(config, None)
+        # Always stop the profiler: a failed run must not leave it active for
+        # the next profiled run of this process
+        profiler.enable()
+        try:
+            return self._run_experiment(config, profiler)
+        finally:
+            profiler.disable()
+
+    def _run_experiment(self, config, profiler):
         start_time = time.time()
+        plot_mode = str(config.get("plot", "sync")).lower()
+        if plot_mode not in PLOT_MODES:
+            raise ValueError(f"Unknown plot mode: {plot_mode}")
+        timer = PhaseTimer()
+        env_before = env_stats()
 
-        # 1. Setup Data
         # 1. Setup Data
         seed = config.get("seed", 42)
         data_mode = config.get("data_mode", "uniform")
         data_file = config.get("data_file")
         print(f"Generating data with seed {seed} (Mode: {data_mode})...")
-        data = generate_data(seed=seed, mode=data_mode, file_path=data_file)
+        with timer.phase("data"):
+            data = generate_data(
+                seed=seed,
+                mode=data_mode,
+                file_path=data_file,
+                n_customers=config.get("n_customers", 20),
+                n_candidates=config.get("n_candidates", 4),
+                n_clusters=config.get("n_clusters", 3),
+                spread=config.get("cluster_spread", 5.0),
+            )
+            if config.get("unit_demand"):
+                data.demand = np.ones(data.num_customers)
 
         # 2. Setup Fleet
         fleet_mode = config.get("fleet_mode", "homog")
@@ -48,15 +267,26 @@ class ExperimentRunner:
         n_candidates = config.get("candidates", 1)
 
         print(f"Running Locator ({locator_type})...")
+        timer.start("locator")
         if scenario == 0:
             locator = FixedCandidateLocator()
             # Scenario 0 implies using the fixed ones regardless of logic, usually all 4
             candidates = locator.find_depots(data)
         else:
             if locator_type == "p-median":
-                locator = PMedianLocator()
+                locator = PMedianLocator(
+                    threads=config.get("threads"),
+                    timer=timer,
+                    mode=config.get("pmedian_mode", "auto"),
+                    seed=seed,
+                )
             elif locator_type == "centroid":
-                locator = CentroidLocator()
+                locator = CentroidLocator(
+                    n_restarts=config.get("centroid_restarts", 8),
+                    truck_weight=config.get("centroid_truck_weight", 0.0),
+                    seed=seed,
+                    timer=timer,
+                )
             else:
                 # Default fallback or strict fixed?
                 locator = FixedCandidateLocator()
@@ -64,28 +294,180 @@ class ExperimentRunner:
             # Logic: If Scen 3, we pick 'candidates' number of best spots
             # If default Fixed, it returns all mobile_depots (4)
             candidates = locator.find_depots(data, n_candidates=n_candidates)
+        timer.stop("locator")
+
+        # Every customer must be served: fail before the router model is built.
+        # Scenario 3 routes the whole fleet from each depot the locator returned.
+        fleet_capacity = sum(v.capacity for v in fleet)
+        if scenario == 3:
+            fleet_capacity *= len(candidates)
+        total_demand = float(data.demand.sum())
+        if total_demand > fleet_capacity:
+            raise ValueError(
+                f"Total demand {total_demand:g} exceeds the fleet capacity "
+                f"{fleet_capacity:g} ({fleet_mode}); use unit_demand "
+                f"(--unit-demand), fewer customers or a larger fleet"
+            )
 
         # 4. Router Step
         loop_type = config.get("loop_type", "closed")
+        formulation = config.get("formulation", "mtz")
+        symmetry_breaking = config.get("symmetry_breaking", False)
+        warm_start = config.get("warm_start", False)
+        router_type = config.get("router", "exact")
+        solver_params = {}
+        if config.get("time_limit") is not None:
+            solver_params["TimeLimit"] = config["time_limit"]
+        if config.get("mip_gap") is not None:
+            solver_params["MIPGap"] = config["mip_gap"]
+        if config.get("threads") is not None:
+            solver_params["Threads"] = config["threads"]
+        stall_time = config.get("stall_time")
+        use_tuned = config.get("tuned_params", True)
+        tuned_key = param_key(
+            "2e" if scenario == 3 else "vrp",
+            scenario in (2, 3) and loop_type == "open",
+            fleet,
+        )
         res = None
 
-        print(f"Running Router (Scenario {scenario})...")
-        if scenario == 3:
-            router = TwoEchelonRouter(data, candidates, fleet)
-            res = router.solve(open_loop=(loop_type == "open"))
+        run_name = config.get("run_name", f"scen_{scenario}_{int(time.time())}")
+        output_dir = os.path.join(self.output_base, run_name)
+
+        # Result Cache: every input that changes the solve is part of the key
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(
+                data,
+                fleet,
+                candidates,
+                scenario=scenario,
+                loop_type=loop_type,
+                seed=seed,
+                router=router_type,
+                formulation=formulation,
+                symmetry_breaking=symmetry_breaking,
+                warm_start=warm_start,
+                builder=config.get("builder", "loops"),
+                model_cache=bool(config.get("model_cache")),
+                solver_params={k: v for k, v in solver_params.items() if k != "Threads"},
+                stall_time=stall_time,
+                tuned_params=tuned_params(tuned_key)
+                if use_tuned and router_type == "exact"
+                else None,
+                alns=(config.get("alns_iterations"), config.get("alns_time_limit"))
+                if router_type == "alns"
+                else None,
+            )
+            hit = None if config.get("force") else self.cache.get(cache_key)
+            if hit is not None:
+                entry, metrics = hit
+                shutil.copytree(
+                    entry,
+                    output_dir,
+                    ignore=shutil.ignore_patterns("metrics.json"),
+                    dirs_exist_ok=True,
+                )
+                metrics["config"] = config
+                metrics["cache_hit"] = True
+                metrics["cache_key"] = cache_key
+                metrics["elapsed_time"] = time.time() - start_time
+                print(f"Cache hit ({cache_key[:12]}): results copied to {output_dir}")
+                result_path = os.path.join(output_dir, "result.json")
+                cached_res = None
+                if os.path.exists(result_path):
+                    with open(result_path) as f:
+                        cached_res = json.load(f)
+                self._record(config, metrics, cached_res)
+                return metrics
+
+        print(f"Running Router (Scenario {scenario}, {router_type})...")
+        timer.start("router")
+        if router_type == "alns":
+            router = ALNSRouter(
+                data,
+                candidates,
+                fleet,
+                two_echelon=(scenario == 3),
+                max_iterations=config.get("alns_iterations", 5000),
+                time_limit=config.get("time_limit")
+                or config.get("alns_time_limit", 60.0),
+                seed=seed,
+            )
+            res = router.solve(open_loop=(scenario in (2, 3) and loop_type == "open"))
+        elif router_type == "benders":
+            if scenario != 3:
+                raise ValueError("The benders router only supports Scenario 3")
+            router = BendersTwoEchelonRouter(
+                data,
+                candidates,
+                fleet,
+                timer=timer,
+                workers=config.get("benders_workers"),
+            )
+            res = router.solve(
+                open_loop=(loop_type == "open"),
+                warm_start=warm_start,
+                params=solver_params,
+                stall_time=stall_time,
+            )
+        elif scenario == 3:
+            router = TwoEchelonRouter(data, candidates, fleet, timer=timer)
+            res = router.solve(
+                open_loop=(loop_type == "open"),
+                formulation=formulation,
+                symmetry_breaking=symmetry_breaking,
+                warm_start=warm_start,
+                params=solver_params,
+                stall_time=stall_time,
+                builder=config.get("builder", "loops"),
+                model_cache=ModelCache() if config.get("model_cache") else None,
+                tuned=use_tuned,
+            )
             # Note: Scen 3 logic might just ignore open_loop if not implemented, but passing it is safe
         else:
-            router = VRPRouter(data, candidates, fleet)
-            res = router.solve(open_loop=(scenario == 2 and loop_type == "open"))
-
+            router = VRPRouter(data, candidates, fleet, timer=timer)
+            res = router.solve(
+                open_loop=(scenario == 2 and loop_type == "open"),
+                formulation=formulation,
+                symmetry_breaking=symmetry_breaking,
+                warm_start=warm_start,
+                params=solver_params,
+                stall_time=stall_time,
+                tuned=use_tuned,
+            )
+
+        timer.stop("router")
         elapsed = time.time() - start_time
 
+        # Shared Gurobi env: models of this run vs. one env start per model
+        env_after = env_stats()
+        env_models = env_after["models"] - env_before["models"]
+        env_setup = env_after["setup_time"] - env_before["setup_time"]
+        per_env = env_after["setup_time"] / env_after["envs"] if env_after["envs"] else 0.0
+        gurobi_env = {
+            "params": env_after["params"],
+            "models": env_models,
+            "setup_time": env_setup,
+            "saved_time": max(per_env * env_models - env_setup, 0.0),
+        }
+        print(
+            f"Shared Gurobi env: {env_models} models, setup {env_setup * 1e3:.1f} ms "
+            f"(~{gurobi_env['saved_time'] * 1e3:.1f} ms saved vs. one env per model)"
+        )
+
         # 5. Save Results
-        run_name = config.get("run_name", f"scen_{scenario}_{int(time.time())}")
-        output_dir = os.path.join(self.output_base, run_name)
         os.makedirs(output_dir, exist_ok=True)
 
-        metrics = {"config": config, "elapsed_time": elapsed, "solved": False}
+        plot_job = None
+        metrics = {
+            "config": config,
+            "elapsed_time": elapsed,
+            "solved": False,
+            "cache_hit": False,
+            "cache_key": cache_key,
+            "gurobi_env": gurobi_env,
+        }
 
         if res:
             metrics["solved"] = True
@@ -94,21 +476,19 @@ class ExperimentRunner:
             metrics["obj_val"] = float(metrics["truck_dist"]) + float(
                 metrics["sec_cost"]
             )  # approx
+            metrics["lazy_cuts"] = res["solver_stats"].get("lazy_cuts", 0)
 
             # Save visual
             plot_path = os.path.join(output_dir, "plot.png")
-            plot_solution(data, res, save_path=plot_path)
+            with timer.phase("plot"):
+                if plot_mode == "async":
+                    plot_job = self._submit_plot(data, res, plot_path)
+                elif plot_mode == "sync":
+                    plot_solution(data, res, save_path=plot_path)
 
             # Save raw dict (converting numpy things)
-            def np_encoder(o):
-                if isinstance(o, np.integer):
-                    return int(o)
-                if isinstance(o, np.floating):
-                    return float(o)
-                if isinstance(o, np.ndarray):
-                    return o.tolist()
-                return str(o)
-
+            timer.start("report")
+            res["phases"] = timer.as_dict()
             with open(os.path.join(output_dir, "result.json"), "w") as f:
                 json.dump(res, f, default=np_encoder, indent=2)
 
@@ -137,8 +517,17 @@ class ExperimentRunner:
                 f.write(f"  Fleet Mode: {config.get('fleet_mode')}\n")
                 f.write(f"  Loop Type: {config.get('loop_type')}\n")
                 f.write(f"  Data Mode: {config.get('data_mode')}\n")
+                f.write(
+                    f"  Customers: {data.num_customers} "
+                    f"(Total Demand: {data.demand.sum():g})\n"
+                )
                 f.write(f"  Candidates (S3): {config.get('candidates')}\n")
-                f.write(f"  Seed: {config.get('seed')}\n\n")
+                f.write(f"  Seed: {config.get('seed')}\n")
+                f.write(f"  Formulation: {formulation}\n")
+                f.write(f"  Symmetry Breaking: {symmetry_breaking}\n")
+                f.write(f"  Warm Start: {warm_start}\n")
+                f.write(f"  Router: {router_type}\n")
+                f.write(f"  Time Limit: {config.get('time_limit')}\n\n")
 
                 # 2. Key Metrics
                 f.write("SOLUTION METRICS:\n")
@@ -154,9 +543,41 @@ class ExperimentRunner:
                             f"  Solver Status: {stats.get('status')} (Gap: {mip_gap})\n"
                         )
                     f.write(f"  Runtime: {stats.get('runtime', 0):.2f} s\n")
+                    f.write(f"  Model Build Time: {stats.get('build_time', 0):.2f} s\n")
+                    f.write(f"  Lazy Cuts Added: {stats.get('lazy_cuts', 0)}\n")
+                    if "subproblems" in stats:
+                        f.write(
+                            f"  Benders Subproblems: {stats['subproblems']} solved, "
+                            f"{stats['subproblem_cache_hits']} reused "
+                            f"({stats['subproblem_time']:.2f} s, "
+                            f"{stats['workers']} workers)\n"
+                        )
+                    if stats.get("sparsity"):
+                        sparsity = stats["sparsity"]
+                        f.write(
+                            f"  Depot-Bound Arcs: {sparsity['x_vars']} x vars "
+                            f"({sparsity['vars_avoided']} vars / "
+                            f"{sparsity['constrs_avoided']} rows avoided, "
+                            f"~{sparsity['mem_saved_mb']:.1f} MB saved)\n"
+                        )
+                    if stats.get("route_issues"):
+                        f.write(f"  Route Issues: {stats['route_issues']}\n")
+                f.write(
+                    f"  Gurobi Env: {gurobi_env['models']} models on the shared env "
+                    f"{gurobi_env['params'] or '(defaults)'}, setup "
+                    f"{gurobi_env['setup_time'] * 1e3:.1f} ms "
+                    f"(~{gurobi_env['saved_time'] * 1e3:.1f} ms saved)\n"
+                )
+                if res.get("heuristic"):
+                    heur = res["heuristic"]
+                    f.write(
+                        f"  Heuristic Start: {heur['method']} "
+                        f"(Cost: {heur['cost']:.4f}, Time: {heur['time']:.3f} s)\n"
+                    )
 
                 f.write("  Status: Solved\n")
-                f.write(f"  Solve Time: {elapsed:.2f} s\n")
+                f.write(f"  Solve Time: {timer.wall('router'):.2f} s\n")
+                f.write(f"  Total Elapsed: {elapsed:.2f} s\n")
                 f.write(f"  Total Objective: {metrics['obj_val']:.4f}\n")
                 f.write(f"  Truck Distance: {metrics['truck_dist']:.4f}\n")
                 f.write(f"  Total Secondary Cost: {metrics['sec_cost']:.4f}\n\n")
@@ -198,14 +619,14 @@ class ExperimentRunner:
                             # Calculate distance if not present
                             dist = calc_route_dist(path, loc, loc, data.customers)
 
-                            # Load / Utilization (Assumes Demand=1)
-                            load = len(path) * 1
+                            # Load / Utilization
+                            load = data.demand[path].sum()
                             cap = veh.capacity
                             util = (load / cap) * 100 if cap > 0 else 0
                             all_vehicle_loads.append(util)
 
                             f.write(f"      Traveled Distance: {dist:.2f}\n")
-                            f.write(f"      Load: {load}/{cap} ({util:.1f}%)\n")
+                            f.write(f"      Load: {load:g}/{cap} ({util:.1f}%)\n")
                 else:
                     # Single Depot Logic
                     sel_loc = res["selected_depot_loc"]
@@ -238,11 +659,11 @@ class ExperimentRunner:
                         f.write(f"      Traveled Distance: {dist:.2f}\n")
 
                         # Load / Utilization
-                        load = len(path) * 1
+                        load = data.demand[path].sum()
                         cap = veh.capacity
                         util = (load / cap) * 100 if cap > 0 else 0
                         all_vehicle_loads.append(util)
-                        f.write(f"      Load: {load}/{cap} ({util:.1f}%)\n")
+                        f.write(f"      Load: {load:g}/{cap} ({util:.1f}%)\n")
 
                 if all_vehicle_loads:
                     avg_util = sum(all_vehicle_loads) / len(all_vehicle_loads)
@@ -250,8 +671,31 @@ class ExperimentRunner:
                         f"\n  Average Fleet Capacity Utilization: {avg_util:.2f}%\n"
                     )
 
+                # 4. Phase Timings (wall / process CPU)
+                f.write("\nPHASE TIMINGS:\n")
+                for line in timer.report_lines():
+                    f.write(line + "\n")
+
+            timer.stop("report")
             print(f"Experiment '{run_name}' completed. Results saved in {output_dir}")
         else:
             print(f"Experiment '{run_name}' failed to find a solution.")
 
+        metrics["phases"] = timer.as_dict()
+        if profiler is not None:
+            profiler.disable()
+            metrics["profile"] = os.path.join(output_dir, "profile.prof")
+            profiler.dump_stats(metrics["profile"])
+        if res and self.cache is not None:
+            if plot_job is not None:
+                # Store once plot.png exists
+                plot_job.add_done_callback(
+                    lambda _: self.cache.put(
+                        cache_key, output_dir, metrics, encoder=np_encoder
+                    )
+                )
+            else:
+                self.cache.put(cache_key, output_dir, metrics, encoder=np_encoder)
+
+        self._record(config, metrics, res)
         return metrics
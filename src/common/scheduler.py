@@ -0,0 +1,106 @@
+import time
+
+
+class BudgetScheduler:
+    """
+    Suite-level wall-clock budgeting for experiment batches (run_all.py).
+
+    Runs are ordered easy-first (open loop, then closed loop, then 2E-LRP)
+    and each gets a TimeLimit proportional to its difficulty weight out of
+    the budget still left, never below `min_per_run`. Time not used by fast
+    runs (e.g. 23 s open-loop solves) is automatically handed on to the
+    closed-loop / LRP runs scheduled after them, but no limit reaches past
+    the suite's wall-clock deadline: `min_per_run` is the only way a run
+    can end after total_budget.
+    """
+
+    def __init__(self, total_budget=None, min_per_run=60.0, mip_gap=None, stall_time=None):
+        """
+        :param total_budget: Suite wall-clock budget in seconds (None = unlimited)
+        :param min_per_run: Minimum TimeLimit granted to every run
+        :param mip_gap: MIPGap termination passed to every run
+        :param stall_time: Stop a run after this many seconds without improvement
+        """
+        self.total_budget = total_budget
+        self.min_per_run = min_per_run
+        self.mip_gap = mip_gap
+        self.stall_time = stall_time
+        self.workers = 1
+
+    @staticmethod
+    def difficulty(config):
+        """Relative budget weight: open loop 1, closed loop 2, 2E-LRP 3."""
+        if config.get("scenario", 0) == 3:
+            return 3.0
+        if config.get("scenario", 0) == 2 and config.get("loop_type") == "open":
+            return 1.0
+        return 2.0
+
+    def time_limit(self, weight, remaining_weight, committed, elapsed=0.0):
+        """
+        :param committed: Budget already spent by finished runs plus the
+            limits reserved by runs still in flight (summed over workers).
+        :param elapsed: Suite wall-clock time so far. With several workers
+            the lane-seconds left can exceed the time to the deadline (idle
+            lanes), so the limit is capped at total_budget - elapsed.
+        """
+        if self.total_budget is None:
+            return None
+        remaining = self.total_budget * self.workers - committed
+        limit = min(remaining * weight / remaining_weight, self.total_budget - elapsed)
+        return max(self.min_per_run, limit)
+
+    def run(self, runner, experiments, workers=1, threads_per_job=None):
+        """
+        Executes all experiments within the budget, `workers` at a time
+        (ExperimentRunner.run_many). With N workers the budget is N lanes of
+        total_budget wall-clock each.
+        Returns metrics in the original experiment order.
+        """
+        self.workers = max(1, workers)
+        order = sorted(
+            range(len(experiments)), key=lambda i: self.difficulty(experiments[i])
+        )
+        ordered = [experiments[i] for i in order]
+        state = {
+            "remaining_weight": sum(self.difficulty(cfg) for cfg in experiments),
+            "spent": 0.0,
+            "reserved": {},
+            "started": {},
+        }
+        results = [None] * len(experiments)
+        start = time.time()
+
+        def prepare(n, config):
+            weight = self.difficulty(config)
+            committed = state["spent"] + sum(state["reserved"].values())
+            limit = self.time_limit(
+                weight, state["remaining_weight"], committed, time.time() - start
+            )
+            state["remaining_weight"] -= weight
+            state["reserved"][n] = limit or 0.0
+            state["started"][n] = time.time()
+
+            if limit is not None:
+                config["time_limit"] = limit
+            if self.mip_gap is not None:
+                config["mip_gap"] = self.mip_gap
+            if self.stall_time is not None:
+                config["stall_time"] = self.stall_time
+
+            budget_str = f"{limit:.0f} s" if limit is not None else "unlimited"
+            print(
+                f"\n[{n + 1}/{len(experiments)}] Running {config['run_name']} "
+                f"(Budget: {budget_str})..."
+            )
+
+        for n, metrics in runner.run_many(
+            ordered, workers=self.workers, threads_per_job=threads_per_job, prepare=prepare
+        ):
+            del state["reserved"][n]
+            state["spent"] += time.time() - state["started"][n]
+            metrics["time_budget"] = ordered[n].get("time_limit")
+            results[order[n]] = metrics
+
+        print(f"\nSuite finished in {time.time() - start:.1f} s")
+        return results
@@ -0,0 +1,250 @@
+import contextlib
+import json
+import sqlite3
+import time
+import uuid
+import numpy as np
+
+# Config keys promoted to their own columns (the full config is kept as JSON)
+CONFIG_COLUMNS = {
+    "scenario": "INTEGER",
+    "locator": "TEXT",
+    "candidates": "INTEGER",
+    "fleet_mode": "TEXT",
+    "loop_type": "TEXT",
+    "data_mode": "TEXT",
+    "n_customers": "INTEGER",
+    "seed": "INTEGER",
+    "router": "TEXT",
+    "formulation": "TEXT",
+}
+METRIC_COLUMNS = {
+    "solved": "INTEGER",
+    "cache_hit": "INTEGER",
+    "obj_val": "REAL",
+    "truck_dist": "REAL",
+    "sec_cost": "REAL",
+    "mip_gap": "REAL",
+    "status": "INTEGER",
+    "runtime": "REAL",
+    "elapsed_time": "REAL",
+    "lazy_cuts": "INTEGER",
+}
+AGGREGATES = {"count": "COUNT", "mean": "AVG", "min": "MIN", "max": "MAX", "sum": "SUM"}
+
+
+def encode_routes(res):
+    """
+    Routes as one int32 blob of [depot, vehicle, n, c_1 .. c_n] records.
+    Handles both result layouts (and their JSON string keys): Scenario 3
+    `sec_assignments` {depot: {vehicle: path}} and single-depot
+    `assignments` {vehicle: path} with `selected_depot_idx`.
+    """
+    if "sec_assignments" in res:
+        by_depot = res["sec_assignments"]
+    else:
+        by_depot = {res.get("selected_depot_idx", -1): res.get("assignments", {})}
+    flat = []
+    for d, routes in by_depot.items():
+        for k, path in routes.items():
+            if len(path):
+                flat += [int(d), int(k), len(path)] + [int(c) for c in path]
+    return np.asarray(flat, dtype=np.int32).tobytes()
+
+
+def decode_routes(blob):
+    """Inverse of encode_routes: {depot: {vehicle: [customers]}}."""
+    flat = np.frombuffer(blob or b"", dtype=np.int32)
+    routes, pos = {}, 0
+    while pos < len(flat):
+        d, k, n = (int(v) for v in flat[pos : pos + 3])
+        routes.setdefault(d, {})[k] = flat[pos + 3 : pos + 3 + n].tolist()
+        pos += 3 + n
+    return routes
+
+
+class ResultStore:
+    """
+    Append-only table of experiment results in one SQLite file.
+
+    `runs` holds one row per run (run id, promoted config columns, metrics,
+    full config JSON and the encoded routes), `phases` one row per
+    (run, PhaseTimer phase). Reads come back column-wise as NumPy arrays.
+    Several runner processes may append concurrently (WAL journal).
+    """
+
+    def __init__(self, path="solutions/results.sqlite"):
+        self.path = path
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            cols = ", ".join(
+                f"{name} {sql_type}"
+                for name, sql_type in {**CONFIG_COLUMNS, **METRIC_COLUMNS}.items()
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, "
+                f"run_name TEXT, created REAL, {cols}, error TEXT, config TEXT, routes BLOB)"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS phases "
+                "(run_id TEXT, phase TEXT, wall REAL, cpu REAL, calls INTEGER)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS phases_run ON phases (run_id)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed."""
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+
+    def append(self, config, metrics, res=None, run_id=None):
+        """
+        Stores one run and returns its run id (default: run_name + random
+        suffix, so repeated suites never collide).
+        """
+        run_name = config.get("run_name", "")
+        run_id = run_id or f"{run_name}-{uuid.uuid4().hex[:8]}"
+        stats = (res or {}).get("solver_stats", {})
+        mip_gap = stats.get("mip_gap")
+        row = {
+            "run_id": run_id,
+            "run_name": run_name,
+            "created": time.time(),
+            **{key: config.get(key) for key in CONFIG_COLUMNS},
+            "solved": bool(metrics.get("solved")),
+            "cache_hit": bool(metrics.get("cache_hit")),
+            "obj_val": metrics.get("obj_val"),
+            "truck_dist": metrics.get("truck_dist"),
+            "sec_cost": metrics.get("sec_cost"),
+            "mip_gap": mip_gap if isinstance(mip_gap, (int, float)) else None,
+            "status": stats.get("status"),
+            "runtime": stats.get("runtime"),
+            "elapsed_time": metrics.get("elapsed_time"),
+            "lazy_cuts": metrics.get("lazy_cuts"),
+            "error": metrics.get("error"),
+            "config": json.dumps(config, default=str),
+            "routes": encode_routes(res) if res else None,
+        }
+        row = {
+            key: float(val) if isinstance(val, np.floating) else val
+            for key, val in row.items()
+        }
+        phases = [
+            (run_id, name, p["wall"], p["cpu"], p["calls"])
+            for name, p in metrics.get("phases", {}).items()
+        ]
+        with self._connect() as con:
+            con.execute(
+                f"INSERT INTO runs ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                list(row.values()),
+            )
+            con.executemany("INSERT INTO phases VALUES (?, ?, ?, ?, ?)", phases)
+        return run_id
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+
+    def load(self, columns=None, where=None, params=()):
+        """
+        Column-wise read of `runs`: {column: np.ndarray}.
+
+        :param columns: Column names (default: every scalar column)
+        :param where: Optional SQL filter, e.g. "scenario = ? AND solved"
+        :param params: Values for the `?` placeholders in `where`
+        """
+        if columns is None:
+            columns = ["run_id", "run_name", "created", *CONFIG_COLUMNS, *METRIC_COLUMNS]
+        sql = f"SELECT {', '.join(columns)} FROM runs"
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY rowid"  # Insertion order
+        with self._connect() as con:
+            rows = con.execute(sql, params).fetchall()
+        if not rows:
+            return {col: np.array([]) for col in columns}
+        return {col: _column(values) for col, values in zip(columns, zip(*rows))}
+
+    def aggregate(
+        self,
+        value,
+        by=("scenario",),
+        funcs=("count", "mean", "min", "max"),
+        where=None,
+        params=(),
+    ):
+        """
+        Grouped statistics of one column (SQL GROUP BY), column-wise like
+        load(): {group columns..., "<value>_<func>": np.ndarray}.
+        """
+        unknown = [f for f in funcs if f not in AGGREGATES]
+        if unknown:
+            raise ValueError(f"Unknown aggregate(s): {unknown}")
+        by = list(by)
+        stats = [f"{AGGREGATES[f]}({value})" for f in funcs]
+        sql = f"SELECT {', '.join(by + stats)} FROM runs"
+        if where:
+            sql += f" WHERE {where}"
+        if by:
+            sql += f" GROUP BY {', '.join(by)} ORDER BY {', '.join(by)}"
+        with self._connect() as con:
+            rows = con.execute(sql, params).fetchall()
+        names = by + [f"{value}_{f}" for f in funcs]
+        if not rows:
+            return {name: np.array([]) for name in names}
+        return {name: _column(values) for name, values in zip(names, zip(*rows))}
+
+    def phases(self, phase_names=None, where=None, params=()):
+        """
+        Phase wall times pivoted to one column per phase:
+        {"run_id": ..., "<phase>": np.ndarray (NaN where a run lacks it)}.
+        `where` filters runs like load().
+        """
+        run_ids = self.load(["run_id"], where, params)["run_id"]
+        sql = "SELECT run_id, phase, wall FROM phases"
+        if where:
+            sql += f" WHERE run_id IN (SELECT run_id FROM runs WHERE {where})"
+        with self._connect() as con:
+            rows = con.execute(sql, params).fetchall()
+        if phase_names is None:
+            phase_names = sorted({phase for _, phase, _ in rows})
+        row_of = {run_id: i for i, run_id in enumerate(run_ids)}
+        col_of = {phase: j for j, phase in enumerate(phase_names)}
+        table = np.full((len(run_ids), len(phase_names)), np.nan)
+        for run_id, phase, wall in rows:
+            if phase in col_of and run_id in row_of:
+                table[row_of[run_id], col_of[phase]] = wall
+        return {"run_id": run_ids, **{p: table[:, j] for p, j in col_of.items()}}
+
+    def routes(self, run_id):
+        """Decoded routes of one run ({depot: {vehicle: [customers]}})."""
+        with self._connect() as con:
+            row = con.execute("SELECT routes FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown run id: {run_id}")
+        return decode_routes(row[0])
+
+    def config(self, run_id):
+        """Full config dict of one run."""
+        with self._connect() as con:
+            row = con.execute("SELECT config FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown run id: {run_id}")
+        return json.loads(row[0])
+
+
+def _column(values):
+    """Tuple of SQL values -> array (NULLs become NaN in numeric columns)."""
+    if all(isinstance(v, int) for v in values):
+        return np.array(values, dtype=np.int64)
+    if all(v is None or isinstance(v, (int, float)) for v in values):
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+    return np.array(values, dtype=object)
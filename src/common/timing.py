@@ -0,0 +1,62 @@
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """
+    Registry of named phase timings (wall clock and process CPU time).
+
+    Phases can be timed with the `phase` context manager or, for long
+    blocks, with start()/stop(). Repeated phases accumulate. Names use dots
+    for sub-phases (e.g. 'router.build' inside 'router').
+    CPU time is process-wide, so it includes Gurobi's worker threads.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._open = {}
+
+    def start(self, name):
+        # Registered on start so parents are listed before their sub-phases
+        self.phases.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+        self._open[name] = (time.perf_counter(), time.process_time())
+
+    def stop(self, name):
+        """Closes a phase and returns its wall time in seconds."""
+        wall0, cpu0 = self._open.pop(name)
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        entry = self.phases[name]
+        entry["wall"] += wall
+        entry["cpu"] += cpu
+        entry["calls"] += 1
+        return wall
+
+    @contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def wall(self, name):
+        return self.phases.get(name, {}).get("wall", 0.0)
+
+    def _closed(self):
+        # Phases still running for the first time have nothing to report yet
+        return {name: e for name, e in self.phases.items() if e["calls"]}
+
+    def as_dict(self):
+        return {name: dict(entry) for name, entry in self._closed().items()}
+
+    def report_lines(self):
+        """Indented 'name: wall / cpu' lines, sub-phases under their parent."""
+        lines = []
+        for name, entry in self._closed().items():
+            indent = "  " * (name.count(".") + 1)
+            lines.append(
+                f"{indent}{name.split('.')[-1]}: {entry['wall']:.3f} s "
+                f"(CPU {entry['cpu']:.3f} s)"
+            )
+        return lines
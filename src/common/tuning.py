@@ -0,0 +1,110 @@
+import itertools
+import json
+import os
+import time
+import numpy as np
+from common.vehicles import create_fleet
+
+# Tuned parameter sets, written by src/tune.py, read by the routers
+TUNED_PARAMS_PATH = "tuned_params.json"
+FLEET_MODES = ("homog", "mix_1", "mix_2")
+
+# Racing search space (Gurobi defaults first)
+PARAM_GRID = {
+    "MIPFocus": [0, 1, 2, 3],
+    "Cuts": [-1, 0, 2],
+    "Heuristics": [0.05, 0.2],
+    "Presolve": [-1, 2],
+    "Symmetry": [-1, 2],
+}
+
+_loaded = {}  # path -> (mtime, table)
+
+
+def fleet_class(fleet):
+    """Fleet mode ('homog', 'mix_1', 'mix_2') the fleet was created from, else 'custom'."""
+    for mode in FLEET_MODES:
+        if list(fleet) == create_fleet(mode):
+            return mode
+    return "custom"
+
+
+def param_key(model, open_loop, fleet):
+    """
+    Scenario class of a solve, e.g. 'vrp/closed/homog' (Scenarios 0-2)
+    or '2e/open/mix_1' (Scenario 3).
+    """
+    return f"{model}/{'open' if open_loop else 'closed'}/{fleet_class(fleet)}"
+
+
+def tuned_params(key, path=TUNED_PARAMS_PATH):
+    """Best known Gurobi parameters for a scenario class ({} if not tuned)."""
+    if not os.path.exists(path):
+        return {}
+    mtime = os.path.getmtime(path)
+    if path not in _loaded or _loaded[path][0] != mtime:
+        with open(path) as f:
+            _loaded[path] = (mtime, json.load(f))
+    return dict(_loaded[path][1].get(key, {}).get("params", {}))
+
+
+def save_tuned_params(key, params, path=TUNED_PARAMS_PATH, **info):
+    """Stores the parameter set of one scenario class, keeping the others."""
+    table = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            table = json.load(f)
+    table[key] = {"params": params, "tuned_at": time.strftime("%Y-%m-%d %H:%M"), **info}
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(table, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def candidate_params(grid=None, max_candidates=None, seed=0):
+    """
+    Parameter sets of the grid (only non-default values are kept, so the
+    first set is {} = Gurobi defaults). With `max_candidates`, the defaults
+    plus a random sample of the other sets.
+    """
+    grid = PARAM_GRID if grid is None else grid
+    names = list(grid)
+    defaults = [grid[n][0] for n in names]
+    sets = [
+        {n: v for n, v, default in zip(names, values, defaults) if v != default}
+        for values in itertools.product(*grid.values())
+    ]
+    if max_candidates is not None and max_candidates < len(sets):
+        rng = np.random.default_rng(seed)
+        pick = rng.choice(np.arange(1, len(sets)), size=max_candidates - 1, replace=False)
+        sets = [sets[0]] + [sets[i] for i in sorted(pick)]
+    return sets
+
+
+def race(evaluate, candidates, instances, keep=0.5, reference=0):
+    """
+    Racing (successive halving) over instances: every surviving candidate
+    is scored on the next instance, then only the best `keep` fraction (by
+    mean score so far, lower is better) stays in the race. The `reference`
+    candidate (the defaults) always runs on every instance, so the winner
+    can be compared with it on the same instances.
+
+    :param evaluate: f(params, instance) -> score
+    :returns: (best index, {index: [scores]})
+    """
+    alive = list(range(len(candidates)))
+    scores = {i: [] for i in alive}
+    for round_idx, inst in enumerate(instances):
+        for i in alive:
+            scores[i].append(evaluate(candidates[i], inst))
+        alive.sort(key=lambda i: (np.mean(scores[i]), i))
+        if round_idx < len(instances) - 1:
+            survivors = alive[: max(1, int(np.ceil(len(alive) * keep)))]
+            if reference in alive and reference not in survivors:
+                survivors.append(reference)
+            alive = survivors
+        print(
+            f"  Round {round_idx + 1}/{len(instances)}: {len(alive)} left, "
+            f"best {candidates[alive[0]]} ({np.mean(scores[alive[0]]):.3f})"
+        )
+    return alive[0], scores
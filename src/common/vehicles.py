@@ -40,3 +40,20 @@ def create_fleet(mode: str) -> List[VehicleType]:
 
     else:
         raise ValueError(f"Unknown fleet mode: {mode}")
+
+
+def identical_vehicle_groups(fleet: List[VehicleType]) -> List[List[int]]:
+    """
+    Groups fleet indices of identical VehicleTypes (same name, capacity,
+    cost factor). Only groups with 2+ vehicles are returned, since those are
+    the interchangeable ones that create symmetric MIP solutions.
+    """
+    groups: List[List[int]] = []
+    for k, veh in enumerate(fleet):
+        for group in groups:
+            if fleet[group[0]] == veh:
+                group.append(k)
+                break
+        else:
+            groups.append([k])
+    return [g for g in groups if len(g) > 1]
@@ -29,6 +29,35 @@ def main():
         default=None,
         help="Path to data file (e.g., c101.txt) for 'solomon' mode",
     )
+    parser.add_argument(
+        "--n-customers",
+        type=int,
+        default=20,
+        help="Customers to generate or to read from the Solomon file (0 = all)",
+    )
+    parser.add_argument(
+        "--n-candidates",
+        type=int,
+        default=4,
+        help="Candidate depot sites to generate",
+    )
+    parser.add_argument(
+        "--n-clusters",
+        type=int,
+        default=3,
+        help="Customer clusters for 'clustered' mode",
+    )
+    parser.add_argument(
+        "--cluster-spread",
+        type=float,
+        default=5.0,
+        help="Std of customers around their cluster center ('clustered' mode)",
+    )
+    parser.add_argument(
+        "--unit-demand",
+        action="store_true",
+        help="Use demand 1 per customer instead of the Solomon DEMAND column",
+    )
     parser.add_argument(
         "--locator",
         type=str,
@@ -56,6 +85,118 @@ def main():
         default=4,
         help="Number of depot candidates for Scenario 3",
     )
+    parser.add_argument(
+        "--pmedian-mode",
+        type=str,
+        default="auto",
+        choices=["auto", "heuristic", "mip"],
+        help="P-median solver: auto (enumeration for P=1, else heuristic), "
+        "heuristic (greedy + Teitz-Bart) or mip (exact, heuristic warm start)",
+    )
+    parser.add_argument(
+        "--centroid-restarts",
+        type=int,
+        default=8,
+        help="k-means++ restarts of the centroid locator",
+    )
+    parser.add_argument(
+        "--centroid-truck-weight",
+        type=float,
+        default=0.0,
+        help="Weight of the main depot -> depot distance in the centroid locator",
+    )
+    parser.add_argument(
+        "--formulation",
+        type=str,
+        default="mtz",
+        choices=["mtz", "dfj-lazy"],
+        help="Subtour elimination: MTZ rows or lazy DFJ cuts (callback)",
+    )
+    parser.add_argument(
+        "--builder",
+        type=str,
+        default="loops",
+        choices=["loops", "matrix"],
+        help="Scenario 3 model builder (matrix: gurobipy matrix API, faster build)",
+    )
+    parser.add_argument(
+        "--no-tuned-params",
+        action="store_true",
+        help="Ignore the tuned Gurobi parameters in tuned_params.json (src/tune.py)",
+    )
+    parser.add_argument(
+        "--model-cache",
+        action="store_true",
+        help="Scenario 3: store built models in .cache/models and read them back on reruns",
+    )
+    parser.add_argument(
+        "--symmetry-breaking",
+        action="store_true",
+        help="Add ordering constraints between identical vehicles",
+    )
+    parser.add_argument(
+        "--warm-start",
+        action="store_true",
+        help="Start Gurobi from a savings/sweep heuristic solution",
+    )
+    parser.add_argument(
+        "--router",
+        type=str,
+        default="exact",
+        choices=["exact", "alns", "benders"],
+        help="Router: exact Gurobi MIP, ALNS metaheuristic (no license needed) "
+        "or Benders decomposition (Scenario 3)",
+    )
+    parser.add_argument(
+        "--benders-workers",
+        type=int,
+        default=None,
+        help="Parallel subproblem processes for --router benders",
+    )
+    parser.add_argument(
+        "--alns-iterations",
+        type=int,
+        default=5000,
+        help="ALNS iteration budget",
+    )
+    parser.add_argument(
+        "--alns-time-limit",
+        type=float,
+        default=60.0,
+        help="ALNS time budget in seconds",
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=None,
+        help="Router TimeLimit in seconds",
+    )
+    parser.add_argument(
+        "--mip-gap", type=float, default=None, help="Router MIPGap termination"
+    )
+    parser.add_argument(
+        "--stall-time",
+        type=float,
+        default=None,
+        help="Stop after N seconds without incumbent improvement",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-solve even if an identical experiment is in the result cache",
+    )
+    parser.add_argument(
+        "--plot",
+        type=str,
+        default="sync",
+        choices=["sync", "async", "false"],
+        help="Plot rendering: in-process, in a background process, or off",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a cProfile dump (profile.prof) next to the results",
+    )
     parser.add_argument(
         "--seed",
         type=int,
@@ -65,6 +206,30 @@ def main():
 
     # New arg for batch run description if needed, or just let runner handle
 
+    parser.add_argument(
+        "--env-threads",
+        type=int,
+        default=None,
+        help="Gurobi Threads of the shared environment",
+    )
+    parser.add_argument(
+        "--mem-limit",
+        type=float,
+        default=None,
+        help="Gurobi MemLimit (GB) of the shared environment",
+    )
+    parser.add_argument(
+        "--nodefile-start",
+        type=float,
+        default=None,
+        help="Gurobi NodefileStart (GB): write B&B nodes to disk beyond this",
+    )
+    parser.add_argument(
+        "--gurobi-log",
+        type=str,
+        default=None,
+        help="Gurobi LogFile of the shared environment ({pid} = worker process id)",
+    )
     args = parser.parse_args()
 
     # Construct Config
@@ -72,11 +237,35 @@ def main():
         "scenario": args.scenario,
         "data_mode": args.data_mode,
         "data_file": args.data_file,
+        "n_customers": args.n_customers or None,
+        "n_candidates": args.n_candidates,
+        "n_clusters": args.n_clusters,
+        "cluster_spread": args.cluster_spread,
+        "unit_demand": args.unit_demand,
         "locator": args.locator,
         "candidates": args.candidates,
+        "pmedian_mode": args.pmedian_mode,
+        "centroid_restarts": args.centroid_restarts,
+        "centroid_truck_weight": args.centroid_truck_weight,
         "fleet_mode": args.fleet,
         "loop_type": args.loop_type,
         "seed": args.seed,
+        "formulation": args.formulation,
+        "symmetry_breaking": args.symmetry_breaking,
+        "warm_start": args.warm_start,
+        "router": args.router,
+        "benders_workers": args.benders_workers,
+        "alns_iterations": args.alns_iterations,
+        "alns_time_limit": args.alns_time_limit,
+        "time_limit": args.time_limit,
+        "mip_gap": args.mip_gap,
+        "stall_time": args.stall_time,
+        "force": args.force,
+        "builder": args.builder,
+        "model_cache": args.model_cache,
+        "tuned_params": not args.no_tuned_params,
+        "profile": args.profile,
+        "plot": args.plot,
     }
 
     # Construct Run Name
@@ -105,8 +294,17 @@ def main():
 
     print(f"Starting Experiment: {config['run_name']}")
 
-    runner = ExperimentRunner(output_base="solutions")
+    runner = ExperimentRunner(
+        output_base="solutions",
+        env_params={
+            "Threads": args.env_threads,
+            "MemLimit": args.mem_limit,
+            "NodefileStart": args.nodefile_start,
+            "LogFile": args.gurobi_log,
+        },
+    )
     metrics = runner.run_experiment(config)
+    runner.wait_plots()
 
     print("\nFinal Metrics:")
     print(metrics)
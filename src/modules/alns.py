@@ -0,0 +1,468 @@
+import time
+import numpy as np
+from common.distances import build_distance_matrix, truck_distance_matrix
+
+
+class ALNSRouter:
+    """
+    Adaptive Large Neighbourhood Search router (pure NumPy, no Gurobi).
+
+    Drop-in replacement for VRPRouter (single depot, MaxDist objective) or,
+    with two_echelon=True, for TwoEchelonRouter (truck tour + secondary cost).
+    Same constructor, solve(open_loop=...) signature and result dict shape.
+
+    - Destroy: random, worst, related (Shaw), route removal; two-echelon
+      also depot removal (close one open depot / swap it for a closed one)
+    - Repair: greedy and regret-2 insertion, vectorized over all route edges
+    - Acceptance: simulated annealing; operator weights adapted per segment
+    """
+
+    DESTROY_OPS = ("random", "worst", "related", "route")
+    DEPOT_OPS = ("depot",)  # Two-echelon with 2+ candidate depots only
+    REPAIR_OPS = ("greedy", "regret")
+
+    # Adaptive weight scores (Ropke & Pisinger)
+    SCORE_BEST = 33.0
+    SCORE_BETTER = 9.0
+    SCORE_ACCEPTED = 13.0
+    REACTION = 0.1
+    SEGMENT = 100
+    MAX_REMOVAL = 60
+
+    def __init__(
+        self,
+        instance,
+        potential_depots,
+        fleet,
+        two_echelon=False,
+        max_iterations=5000,
+        time_limit=60.0,
+        seed=0,
+        demand=None,
+    ):
+        """
+        :param instance: ProblemInstance (customers, main_depot)
+        :param potential_depots: List/Array of [x,y] coordinates for candidate depots.
+        :param fleet: List of VehicleType objects (available AT EACH DEPOT if two_echelon)
+        :param max_iterations: ALNS iteration budget (split across depots for VRP)
+        :param time_limit: Wall-clock budget in seconds
+        """
+        self.instance = instance
+        self.potential_depots = np.asarray(potential_depots)
+        self.fleet = fleet
+        self.two_echelon = two_echelon
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+        self.seed = seed
+        self.num_depots = len(self.potential_depots)
+        self.num_customers = len(instance.customers)
+        if demand is None:
+            demand = instance.demand
+        self.demand = np.asarray(demand, dtype=float)
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    def solve(self, open_loop=False):
+        build_start = time.time()
+        full = build_distance_matrix(
+            self.potential_depots,
+            self.instance.customers,
+            self.instance.main_depot,
+            open_loop=open_loop,
+        )
+        n = self.num_depots + self.num_customers
+        self.dist = full[:n, :n]
+        self.dist_main_to_D = full[n, : self.num_depots]
+        self.dist_truck = truck_distance_matrix(full, self.num_depots)
+        self._tour_cache = {}
+        self.rng = np.random.default_rng(self.seed)
+        self.destroy_ops = self.DESTROY_OPS
+        if self.two_echelon and self.num_depots > 1:
+            self.destroy_ops = self.DESTROY_OPS + self.DEPOT_OPS
+        build_time = time.time() - build_start
+
+        start = time.time()
+        if self.two_echelon:
+            slots = [(d, k) for d in range(self.num_depots) for k in range(len(self.fleet))]
+            best = self._search(slots, self.max_iterations, self.time_limit)
+        else:
+            # Single depot: run the search per candidate depot, keep the best
+            best = None
+            n_dep = max(self.num_depots, 1)
+            for d in range(self.num_depots):
+                slots = [(d, k) for k in range(len(self.fleet))]
+                remaining = self.time_limit - (time.time() - start)
+                res = self._search(
+                    slots,
+                    max(self.max_iterations // n_dep, 1),
+                    max(remaining / (n_dep - d), 0.0),
+                )
+                if res is not None and (best is None or res["obj"] < best["obj"]):
+                    best = res
+        runtime = time.time() - start
+
+        if best is None:
+            return None
+
+        solver_stats = {
+            "status": "ALNS",
+            "mip_gap": "N/A",
+            "runtime": runtime,
+            "build_time": build_time,
+            "iterations": best["iterations"],
+            "best_iteration": best["best_iteration"],
+            "operator_weights": best["weights"],
+        }
+        if self.two_echelon:
+            return self._two_echelon_result(best, solver_stats)
+        return self._vrp_result(best, open_loop, solver_stats)
+
+    # ---------------------------
+    # Search
+    # ---------------------------
+    def _search(self, slots, max_iterations, time_limit):
+        t0 = time.time()
+        self._set_slots(slots)
+
+        customers = list(range(self.num_depots, self.num_depots + self.num_customers))
+        current = [[] for _ in slots]
+        if not self._repair(current, customers):
+            return None
+        for s in range(len(slots)):
+            current[s] = self._two_opt(current[s], self.slot_depot[s])
+        current_obj = self._objective(current)
+        best, best_obj, best_iter = [list(r) for r in current], current_obj, 0
+
+        # SA: accept a 5% worse solution with p=0.5 at start, cool to ~0
+        temp = max(0.05 * current_obj / np.log(2), 1e-9)
+        cooling = 0.002 ** (1.0 / max(max_iterations, 1))
+
+        w_destroy = np.ones(len(self.destroy_ops))
+        w_repair = np.ones(len(self.REPAIR_OPS))
+        s_destroy = np.zeros_like(w_destroy)
+        s_repair = np.zeros_like(w_repair)
+        n_destroy = np.zeros_like(w_destroy)
+        n_repair = np.zeros_like(w_repair)
+
+        # Removal size: 2 .. 30% of customers (capped for large instances)
+        n = self.num_customers
+        q_min = max(1, min(n, 2))
+        q_max = max(q_min, min(n, max(4, int(0.3 * n)), self.MAX_REMOVAL))
+
+        it = 0
+        while it < max_iterations and time.time() - t0 < time_limit:
+            it += 1
+            di = self.rng.choice(len(w_destroy), p=w_destroy / w_destroy.sum())
+            ri = self.rng.choice(len(w_repair), p=w_repair / w_repair.sum())
+            q = int(self.rng.integers(q_min, q_max + 1))
+
+            cand = [list(r) for r in current]
+            barred = None
+            if self.destroy_ops[di] == "depot":
+                removed, barred = self._destroy_depot(cand)
+            else:
+                removed = self._destroy(self.destroy_ops[di], cand, q)
+            ok = self._repair(
+                cand, removed, regret=self.REPAIR_OPS[ri] == "regret", barred=barred
+            )
+            if not ok:
+                continue
+            for s in range(len(slots)):
+                if len(cand[s]) > 2 and cand[s] != current[s]:
+                    cand[s] = self._two_opt(cand[s], self.slot_depot[s])
+            cand_obj = self._objective(cand)
+
+            score = 0.0
+            if cand_obj < best_obj - 1e-9:
+                best, best_obj, best_iter = [list(r) for r in cand], cand_obj, it
+                current, current_obj = cand, cand_obj
+                score = self.SCORE_BEST
+            elif cand_obj < current_obj - 1e-9:
+                current, current_obj = cand, cand_obj
+                score = self.SCORE_BETTER
+            elif self.rng.random() < np.exp(-(cand_obj - current_obj) / temp):
+                current, current_obj = cand, cand_obj
+                score = self.SCORE_ACCEPTED
+            temp *= cooling
+
+            s_destroy[di] += score
+            s_repair[ri] += score
+            n_destroy[di] += 1
+            n_repair[ri] += 1
+            if it % self.SEGMENT == 0:
+                for w, sc, cnt in (
+                    (w_destroy, s_destroy, n_destroy),
+                    (w_repair, s_repair, n_repair),
+                ):
+                    used = cnt > 0
+                    w[used] = (1 - self.REACTION) * w[used] + self.REACTION * (
+                        sc[used] / cnt[used]
+                    )
+                    np.maximum(w, 0.05, out=w)
+                    sc[:] = 0
+                    cnt[:] = 0
+
+        return {
+            "routes": best,
+            "obj": best_obj,
+            "slots": list(slots),
+            "iterations": it,
+            "best_iteration": best_iter,
+            "weights": {
+                **dict(zip(self.destroy_ops, np.round(w_destroy, 3).tolist())),
+                **dict(zip(self.REPAIR_OPS, np.round(w_repair, 3).tolist())),
+            },
+        }
+
+    # ---------------------------
+    # Evaluation
+    # ---------------------------
+    def _set_slots(self, slots):
+        """Routes are indexed by slot = (depot, vehicle)."""
+        self.slots = list(slots)
+        self.slot_depot = np.array([d for d, _ in slots])
+        self.slot_cap = np.array([self.fleet[k].capacity for _, k in slots], dtype=float)
+        self.slot_cf = np.array([self.fleet[k].cost_factor for _, k in slots])
+
+    def _lengths(self, routes):
+        L = np.zeros(len(routes))
+        for s, r in enumerate(routes):
+            if r:
+                d = self.slot_depot[s]
+                path = np.array([d] + r + [d])
+                L[s] = self.dist[path[:-1], path[1:]].sum()
+        return L
+
+    def _truck_tour(self, open_depots):
+        """Cheapest truck tour Main -> open depots -> Main (NN + 2-opt, cached)."""
+        key = frozenset(open_depots)
+        if key not in self._tour_cache:
+            main_idx = self.num_depots
+            tour, remaining, curr = [main_idx], list(open_depots), main_idx
+            while remaining:
+                nxt = min(remaining, key=lambda d: self.dist_truck[curr, d])
+                tour.append(nxt)
+                remaining.remove(nxt)
+                curr = nxt
+            tour.append(main_idx)
+            tour = self._two_opt_path(tour, self.dist_truck)
+            cost = float(self.dist_truck[tour[:-1], tour[1:]].sum())
+            self._tour_cache[key] = (tour, cost)
+        return self._tour_cache[key]
+
+    def _open_depots(self, routes):
+        return sorted({int(self.slot_depot[s]) for s, r in enumerate(routes) if r})
+
+    def _objective(self, routes):
+        L = self._lengths(routes)
+        sec = float((self.slot_cf * L).sum())
+        if self.two_echelon:
+            return self._truck_tour(self._open_depots(routes))[1] + sec
+        d = self.slot_depot[0]
+        return float(L.max()) + 0.001 * (self.dist_main_to_D[d] + sec)
+
+    # ---------------------------
+    # Destroy Operators
+    # ---------------------------
+    def _destroy(self, op, routes, q):
+        assigned = [c for r in routes for c in r]
+        q = min(q, len(assigned))
+        if op == "random":
+            removed = list(self.rng.choice(assigned, size=q, replace=False))
+        elif op == "worst":
+            saving = {}
+            for s, r in enumerate(routes):
+                if not r:
+                    continue
+                d = self.slot_depot[s]
+                path = np.array([d] + r + [d])
+                prv, cur, nxt = path[:-2], path[1:-1], path[2:]
+                sv = self.dist[prv, cur] + self.dist[cur, nxt] - self.dist[prv, nxt]
+                for c, v in zip(r, sv * self.slot_cf[s]):
+                    saving[c] = v
+            noisy = {c: v * self.rng.uniform(0.8, 1.2) for c, v in saving.items()}
+            removed = sorted(noisy, key=noisy.get, reverse=True)[:q]
+        elif op == "related":
+            seed_c = assigned[self.rng.integers(len(assigned))]
+            cand = np.array(assigned)
+            rel = self.dist[seed_c, cand] * self.rng.uniform(1.0, 1.3, size=len(cand))
+            removed = list(cand[np.argsort(rel)[:q]])
+        else:  # route
+            nonempty = [s for s, r in enumerate(routes) if r]
+            removed = list(routes[nonempty[self.rng.integers(len(nonempty))]])
+
+        removed_set = set(int(c) for c in removed)
+        for s in range(len(routes)):
+            routes[s] = [c for c in routes[s] if c not in removed_set]
+        return [int(c) for c in removed]
+
+    def _destroy_depot(self, routes):
+        """
+        Removes every customer of one random open depot. The depot is barred
+        during the following repair, so its customers either move to the
+        other open depots (close) or open a closed one (swap): moves the
+        customer-level operators cannot make, since an open depot only pays
+        its truck detour while it still serves a customer.
+        Returns (removed, barred depot).
+        """
+        open_depots = self._open_depots(routes)
+        d = open_depots[self.rng.integers(len(open_depots))]
+        removed = []
+        for s in np.flatnonzero(self.slot_depot == d):
+            removed.extend(routes[s])
+            routes[s] = []
+        return [int(c) for c in removed], d
+
+    # ---------------------------
+    # Repair Operators
+    # ---------------------------
+    def _slot_best(self, s, route, cs):
+        """
+        Cheapest insertion position of each customer in `cs` into route s,
+        in one broadcast over the route's edges. Returns (dlen, pos).
+        Every objective delta is monotone in dlen, so argmin is the best spot.
+        """
+        d = int(self.slot_depot[s])
+        path = np.array([d] + route + [d])
+        A, B = path[:-1], path[1:]
+        dlen = self.dist[np.ix_(cs, B)] + self.dist[np.ix_(A, cs)].T - self.dist[A, B]
+        pos = np.argmin(dlen, axis=1)
+        return dlen[np.arange(len(cs)), pos], pos
+
+    def _slot_delta(self, routes, best_d, L):
+        """Objective delta (q x S) of inserting each customer into each route."""
+        if self.two_echelon:
+            open_set = set(self._open_depots(routes))
+            base_truck = self._truck_tour(sorted(open_set))[1]
+            open_pen = np.zeros(self.num_depots)
+            for d in range(self.num_depots):
+                if d not in open_set:
+                    open_pen[d] = self._truck_tour(sorted(open_set | {d}))[1] - base_truck
+            return self.slot_cf * best_d + open_pen[self.slot_depot]
+
+        # W_other[s]: max length over all routes except s
+        order = np.argsort(L)[::-1]
+        top1 = L[order[0]]
+        top2 = L[order[1]] if len(L) > 1 else 0.0
+        w_other = np.where(np.arange(len(L)) == order[0], top2, top1)
+        return np.maximum(w_other, L + best_d) - top1 + 0.001 * self.slot_cf * best_d
+
+    def _repair(self, routes, removed, regret=False, barred=None):
+        """
+        Greedy (global cheapest) or regret-2 insertion of `removed`.
+        Per-route best insertions are cached; after each insertion only the
+        modified route's column is recomputed (fast delta evaluation).
+        No customer is inserted into the routes of the `barred` depot.
+        """
+        if not removed:
+            return True
+        cs = np.array(removed)
+        S = len(routes)
+        best_d = np.empty((len(cs), S))
+        best_p = np.empty((len(cs), S), dtype=int)
+        for s in range(S):
+            best_d[:, s], best_p[:, s] = self._slot_best(s, routes[s], cs)
+
+        L = self._lengths(routes)
+        loads = np.array([self.demand[np.array(r, dtype=int) - self.num_depots].sum() for r in routes])
+        dem = self.demand[cs - self.num_depots]
+        active = np.ones(len(cs), dtype=bool)
+        closed = self.slot_depot == barred
+
+        while active.any():
+            delta = self._slot_delta(routes, best_d, L)
+            delta = np.where(loads[None, :] + dem[:, None] > self.slot_cap[None, :], np.inf, delta)
+            delta[:, closed] = np.inf
+            delta[~active] = np.inf
+
+            best = delta.min(axis=1)
+            if not np.isfinite(best[active]).all():
+                return False
+            if regret and S > 1:
+                second = np.partition(delta, 1, axis=1)[:, 1]
+                with np.errstate(invalid="ignore"):
+                    reg = np.where(np.isfinite(second), second - best, np.inf)
+                reg[~active] = -np.inf
+                ci = int(np.lexsort((best, -reg))[0])
+            else:
+                ci = int(np.argmin(best))
+            s = int(np.argmin(delta[ci]))
+
+            routes[s].insert(int(best_p[ci, s]), int(cs[ci]))
+            L[s] += best_d[ci, s]
+            loads[s] += dem[ci]
+            active[ci] = False
+            if active.any():
+                idx = np.flatnonzero(active)
+                best_d[idx, s], best_p[idx, s] = self._slot_best(s, routes[s], cs[idx])
+        return True
+
+    # ---------------------------
+    # Local Search
+    # ---------------------------
+    def _two_opt(self, route, depot):
+        if len(route) < 3:
+            return route
+        path = self._two_opt_path([int(depot)] + route + [int(depot)], self.dist)
+        return path[1:-1]
+
+    def _two_opt_path(self, path, dist):
+        """Best-improvement 2-opt; delta matrix for all edge pairs per pass."""
+        path = np.array(path)
+        while len(path) > 4:
+            A, B = path[:-1], path[1:]
+            e = dist[A, B]
+            delta = dist[np.ix_(A, A)] + dist[np.ix_(B, B)] - e[:, None] - e[None, :]
+            delta = np.triu(delta, k=2)
+            i, j = np.unravel_index(np.argmin(delta), delta.shape)
+            if delta[i, j] > -1e-9:
+                break
+            path[i + 1 : j + 1] = path[i + 1 : j + 1][::-1]
+        return path.tolist()
+
+    # ---------------------------
+    # Results
+    # ---------------------------
+    def _vrp_result(self, best, open_loop, solver_stats):
+        self._set_slots(best["slots"])
+        routes = best["routes"]
+        L = self._lengths(routes)
+        d = int(best["slots"][0][0])
+        D = self.potential_depots
+        return {
+            "selected_depot_idx": d,
+            "selected_depot_loc": D[d],
+            "all_potential_depots": D,
+            "truck_dist": self.dist_main_to_D[d],
+            "assignments": {
+                k: [c - self.num_depots for c in routes[s]]
+                for s, (_, k) in enumerate(best["slots"])
+            },
+            "veh_dists": {k: float(L[s]) for s, (_, k) in enumerate(best["slots"])},
+            "max_dist": float(L.max()),
+            "total_sec_cost": float(L.sum()),
+            "open_loop": open_loop,
+            "solver_stats": solver_stats,
+        }
+
+    def _two_echelon_result(self, best, solver_stats):
+        self._set_slots(best["slots"])
+        routes = best["routes"]
+        L = self._lengths(routes)
+        open_depots = self._open_depots(routes)
+        tour, truck_dist = self._truck_tour(open_depots)
+        sec_assignments = {d: {} for d in open_depots}
+        for s, (d, k) in enumerate(best["slots"]):
+            if routes[s]:
+                sec_assignments[d][k] = [c - self.num_depots for c in routes[s]]
+        return {
+            "open_depots": open_depots,
+            "open_depot_locs": [self.potential_depots[d] for d in open_depots],
+            "truck_edges": list(zip(tour[:-1], tour[1:])),
+            "truck_dist": truck_dist,
+            "sec_assignments": sec_assignments,
+            "max_dist": 0.0,
+            "total_sec_cost": float((self.slot_cf * L).sum()),
+            "solver_stats": solver_stats,
+        }
@@ -0,0 +1,381 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import gurobipy as gp
+from gurobipy import GRB
+import numpy as np
+
+from common.distances import build_distance_matrix, truck_distance_matrix
+from common.gurobi_env import env_params, init_worker, shared_env
+from common.timing import PhaseTimer
+from common.vehicles import identical_vehicle_groups
+from modules.heuristics import ConstructiveHeuristic, symmetry_order_2e
+from modules.routers import (
+    _heuristic_summary,
+    build_adjacency,
+    combine_callbacks,
+    solution_values,
+    stall_callback,
+    trace_route,
+)
+
+
+def solve_depot_vrp(dist, demand, fleet, params=None):
+    """
+    Benders subproblem: CVRP of one depot's fleet over its assigned customers.
+    Runs in a worker process, so it only takes plain arrays.
+
+    :param dist: (n+1, n+1) distances, node 0 = depot, 1..n = customers
+    :param demand: (n,) customer demands
+    :param fleet: VehicleTypes based at the depot
+    Returns None if the customers cannot be served by the fleet, else
+    {"bound", "cost", "routes"} with routes {k: [local customer ids 0..n-1]}.
+    "bound" is the proven lower bound (== cost when solved to optimality).
+    """
+    n = len(demand)
+    if demand.sum() > sum(v.capacity for v in fleet) or demand.max() > max(
+        v.capacity for v in fleet
+    ):
+        return None
+
+    nodes = list(range(n + 1))
+    cust = nodes[1:]
+    arcs = [(i, j) for i in nodes for j in nodes if i != j]
+    out_nbrs, in_nbrs = build_adjacency(arcs, nodes)
+    vehs = list(range(len(fleet)))
+    M_cap = max(v.capacity for v in fleet) + 100
+
+    m = gp.Model("Depot_VRP", env=shared_env())
+    for key, val in (params or {}).items():
+        m.setParam(key, val)
+
+    x = m.addVars(vehs, arcs, vtype=GRB.BINARY, name="x")
+    u = m.addVars(vehs, cust, lb=0, ub=M_cap, name="u")
+
+    for k in vehs:
+        out0 = gp.quicksum(x[k, 0, j] for j in out_nbrs[0])
+        m.addConstr(out0 <= 1)
+        m.addConstr(out0 == gp.quicksum(x[k, i, 0] for i in in_nbrs[0]))
+        for h in cust:
+            m.addConstr(
+                gp.quicksum(x[k, i, h] for i in in_nbrs[h])
+                == gp.quicksum(x[k, h, j] for j in out_nbrs[h])
+            )
+        cap = fleet[k].capacity
+        for i in cust:
+            m.addConstr(u[k, i] <= cap)
+            m.addConstr(u[k, i] >= demand[i - 1])
+            for j in cust:
+                if i != j:
+                    m.addConstr(
+                        u[k, j] >= u[k, i] + demand[j - 1] - M_cap * (1 - x[k, i, j])
+                    )
+
+    for h in cust:
+        m.addConstr(gp.quicksum(x[k, i, h] for k in vehs for i in in_nbrs[h]) == 1)
+
+    cost = {
+        k: gp.quicksum(dist[i, j] * x[k, i, j] for i, j in arcs) * fleet[k].cost_factor
+        for k in vehs
+    }
+    for group in identical_vehicle_groups(fleet):
+        for k1, k2 in zip(group, group[1:]):
+            m.addConstr(cost[k1] >= cost[k2])
+    m.setObjective(gp.quicksum(cost.values()), GRB.MINIMIZE)
+    m.optimize()
+
+    if m.Status == GRB.INFEASIBLE:
+        return None
+    if m.SolCount == 0:
+        # No route found in time: only the bound is usable for a cut
+        return {"bound": m.ObjBound, "cost": None, "routes": {}}
+
+    keys, vals = solution_values(m, x)
+    active = keys[vals > 0.5]
+    routes = {}
+    for k in vehs:
+        path, _ = trace_route(active[active[:, 0] == k, 1:], 0, 1, n + 1)
+        if path:
+            routes[k] = [c - 1 for c in path]
+    return {"bound": m.ObjBound, "cost": m.ObjVal, "routes": routes}
+
+
+class BendersTwoEchelonRouter:
+    """
+    Logic-based Benders decomposition of TwoEchelonRouter's model.
+
+    Master: open depots z, truck tour y (MTZ) and customer-to-depot
+    assignment a, with theta[d] estimating depot d's secondary cost.
+    Subproblems: one CVRP per open depot over its assigned customers
+    (solve_depot_vrp), solved in parallel worker processes from a MIPSOL
+    callback and returned as lazy cuts:
+    - optimality: theta[d] >= v * (1 - sum_{c in S} (1 - a[d, c]))
+    - feasibility: sum_{c in S} (1 - a[d, c]) >= 1
+    Both are valid because a depot's routing cost cannot drop (and an
+    infeasible set cannot become feasible) when customers are added.
+    Same constructor, solve() keywords and result dict as TwoEchelonRouter.
+    """
+
+    def __init__(self, instance, potential_depots, fleet, timer=None, workers=None):
+        """
+        :param workers: Subproblem processes (default: one per candidate,
+            capped at the CPU count; 1 solves them in-process)
+        """
+        self.timer = timer if timer is not None else PhaseTimer()
+        self.instance = instance
+        self.potential_depots = potential_depots
+        self.fleet_template = fleet
+        self.num_candidates = len(potential_depots)
+        self.demand = np.asarray(instance.demand, dtype=float)
+        if workers is None:
+            workers = min(self.num_candidates, os.cpu_count() or 1)
+        self.workers = max(1, int(workers))
+
+    def solve(
+        self,
+        open_loop=False,
+        warm_start=False,
+        params=None,
+        stall_time=None,
+        subproblem_params=None,
+    ):
+        """
+        :param params: Gurobi parameters of the master problem
+        :param subproblem_params: Gurobi parameters of every subproblem
+            (default: silent, 60 s). A time-limited subproblem contributes
+            its bound to the cut, so the cuts stay valid.
+        """
+        heuristic = None
+        if warm_start:
+            with self.timer.phase("router.heuristic"):
+                heuristic = ConstructiveHeuristic(
+                    self.instance, self.potential_depots, self.fleet_template
+                ).solve_two_echelon(open_loop=open_loop)
+
+        self.timer.start("router.build")
+        N = self.num_candidates
+        M = len(self.demand)
+        D = self.potential_depots
+        D_nodes = list(range(N))
+        C_idx = list(range(M))
+        MAIN_IDX = N
+
+        full_dist = build_distance_matrix(
+            D, self.instance.customers, self.instance.main_depot, open_loop=open_loop
+        )
+        dist_sec = full_dist[: N + M, : N + M]
+        dist_truck = truck_distance_matrix(full_dist, N)
+
+        sub_params = {"OutputFlag": 0, "TimeLimit": 60}
+        sub_params.update(subproblem_params or {})
+        fleet_cap = sum(v.capacity for v in self.fleet_template)
+        min_factor = min(v.cost_factor for v in self.fleet_template)
+
+        m = gp.Model("2E_LRP_Benders_Master", env=shared_env())
+        z = m.addVars(D_nodes, vtype=GRB.BINARY, name="z")
+        truck_nodes = D_nodes + [MAIN_IDX]
+        truck_arcs = [(i, j) for i in truck_nodes for j in truck_nodes if i != j]
+        truck_out, truck_in = build_adjacency(truck_arcs, truck_nodes)
+        y = m.addVars(truck_arcs, vtype=GRB.BINARY, name="y")
+        u_truck = m.addVars(truck_nodes, lb=0, ub=len(truck_nodes), name="u_truck")
+        a = m.addVars(D_nodes, C_idx, vtype=GRB.BINARY, name="a")
+        theta = m.addVars(D_nodes, lb=0, name="theta")
+
+        m.addConstr(z.sum() >= 1, "AtLeastOneDepot")
+        for d in D_nodes:
+            m.addConstr(gp.quicksum(y[i, d] for i in truck_in[d]) == z[d])
+            m.addConstr(gp.quicksum(y[d, j] for j in truck_out[d]) == z[d])
+        m.addConstr(gp.quicksum(y[i, MAIN_IDX] for i in truck_in[MAIN_IDX]) == 1)
+        m.addConstr(gp.quicksum(y[MAIN_IDX, j] for j in truck_out[MAIN_IDX]) == 1)
+        m.addConstr(u_truck[MAIN_IDX] == 0)
+        for i in D_nodes:
+            for j in D_nodes:
+                if i != j:
+                    m.addConstr(
+                        u_truck[j] >= u_truck[i] + 1 - len(truck_nodes) * (1 - y[i, j])
+                    )
+
+        for c in C_idx:
+            m.addConstr(a.sum("*", c) == 1)
+        for d in D_nodes:
+            m.addConstrs(a[d, c] <= z[d] for c in C_idx)
+            # Aggregate capacity of the depot's fleet
+            m.addConstr(
+                gp.quicksum(self.demand[c] * a[d, c] for c in C_idx) <= fleet_cap * z[d]
+            )
+            # Any route serving c travels d -> c and back at least once
+            m.addConstrs(
+                theta[d]
+                >= min_factor
+                * (dist_sec[d, N + c] + dist_sec[N + c, d])
+                * a[d, c]
+                for c in C_idx
+            )
+
+        m.setObjective(
+            gp.quicksum(dist_truck[i, j] * y[i, j] for i, j in truck_arcs)
+            + theta.sum(),
+            GRB.MINIMIZE,
+        )
+
+        if heuristic is not None:
+            for d in D_nodes:
+                z[d].Start = 1 if d in heuristic["open_depots"] else 0
+            for var in y.values():
+                var.Start = 0
+            tour = heuristic["truck_tour"]
+            for i, j in zip(tour, tour[1:]):
+                y[i, j].Start = 1
+            for var in a.values():
+                var.Start = 0
+            theta_start = dict.fromkeys(D_nodes, 0.0)
+            routes = symmetry_order_2e(heuristic["routes"], self.fleet_template, dist_sec)
+            for (d, k), route in routes.items():
+                nodes = [d] + route + [d]
+                theta_start[d] += self.fleet_template[k].cost_factor * sum(
+                    dist_sec[i, j] for i, j in zip(nodes, nodes[1:])
+                )
+                for c in route:
+                    a[d, c - N].Start = 1
+            for d in D_nodes:
+                theta[d].Start = theta_start[d]
+
+        # ---------------------------
+        # Subproblems
+        # ---------------------------
+        results = {}  # (d, customer tuple) -> solve_depot_vrp result
+        stats = {"subproblems": 0, "cache_hits": 0, "subproblem_time": 0.0}
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(env_params(),),
+            )
+
+        def subproblem_args(d, S):
+            idx = np.array([d] + [N + c for c in S])
+            return dist_sec[np.ix_(idx, idx)], self.demand[list(S)], self.fleet_template
+
+        def solve_all(keys):
+            """Solves the uncached (d, S) subproblems, in parallel if possible."""
+            todo = [key for key in dict.fromkeys(keys) if key not in results]
+            stats["cache_hits"] += len(keys) - len(todo)
+            if not todo:
+                return
+            t = time.perf_counter()
+            if pool is None:
+                for key in todo:
+                    results[key] = solve_depot_vrp(*subproblem_args(*key), sub_params)
+            else:
+                futures = {
+                    key: pool.submit(solve_depot_vrp, *subproblem_args(*key), sub_params)
+                    for key in todo
+                }
+                for key, fut in futures.items():
+                    results[key] = fut.result()
+            stats["subproblems"] += len(todo)
+            stats["subproblem_time"] += time.perf_counter() - t
+
+        def assignment(a_vals):
+            sets = {}
+            for (d, c), v in a_vals.items():
+                if v > 0.5:
+                    sets.setdefault(d, []).append(c)
+            return {d: tuple(sorted(S)) for d, S in sets.items()}
+
+        m._lazy_cuts = 0
+
+        def benders_cb(model, where):
+            if where != GRB.Callback.MIPSOL:
+                return
+            sets = assignment(model.cbGetSolution(a))
+            theta_vals = model.cbGetSolution(theta)
+            solve_all([(d, S) for d, S in sets.items()])
+            for d, S in sets.items():
+                res = results[d, S]
+                missing = gp.quicksum(1 - a[d, c] for c in S)
+                if res is None:
+                    model.cbLazy(missing >= 1)
+                    model._lazy_cuts += 1
+                elif theta_vals[d] < res["bound"] - 1e-6:
+                    model.cbLazy(theta[d] >= res["bound"] * (1 - missing))
+                    model._lazy_cuts += 1
+
+        build_time = self.timer.stop("router.build")
+
+        for key, val in (params or {}).items():
+            m.setParam(key, val)
+        m.setParam("LazyConstraints", 1)
+        m._stalled = False
+        callbacks = [benders_cb]
+        if stall_time is not None:
+            callbacks.append(stall_callback(stall_time))
+        self.timer.start("router.optimize")
+        try:
+            m.optimize(combine_callbacks(callbacks))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        optimize_time = self.timer.stop("router.optimize")
+
+        if not (
+            m.Status in [GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED]
+            and m.SolCount > 0
+        ):
+            return None
+
+        self.timer.start("router.extract")
+        z_keys, z_vals = solution_values(m, z)
+        open_depots = z_keys[z_vals > 0.5].tolist()
+        y_keys, y_vals = solution_values(m, y)
+        truck_edges = [tuple(e) for e in y_keys[y_vals > 0.5].tolist()]
+        edges = np.asarray(truck_edges, dtype=int).reshape(-1, 2)
+        truck_dist = float(dist_truck[edges[:, 0], edges[:, 1]].sum())
+
+        sets = assignment({key: var.X for key, var in a.items()})
+        solve_all([(d, S) for d, S in sets.items()])
+        sec_assignments = {d: {} for d in open_depots}
+        total_sec_cost = 0.0
+        route_issues = []
+        for d, S in sets.items():
+            res = results[d, S]
+            if res is None or res["cost"] is None:
+                route_issues.append({"depot": d, "issues": ["no_subproblem_solution"]})
+                continue
+            total_sec_cost += res["cost"]
+            for k, path in res["routes"].items():
+                sec_assignments[d][k] = [S[c] for c in path]
+
+        return {
+            "open_depots": open_depots,
+            "open_depot_locs": [D[d] for d in open_depots],
+            "truck_edges": truck_edges,
+            "truck_dist": truck_dist,
+            "sec_assignments": sec_assignments,
+            "max_dist": 0.0,
+            "total_sec_cost": total_sec_cost,
+            "heuristic": _heuristic_summary(heuristic),
+            "solver_stats": {
+                "status": m.Status,
+                "mip_gap": m.MIPGap,
+                "runtime": m.Runtime,
+                "build_time": build_time,
+                "optimize_time": optimize_time,
+                "extract_time": self.timer.stop("router.extract"),
+                "num_vars": m.NumVars,
+                "num_constrs": m.NumConstrs,
+                "formulation": "benders",
+                "lazy_cuts": m._lazy_cuts,
+                "symmetry_rows": 0,
+                "stalled": m._stalled,
+                "route_issues": route_issues,
+                "workers": self.workers,
+                "subproblems": stats["subproblems"],
+                "subproblem_cache_hits": stats["cache_hits"],
+                "subproblem_time": stats["subproblem_time"],
+            },
+        }
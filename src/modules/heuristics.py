@@ -0,0 +1,328 @@
+import time
+import numpy as np
+from common.distances import build_distance_matrix, truck_distance_matrix
+from common.vehicles import identical_vehicle_groups
+
+
+def route_length(route, depot, dist):
+    """Length of depot -> route -> depot (return arc is 0 in open-loop matrices)."""
+    if not route:
+        return 0.0
+    d = dist[depot, route[0]] + dist[route[-1], depot]
+    for a, b in zip(route, route[1:]):
+        d += dist[a, b]
+    return float(d)
+
+
+def symmetry_order(routes, fleet, depot, dist):
+    """
+    Reassigns the routes {vehicle_idx: route} of one depot so that, within
+    every group of identical vehicles, route lengths are non-increasing in
+    the vehicle index. This is the order the routers' SymBreak rows demand,
+    so the warm start stays feasible with symmetry_breaking=True.
+    """
+    ordered = dict(routes)
+    for group in identical_vehicle_groups(fleet):
+        group_routes = [routes.get(k, []) for k in group]
+        group_routes.sort(key=lambda r: route_length(r, depot, dist), reverse=True)
+        for k, route in zip(group, group_routes):
+            ordered[k] = route
+    return ordered
+
+
+def symmetry_order_2e(routes, fleet, dist):
+    """symmetry_order applied per depot to 2E routes {(depot, vehicle_idx): route}."""
+    by_depot = {}
+    for (d, k), route in routes.items():
+        by_depot.setdefault(d, {})[k] = route
+    return {
+        (d, k): route
+        for d, depot_routes in by_depot.items()
+        for k, route in symmetry_order(depot_routes, fleet, d, dist).items()
+    }
+
+
+class ConstructiveHeuristic:
+    """
+    Clarke-Wright savings and polar sweep constructions used to warm start
+    VRPRouter / TwoEchelonRouter.
+    Uses the router node indexing (0..N-1: Depots, N..N+M-1: Customers),
+    so routes map directly onto the x variables of the MIP.
+    """
+
+    def __init__(self, instance, potential_depots, fleet, demand=None):
+        """
+        :param instance: ProblemInstance (customers, main_depot)
+        :param potential_depots: Array of candidate depot coordinates
+        :param fleet: List of VehicleType objects (per depot for 2E)
+        :param demand: Per-customer demand array (default: instance.demand)
+        """
+        self.instance = instance
+        self.potential_depots = np.asarray(potential_depots)
+        self.fleet = fleet
+        self.num_depots = len(self.potential_depots)
+        self.num_customers = len(instance.customers)
+        if demand is None:
+            demand = instance.demand
+        self.demand = np.asarray(demand, dtype=float)
+
+    # ---------------------------
+    # Route Constructions
+    # ---------------------------
+    def _load(self, route):
+        return float(sum(self.demand[c - self.num_depots] for c in route))
+
+    def savings(self, depot, customers, dist):
+        """
+        Clarke-Wright parallel savings on the (possibly asymmetric) matrix.
+        Route capacity is the largest vehicle capacity; vehicles are
+        matched to routes afterwards in assign_vehicles.
+        """
+        max_cap = max(v.capacity for v in self.fleet)
+        routes = {c: [c] for c in customers}
+        route_of = {c: c for c in customers}
+        loads = {c: self._load([c]) for c in customers}
+        if any(load > max_cap for load in loads.values()):
+            return None
+
+        cust = np.asarray(customers)
+        # s_ij = d(i, 0) + d(0, j) - d(i, j) for merging "... i" + "j ..."
+        sav = dist[cust, depot][:, None] + dist[depot, cust][None, :]
+        sav -= dist[np.ix_(cust, cust)]
+        np.fill_diagonal(sav, -np.inf)
+        order = np.argsort(sav, axis=None)[::-1]
+
+        for flat in order:
+            a, b = divmod(int(flat), len(cust))
+            if sav[a, b] <= 0:
+                break
+            i, j = int(cust[a]), int(cust[b])
+            ri, rj = route_of[i], route_of[j]
+            if ri == rj:
+                continue
+            if routes[ri][-1] != i or routes[rj][0] != j:
+                continue
+            if loads[ri] + loads[rj] > max_cap:
+                continue
+
+            routes[ri].extend(routes[rj])
+            loads[ri] += loads[rj]
+            for c in routes[rj]:
+                route_of[c] = ri
+            del routes[rj], loads[rj]
+
+        return list(routes.values())
+
+    def sweep(self, depot, customers, dist, n_starts=16):
+        """
+        Polar sweep around the depot: angle-sorted customers are cut into
+        contiguous sectors, one per vehicle (sized by capacity share), and
+        each sector is sequenced by nearest neighbour.
+        Several start angles are tried; the best by vehicle cost is kept.
+        """
+        if not customers:
+            return {}
+        loc = self.potential_depots[depot]
+        pts = self.instance.customers[np.asarray(customers) - self.num_depots]
+        angles = np.arctan2(pts[:, 1] - loc[1], pts[:, 0] - loc[0])
+        ordered = [customers[i] for i in np.argsort(angles)]
+
+        caps = np.array([v.capacity for v in self.fleet], dtype=float)
+        total_dem = self._load(customers)
+        if total_dem > caps.sum():
+            return None
+
+        best, best_cost = None, float("inf")
+        n = len(ordered)
+        for s in np.unique(np.linspace(0, n - 1, min(n, n_starts)).astype(int)):
+            seq = ordered[s:] + ordered[:s]
+            routes = {}
+            pos = 0
+            veh_order = np.argsort(-caps, kind="stable")
+            for idx, k in enumerate(veh_order):
+                # Last vehicle takes whatever is left (up to its capacity)
+                target = caps[k]
+                if idx < len(veh_order) - 1:
+                    target = min(caps[k], total_dem * caps[k] / caps.sum())
+                chunk, load = [], 0.0
+                while pos < n:
+                    dem = self.demand[seq[pos] - self.num_depots]
+                    if load + dem > caps[k] or (chunk and load + dem > target + 0.5):
+                        break
+                    chunk.append(seq[pos])
+                    load += dem
+                    pos += 1
+                routes[int(k)] = self._nearest_neighbour(depot, chunk, dist)
+            if pos < n:
+                continue
+
+            cost = self.vehicle_cost(routes, depot, dist)
+            if cost < best_cost:
+                best, best_cost = routes, cost
+        return best
+
+    def _nearest_neighbour(self, depot, chunk, dist):
+        route, remaining, curr = [], list(chunk), depot
+        while remaining:
+            nxt = min(remaining, key=lambda c: dist[curr, c])
+            route.append(nxt)
+            remaining.remove(nxt)
+            curr = nxt
+        return route
+
+    def assign_vehicles(self, routes):
+        """
+        Matches routes to vehicles: heaviest route first, each taking the
+        cheapest (lowest cost_factor) free vehicle that can carry it.
+        Returns {vehicle_idx: route} or None if the fleet cannot cover them.
+        """
+        if routes is None or len(routes) > len(self.fleet):
+            return None
+
+        free = sorted(
+            range(len(self.fleet)),
+            key=lambda k: (self.fleet[k].cost_factor, self.fleet[k].capacity),
+        )
+        assigned = {}
+        for route in sorted(routes, key=self._load, reverse=True):
+            load = self._load(route)
+            k = next((k for k in free if self.fleet[k].capacity >= load), None)
+            if k is None:
+                return None
+            free.remove(k)
+            assigned[k] = route
+        return assigned
+
+    def vehicle_cost(self, assigned, depot, dist):
+        return sum(
+            self.fleet[k].cost_factor * route_length(r, depot, dist)
+            for k, r in assigned.items()
+        )
+
+    def _routes_for_depot(self, depot, customers, dist, score):
+        """Runs both constructions and keeps the best by `score`."""
+        best, best_method, best_score = None, None, float("inf")
+        for method in ("savings", "sweep"):
+            if method == "savings":
+                assigned = self.assign_vehicles(self.savings(depot, customers, dist))
+            else:
+                assigned = self.sweep(depot, customers, dist)
+            if assigned is None:
+                continue
+            val = score(assigned)
+            if val < best_score:
+                best, best_method, best_score = assigned, method, val
+        return best, best_method
+
+    # ---------------------------
+    # Single Depot VRP
+    # ---------------------------
+    def solve_vrp(self, open_loop=False):
+        """
+        Best heuristic solution for VRPRouter's objective
+        (MaxDist + 0.001 * (truck + cost-weighted secondary distance)).
+        """
+        start = time.time()
+        full = build_distance_matrix(
+            self.potential_depots,
+            self.instance.customers,
+            self.instance.main_depot,
+            open_loop=open_loop,
+        )
+        n = self.num_depots + self.num_customers
+        dist = full[:n, :n]
+        dist_main_to_D = full[n, : self.num_depots]
+        customers = list(range(self.num_depots, n))
+
+        best = None
+        for d in range(self.num_depots):
+
+            def score(assigned, d=d):
+                w = max(route_length(r, d, dist) for r in assigned.values())
+                sec = self.vehicle_cost(assigned, d, dist)
+                return w + 0.001 * (dist_main_to_D[d] + sec)
+
+            assigned, method = self._routes_for_depot(d, customers, dist, score)
+            if assigned is None:
+                continue
+            cost = float(score(assigned))
+            if best is None or cost < best["cost"]:
+                best = {"method": method, "cost": cost, "depot": d, "routes": assigned}
+
+        if best is not None:
+            best["time"] = time.time() - start
+        return best
+
+    # ---------------------------
+    # 2-Echelon LRP
+    # ---------------------------
+    def solve_two_echelon(self, open_loop=False):
+        """
+        Best heuristic solution for TwoEchelonRouter's objective
+        (truck tour + cost-weighted secondary distance).
+        Depot sets tried: every single depot, and nearest-depot assignment.
+        """
+        start = time.time()
+        full = build_distance_matrix(
+            self.potential_depots,
+            self.instance.customers,
+            self.instance.main_depot,
+            open_loop=open_loop,
+        )
+        n = self.num_depots + self.num_customers
+        dist = full[:n, :n]
+        dist_truck = truck_distance_matrix(full, self.num_depots)
+        MAIN_IDX = self.num_depots
+        customers = list(range(self.num_depots, n))
+
+        nearest = np.argmin(dist[: self.num_depots, self.num_depots :], axis=0)
+        partitions = [{d: customers} for d in range(self.num_depots)]
+        partitions.append(
+            {
+                int(d): [c for c, nd in zip(customers, nearest) if nd == d]
+                for d in np.unique(nearest)
+            }
+        )
+
+        best = None
+        for part in partitions:
+            routes, methods, sec_cost = {}, set(), 0.0
+            for d, cust_d in part.items():
+
+                def score(assigned, d=d):
+                    return self.vehicle_cost(assigned, d, dist)
+
+                assigned, method = self._routes_for_depot(d, cust_d, dist, score)
+                if assigned is None:
+                    break
+                methods.add(method)
+                sec_cost += score(assigned)
+                for k, r in assigned.items():
+                    routes[d, k] = r
+            else:
+                tour = self._truck_tour(sorted(part), dist_truck, MAIN_IDX)
+                truck = sum(dist_truck[a, b] for a, b in zip(tour, tour[1:]))
+                cost = float(truck + sec_cost)
+                if best is None or cost < best["cost"]:
+                    best = {
+                        "method": "+".join(sorted(methods)),
+                        "cost": cost,
+                        "open_depots": sorted(part),
+                        "truck_tour": tour,
+                        "routes": routes,
+                    }
+
+        if best is not None:
+            best["time"] = time.time() - start
+        return best
+
+    def _truck_tour(self, open_depots, dist_truck, main_idx):
+        """Nearest-neighbour truck tour Main -> open depots -> Main."""
+        tour, remaining, curr = [main_idx], list(open_depots), main_idx
+        while remaining:
+            nxt = min(remaining, key=lambda d: dist_truck[curr, d])
+            tour.append(nxt)
+            remaining.remove(nxt)
+            curr = nxt
+        tour.append(main_idx)
+        return tour
@@ -1,6 +1,10 @@
 import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
+from scipy.spatial import cKDTree
+from common.distances import pairwise_distances
+from common.gurobi_env import shared_env
+from common.timing import PhaseTimer
 
 
 class Locator:
@@ -22,44 +26,332 @@ class FixedCandidateLocator(Locator):
 
 
 class CentroidLocator(Locator):
-    """Scenario 1 (Continuous): Finds Center of Mass."""
+    """
+    Scenario 1/3 (Continuous): multi-facility Weber problem.
+
+    Places n_candidates depots anywhere in the plane, minimizing
+        sum_c ||c - f(c)|| + truck_weight * sum_f ||f - main depot||
+    (f(c) = nearest depot), the continuous twin of PMedianLocator.
+    k-means++ seeding, then alternating nearest-depot assignment and one
+    Weiszfeld (geometric median) step per depot. All restarts run as one
+    batch of NumPy arrays. On large instances the restarts run on a random
+    subsample and only the best one is refined on every customer.
+    """
+
+    def __init__(
+        self,
+        n_restarts=8,
+        truck_weight=0.0,
+        max_iter=100,
+        tol=1e-4,
+        sample_size=1000,
+        seed=0,
+        timer=None,
+    ):
+        """
+        :param n_restarts: Independent k-means++ seedings solved in parallel
+        :param truck_weight: Weight of the main-depot -> depot distance
+        :param tol: Stop when no restart improves by more than this (relative)
+        :param sample_size: Customers used by the restarts (None = all)
+        :param timer: PhaseTimer receiving the locator.* phases (optional)
+        """
+        self.n_restarts = n_restarts
+        self.truck_weight = truck_weight
+        self.max_iter = max_iter
+        self.tol = tol
+        self.sample_size = sample_size
+        self.seed = seed
+        self.timer = timer if timer is not None else PhaseTimer()
+        self.stats = {}
 
     def find_depots(self, instance, n_candidates=1):
-        if n_candidates > 1:
-            # Could implement K-Means here for N > 1
-            # For now warning and just returning centroid
-            print(
-                "Warning: CentroidLocator only supports 1 candidate (Center of Mass)."
+        if n_candidates < 1:
+            raise ValueError(f"n_candidates must be >= 1, got {n_candidates}")
+        points = np.asarray(instance.customers, dtype=float)
+        main = np.asarray(instance.main_depot, dtype=float).reshape(2)
+        if n_candidates >= len(points):
+            return points.copy()
+
+        self.timer.start("locator.optimize")
+        rng = np.random.default_rng(self.seed)
+        sample = points
+        if self.sample_size is not None and len(points) > self.sample_size:
+            sample = points[rng.choice(len(points), self.sample_size, replace=False)]
+        centers = self._seed_centers(sample, n_candidates, rng)
+        centers, objective, iterations = self._weiszfeld(sample, main, centers)
+        best = int(np.argmin(objective))
+        if sample is not points:
+            # Refine the winning restart on the full customer set
+            centers, objective, refine = self._weiszfeld(points, main, centers[[best]])
+            best, iterations = 0, iterations + refine
+        runtime = self.timer.stop("locator.optimize")
+
+        self.stats = {
+            "objective": float(objective[best]),
+            "iterations": iterations,
+            "restarts": self.n_restarts,
+            "runtime": runtime,
+        }
+        return centers[best]
+
+    def _seed_centers(self, points, k, rng):
+        """k-means++ (D^2 sampling) for every restart at once: (R, k, 2)."""
+        R, n = self.n_restarts, len(points)
+        rows = np.arange(R)
+        centers = np.empty((R, k, 2))
+        centers[:, 0] = points[rng.integers(n, size=R)]
+        d2 = ((points[None, :, :] - centers[:, :1, :]) ** 2).sum(-1)  # (R, n)
+        for j in range(1, k):
+            cum = np.cumsum(d2, axis=1)
+            u = rng.random(R) * cum[:, -1]
+            idx = np.minimum((cum < u[:, None]).sum(axis=1), n - 1)
+            centers[:, j] = points[idx]
+            new_d2 = ((points[None, :, :] - centers[rows, j][:, None]) ** 2).sum(-1)
+            d2 = np.minimum(d2, new_d2)
+        return centers
+
+    def _weiszfeld(self, points, main, centers):
+        """
+        Alternating assignment / Weiszfeld steps on (R, k, 2) centers.
+        Returns (centers, objective per restart, iterations).
+        """
+        R, k, _ = centers.shape
+        eps = 1e-12
+        offsets = (np.arange(R) * k)[:, None]
+        px, py = points[:, 0].copy(), points[:, 1].copy()
+        prev = np.full(R, np.inf)
+        for it in range(1, self.max_iter + 1):
+            # Nearest depot per customer and restart: (R, k, n) squared
+            # distances, square root only of the minimum, (R, n)
+            dx = px - centers[:, :, 0, None]
+            dy = py - centers[:, :, 1, None]
+            d2 = dx * dx
+            d2 += dy * dy
+            labels = d2.argmin(axis=1)
+            dmin = np.sqrt(np.take_along_axis(d2, labels[:, None], axis=1)[:, 0])
+            d_main = np.linalg.norm(centers - main, axis=-1)  # (R, k)
+            objective = dmin.sum(axis=1) + self.truck_weight * d_main.sum(axis=1)
+            if np.all(prev - objective <= self.tol * np.abs(objective)):
+                break
+            prev = objective
+
+            # One Weiszfeld step per depot over its customers (+ main depot).
+            # Points sitting on the depot are left out of the weighted mean
+            # and handled by the Vardi-Zhang correction (weight eta), so a
+            # depot seeded on a customer can still move.
+            flat = (labels + offsets).ravel()
+            d_flat = dmin.ravel()
+            on_point = d_flat <= eps
+            inv = np.where(on_point, 0.0, 1.0 / np.maximum(d_flat, eps))
+            den = np.bincount(flat, inv, minlength=R * k)
+            num_x = np.bincount(flat, inv * np.tile(px, R), minlength=R * k)
+            num_y = np.bincount(flat, inv * np.tile(py, R), minlength=R * k)
+            eta = np.bincount(flat, on_point, minlength=R * k)
+            counts = np.bincount(flat, minlength=R * k)
+            d_main = d_main.ravel()
+            main_on = d_main <= eps
+            inv_main = np.where(
+                main_on, 0.0, self.truck_weight / np.maximum(d_main, eps)
             )
+            eta += np.where(main_on, self.truck_weight, 0.0)
+            den += inv_main
+            num_x += inv_main * main[0]
+            num_y += inv_main * main[1]
+
+            old = centers.reshape(R * k, 2)
+            new = old.copy()
+            moved = den > 0
+            num = np.stack([num_x[moved], num_y[moved]], axis=1)
+            step = num / den[moved, None]
+            # Vardi-Zhang: r = |sum of unit pulls|; blend back by eta / r
+            r = np.linalg.norm(num - den[moved, None] * old[moved], axis=1)
+            beta = np.where(
+                eta[moved] > 0, np.minimum(1.0, eta[moved] / np.maximum(r, eps)), 0.0
+            )[:, None]
+            new[moved] = (1 - beta) * step + beta * old[moved]
+            # Empty depots restart at their restart's worst-served customer
+            for e in np.flatnonzero(counts == 0):
+                worst = np.argmax(dmin[e // k])
+                new[e] = points[worst]
+                dmin[e // k, worst] = 0.0
+            centers = new.reshape(R, k, 2)
+        return centers, objective, it
 
-        centroid = np.mean(instance.customers, axis=0)
-        return np.array([centroid])
+
+PMEDIAN_MODES = ("auto", "heuristic", "mip")
 
 
 class PMedianLocator(Locator):
     """
     Scenario 1 (Discrete P=1) or Scenario 3 (Discrete P=N).
-    Selects P node(s) from Customers to serve as Hubs.
+    Selects P node(s) from Customers to serve as Hubs, minimizing
+        sum_i dist(main, i) + sum_c min_i dist(i, c)   (i selected)
+
+    Modes:
+    - 'auto' (default): exact enumeration for P=1, heuristic otherwise
+    - 'heuristic': greedy construction + Teitz-Bart interchange
+    - 'mip': exact Gurobi MIP, warm-started from the heuristic
     """
 
+    def __init__(
+        self,
+        threads=None,
+        timer=None,
+        mode="auto",
+        neighbors=50,
+        greedy_candidates=500,
+        seed=0,
+    ):
+        """
+        :param threads: Gurobi Threads cap (None = solver default)
+        :param timer: PhaseTimer receiving the locator.* phases (optional)
+        :param mode: 'auto', 'heuristic' or 'mip' (see class docstring)
+        :param neighbors: Interchange candidates per hub: its nearest
+            customers from a KD-tree (all customers on small instances)
+        :param greedy_candidates: Candidates sampled per greedy step
+        """
+        if mode not in PMEDIAN_MODES:
+            raise ValueError(f"Unknown p-median mode: {mode}")
+        self.threads = threads
+        self.timer = timer if timer is not None else PhaseTimer()
+        self.mode = mode
+        self.neighbors = neighbors
+        self.greedy_candidates = greedy_candidates
+        self.seed = seed
+        self.stats = {}
+
     def find_depots(self, instance, n_candidates=1):
-        m = gp.Model("PMedian_Locator")
-        m.setParam("OutputFlag", 0)
+        customers = np.asarray(instance.customers, dtype=float)
+        if not 1 <= n_candidates <= len(customers):
+            raise ValueError(
+                f"n_candidates must be in [1, {len(customers)}], got {n_candidates}"
+            )
+        d_main = pairwise_distances(customers, instance.main_depot)[:, 0]
 
-        candidates = instance.customers
-        customers = instance.customers
-        main = instance.main_depot
+        phase = "locator.heuristic" if self.mode == "mip" else "locator.optimize"
+        self.timer.start(phase)
+        if self.mode == "auto" and n_candidates == 1:
+            selected = self._enumerate_single(customers, d_main)
+            method, swaps = "enumeration", 0
+        else:
+            greedy = self._greedy(customers, d_main, n_candidates)
+            selected, swaps = self._teitz_bart(customers, d_main, greedy)
+            method = "heuristic"
+        runtime = self.timer.stop(phase)
+
+        self.stats = {
+            "method": method,
+            "objective": self._objective(customers, d_main, selected),
+            "swaps": swaps,
+            "build_time": 0.0,
+            "runtime": runtime,
+            "num_vars": 0,
+            "num_constrs": 0,
+        }
+        if self.mode == "mip":
+            self.stats["heuristic_objective"] = self.stats["objective"]
+            self.stats["heuristic_time"] = runtime
+            selected = self._solve_mip(customers, d_main, n_candidates, selected)
+        return customers[selected]
+
+    @staticmethod
+    def _objective(customers, d_main, selected):
+        hubs = customers[selected]
+        return float(
+            d_main[selected].sum()
+            + cKDTree(hubs).query(customers, k=1)[0].sum()
+        )
+
+    @staticmethod
+    def _enumerate_single(customers, d_main, chunk=2048):
+        """Exact P=1: total distance of every candidate, in row chunks."""
+        cost = d_main.copy()
+        for lo in range(0, len(customers), chunk):
+            cost[lo : lo + chunk] += pairwise_distances(
+                customers[lo : lo + chunk], customers
+            ).sum(axis=1)
+        return [int(np.argmin(cost))]
+
+    def _greedy(self, customers, d_main, p):
+        """Adds the hub with the largest cost reduction, p times."""
+        n = len(customers)
+        rng = np.random.default_rng(self.seed)
+        selected = []
+        nearest = np.full(n, np.inf)
+        for _ in range(p):
+            free = np.setdiff1d(np.arange(n), selected)
+            if len(free) > self.greedy_candidates:
+                free = rng.choice(free, self.greedy_candidates, replace=False)
+            dist = pairwise_distances(customers[free], customers)
+            cost = d_main[free] + np.minimum(dist, nearest).sum(axis=1)
+            best = int(np.argmin(cost))
+            selected.append(int(free[best]))
+            nearest = np.minimum(nearest, dist[best])
+        return selected
+
+    def _teitz_bart(self, customers, d_main, selected, chunk=256):
+        """
+        Teitz-Bart interchange: applies the best improving (in, out) swap
+        until none is left. Each customer's nearest/second-nearest hub comes
+        from a KD-tree over the hubs, so a candidate's gain for every
+        possible `out` hub is one pass over its distance row.
+        Candidates are the `neighbors` nearest customers of each hub.
+        Returns (selected, number of swaps).
+        """
+        n, p = len(customers), len(selected)
+        selected = list(selected)
+        tree = cKDTree(customers)
+        k_near = min(self.neighbors + 1, n)
+        swaps = 0
+        while True:
+            hubs = customers[selected]
+            if p > 1:
+                d12, lab = cKDTree(hubs).query(customers, k=2)
+                d1, d2, lab = d12[:, 0], d12[:, 1], lab[:, 0]
+            else:
+                d1 = pairwise_distances(customers, hubs)[:, 0]
+                d2, lab = np.full(n, np.inf), np.zeros(n, dtype=int)
+            onehot = np.zeros((n, p))
+            onehot[np.arange(n), lab] = 1.0
+
+            cand = np.unique(tree.query(hubs, k=k_near)[1])
+            cand = np.setdiff1d(cand, selected)
+            best_delta, best_swap = -1e-9, None
+            for lo in range(0, len(cand), chunk):
+                ins = cand[lo : lo + chunk]
+                r = pairwise_distances(customers[ins], customers)
+                # Gain of adding i; extra loss if hub o is then removed
+                gain = np.maximum(d1 - r, 0.0).sum(axis=1)
+                loss = (np.minimum(r, d2) - np.minimum(r, d1)) @ onehot
+                delta = (
+                    d_main[ins, None]
+                    - d_main[selected][None, :]
+                    - gain[:, None]
+                    + loss
+                )
+                a, o = np.unravel_index(np.argmin(delta), delta.shape)
+                if delta[a, o] < best_delta:
+                    best_delta, best_swap = delta[a, o], (int(ins[a]), int(o))
+            if best_swap is None:
+                return selected, swaps
+            selected[best_swap[1]] = best_swap[0]
+            swaps += 1
 
+    def _solve_mip(self, customers, d_main, n_candidates, start):
+        """Exact MIP, warm-started from the heuristic hubs `start`."""
+        self.timer.start("locator.build")
+        m = gp.Model("PMedian_Locator", env=shared_env())
+        m.setParam("OutputFlag", 0)
+        if self.threads is not None:
+            m.setParam("Threads", self.threads)
+
+        candidates = customers
         num_cand = len(candidates)
         num_cust = len(customers)
 
         # Distance Matrices
-        d_cand_cust = np.zeros((num_cand, num_cust))
-        for i in range(num_cand):
-            for j in range(num_cust):
-                d_cand_cust[i, j] = np.linalg.norm(candidates[i] - customers[j])
-
-        d_main_cand = np.linalg.norm(candidates - main, axis=1)
+        d_cand_cust = pairwise_distances(candidates, customers)
+        d_main_cand = d_main
 
         # Vars
         y = m.addVars(num_cand, vtype=GRB.BINARY, name="y")  # Select candidate
@@ -90,14 +382,37 @@ class PMedianLocator(Locator):
         )
 
         m.setObjective(truck_cost + dlv_cost, GRB.MINIMIZE)
-        m.optimize()
+
+        # Warm start: heuristic hubs, customers at their nearest hub
+        nearest = np.asarray(start)[d_cand_cust[start].argmin(axis=0)]
+        for i in range(num_cand):
+            y[i].Start = 0
+        for i in start:
+            y[i].Start = 1
+        for j in range(num_cust):
+            x[nearest[j], j].Start = 1
+
+        build_time = self.timer.stop("locator.build")
+        with self.timer.phase("locator.optimize"):
+            m.optimize()
+        self.stats.update(
+            {
+                "method": "mip",
+                "status": m.Status,
+                "build_time": build_time,
+                "runtime": m.Runtime,
+                "num_vars": m.NumVars,
+                "num_constrs": m.NumConstrs,
+            }
+        )
 
         if m.Status == GRB.OPTIMAL:
             selected_indices = []
             for i in range(num_cand):
                 if y[i].X > 0.5:
                     selected_indices.append(i)
-            return candidates[selected_indices]
+            self.stats["objective"] = m.ObjVal
+            return selected_indices
         else:
-            # Fallback
-            return np.array([np.mean(customers, axis=0)])
+            # Fallback: keep the heuristic hubs
+            return list(start)
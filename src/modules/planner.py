@@ -0,0 +1,354 @@
+import time
+
+import gurobipy as gp
+from gurobipy import GRB
+import numpy as np
+
+from common.data_gen import ProblemInstance
+from common.distances import pairwise_distances
+from common.gurobi_env import shared_env
+from modules.routers import solution_values, stall_callback, trace_route
+
+
+class DynamicVRPPlanner:
+    """
+    Persistent VRPRouter model for intra-day re-planning (Scenario 1).
+
+    The Gurobi model is built once and edited in place:
+    - add_customer: adds only the new customer's arcs, load variables and
+      rows, and links the new arcs into the existing rows (chgCoeff)
+    - remove_customer: removes the customer's variables and rows
+    - move_depot: updates the costs of the depot's arcs (objective and
+      MaxDist rows) and its truck distance
+    Every re-solve starts from the previous incumbent, repaired for the
+    change (new customers by cheapest feasible insertion).
+
+    Same model as VRPRouter with the MTZ formulation: one depot opened,
+    minimize MaxDist + 0.001 * (truck + cost-weighted distance).
+    Node ids are stable: depots 0..N-1, customers get new ids as added
+    (removed ids are not reused).
+    """
+
+    def __init__(self, instance, potential_depots, fleet, open_loop=False, params=None):
+        """
+        :param params: Gurobi parameters applied to every re-solve
+        """
+        self.fleet = fleet
+        self.vehicles = list(range(len(fleet)))
+        self.open_loop = open_loop
+        self.main_depot = np.asarray(instance.main_depot, dtype=float).reshape(2)
+        self.M_cap = max(v.capacity for v in fleet) + 100
+
+        self.loc = {}
+        self.demand = {}
+        self.depots = []
+        self.customers = []
+        self.history = []
+        self.routes = {k: [] for k in self.vehicles}
+        self.depot = None
+        self._next_id = 0
+
+        start = time.perf_counter()
+        m = gp.Model("VRP_Planner", env=shared_env())
+        for key, val in (params or {}).items():
+            m.setParam(key, val)
+        self.m = m
+
+        self.x, self.u, self.z = {}, {}, {}
+        self.rows = {}  # name tuple -> Constr
+        self.node_rows = {}  # customer id -> keys of its own rows
+        self._pending = []  # updates since the last solve
+        self.W = m.addVar(name="MaxDist", obj=1.0)
+        self.rows["one_depot"] = m.addConstr(gp.LinExpr() == 1, "OneDepot")
+        for k in self.vehicles:
+            self.rows["max_dist", k] = m.addConstr(self.W >= 0, f"MaxDist_{k}")
+            self.rows["global", k] = m.addConstr(gp.LinExpr() <= 1, f"Global_{k}")
+
+        for loc in np.asarray(potential_depots, dtype=float).reshape(-1, 2):
+            self._add_depot(loc)
+        demand = np.asarray(instance.demand, dtype=float)
+        for loc, dem in zip(np.asarray(instance.customers, dtype=float), demand):
+            self._add_customer(loc, dem)
+        self.build_time = time.perf_counter() - start  # Initial model build
+        self._pending.append({"op": "build", "update_time": self.build_time})
+
+    # ---------------------------
+    # Public updates
+    # ---------------------------
+
+    def add_customer(self, loc, demand=1.0):
+        """Adds a customer and returns its node id."""
+        start = time.perf_counter()
+        c = self._add_customer(np.asarray(loc, dtype=float).reshape(2), float(demand))
+        self._insert_into_routes(c)
+        self._log("add_customer", start, node=c)
+        return c
+
+    def remove_customer(self, c):
+        start = time.perf_counter()
+        if c not in self.customers:
+            raise ValueError(f"Unknown customer id: {c}")
+        m = self.m
+        m.remove([var for key, var in self.x.items() if c in key[:2]])
+        m.remove([self.u.pop((c, k)) for k in self.vehicles])
+        m.remove([self.rows.pop(key) for key in self.node_rows.pop(c)])
+        self.x = {key: var for key, var in self.x.items() if c not in key[:2]}
+        for keys in self.node_rows.values():
+            keys[:] = [key for key in keys if key in self.rows]
+        self.customers.remove(c)
+        del self.loc[c], self.demand[c]
+        for route in self.routes.values():
+            if c in route:
+                route.remove(c)
+        self._log("remove_customer", start, node=c)
+
+    def move_depot(self, d, loc):
+        """Relocates candidate depot d (its arc costs change, nothing else)."""
+        start = time.perf_counter()
+        if d not in self.depots:
+            raise ValueError(f"Unknown depot id: {d}")
+        self.loc[d] = np.asarray(loc, dtype=float).reshape(2)
+        self.z[d].Obj = 0.001 * self._dist_main(d)
+        for c in self.customers:
+            for i, j in ((d, c), (c, d)):
+                cost = self._dist(i, j)
+                for k in self.vehicles:
+                    var = self.x[i, j, k]
+                    var.Obj = 0.001 * self.fleet[k].cost_factor * cost
+                    self.m.chgCoeff(self.rows["max_dist", k], var, -cost)
+        self._log("move_depot", start, node=d)
+
+    # ---------------------------
+    # Solve
+    # ---------------------------
+
+    def solve(self, stall_time=None):
+        """
+        Re-optimizes from the previous incumbent. Returns a VRPRouter-style
+        result dict (customer positions follow `self.customers`), with the
+        update and solve latencies in solver_stats.
+        """
+        m = self.m
+        t = time.perf_counter()
+        self._set_start()
+        update_time = time.perf_counter() - t + sum(
+            op["update_time"] for op in self._pending
+        )
+
+        m._stalled = False
+        callback = stall_callback(stall_time) if stall_time is not None else None
+        t = time.perf_counter()
+        m.optimize(callback)
+        optimize_time = time.perf_counter() - t
+        self.history.append(
+            {
+                "ops": [op["op"] for op in self._pending],
+                "update_time": update_time,
+                "optimize_time": optimize_time,
+                "latency": update_time + optimize_time,
+                "status": m.Status,
+            }
+        )
+        self._pending = []
+
+        if not (m.Status in [GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED] and m.SolCount > 0):
+            return None
+
+        z_keys, z_vals = solution_values(m, self.z)
+        self.depot = int(z_keys[np.argmax(z_vals)])
+        x_keys, x_vals = solution_values(m, self.x)
+        active = x_keys[x_vals > 0.5]
+
+        position = {c: n for n, c in enumerate(self.customers)}
+        num_nodes = self._next_id
+        assignments, veh_dists, route_issues = {}, {}, []
+        for k in self.vehicles:
+            arcs_k = active[active[:, 2] == k, :2]
+            path, issues = [], []
+            if len(arcs_k):
+                # Customer ids are never below the depot ids, so trace_route's
+                # "id < num_depots is a depot" rule still holds
+                path, issues = trace_route(arcs_k, self.depot, len(self.depots), num_nodes)
+            if issues:
+                route_issues.append({"vehicle": k, "issues": issues})
+            self.routes[k] = list(path)
+            assignments[k] = [position[c] for c in path]
+            veh_dists[k] = float(sum(self._dist(i, j) for i, j in arcs_k.tolist()))
+
+        self.history[-1]["objective"] = m.ObjVal
+        return {
+            "selected_depot_idx": self.depot,
+            "selected_depot_loc": self.loc[self.depot],
+            "all_potential_depots": np.array([self.loc[d] for d in self.depots]),
+            "truck_dist": self._dist_main(self.depot),
+            "assignments": assignments,
+            "veh_dists": veh_dists,
+            "max_dist": self.W.X,
+            "total_sec_cost": sum(veh_dists.values()),
+            "open_loop": self.open_loop,
+            "customer_ids": list(self.customers),
+            "heuristic": None,
+            "solver_stats": {
+                "status": m.Status,
+                "mip_gap": m.MIPGap if m.IsMIP else 0.0,
+                "runtime": m.Runtime,
+                "build_time": self.build_time,
+                "update_time": update_time,
+                "optimize_time": optimize_time,
+                "num_vars": m.NumVars,
+                "num_constrs": m.NumConstrs,
+                "formulation": "mtz",
+                "lazy_cuts": 0,
+                "symmetry_rows": 0,
+                "stalled": m._stalled,
+                "route_issues": route_issues,
+            },
+        }
+
+    def instance(self):
+        """Current customers as a ProblemInstance (for plotting/reporting)."""
+        return ProblemInstance(
+            self.main_depot,
+            np.array([self.loc[d] for d in self.depots]),
+            np.array([self.loc[c] for c in self.customers]).reshape(-1, 2),
+            demand=np.array([self.demand[c] for c in self.customers]),
+        )
+
+    # ---------------------------
+    # Model edits
+    # ---------------------------
+
+    def _dist(self, i, j):
+        # Open loop: the return to a depot is a free virtual arc
+        if self.open_loop and i in self.demand and j not in self.demand:
+            return 0.0
+        return float(np.hypot(*(self.loc[i] - self.loc[j])))
+
+    def _dist_main(self, d):
+        return float(pairwise_distances(self.loc[d], self.main_depot)[0, 0])
+
+    def _add_depot(self, loc):
+        d = self._next_id
+        self._next_id += 1
+        self.loc[d] = loc
+        self.depots.append(d)
+        m = self.m
+        self.z[d] = m.addVar(vtype=GRB.BINARY, obj=0.001 * self._dist_main(d), name=f"z[{d}]")
+        m.chgCoeff(self.rows["one_depot"], self.z[d], 1.0)
+        for k in self.vehicles:
+            self.rows["dep_out", d, k] = m.addConstr(-self.z[d] <= 0)
+            self.rows["dep_in", d, k] = m.addConstr(-self.z[d] <= 0)
+            self.rows["dep_bal", d, k] = m.addConstr(gp.LinExpr() == 0)
+        return d
+
+    def _add_customer(self, loc, dem):
+        c = self._next_id
+        self._next_id += 1
+        self.loc[c] = loc
+        self.demand[c] = dem
+        m = self.m
+        others = self.depots + self.customers
+        self.customers.append(c)
+
+        # Rows of the new customer (coefficients are filled in with its arcs)
+        own = self.node_rows[c] = [("assign", c)]
+        for k in self.vehicles:
+            own += [("flow", c, k), ("min_load", c, k)]
+            self.u[c, k] = m.addVar(
+                lb=0, ub=self.fleet[k].capacity, name=f"u[{c},{k}]"
+            )
+            self.rows["flow", c, k] = m.addConstr(gp.LinExpr() == 0, f"Flow_{c}_{k}")
+            self.rows["min_load", c, k] = m.addConstr(self.u[c, k] >= 0)
+        self.rows["assign", c] = m.addConstr(gp.LinExpr() == 1, f"Assign_{c}")
+
+        for n in others:
+            for i, j in ((n, c), (c, n)):
+                cost = self._dist(i, j)
+                for k in self.vehicles:
+                    var = m.addVar(
+                        vtype=GRB.BINARY,
+                        obj=0.001 * self.fleet[k].cost_factor * cost,
+                        name=f"x[{i},{j},{k}]",
+                    )
+                    self.x[i, j, k] = var
+                    self._link_arc(i, j, k, var, cost)
+
+        # MTZ load propagation between the new customer and the others
+        for n in others:
+            if n in self.demand:
+                for i, j in ((n, c), (c, n)):
+                    for k in self.vehicles:
+                        own.append(("load", i, j, k))
+                        self.node_rows[n].append(("load", i, j, k))
+                        self.rows["load", i, j, k] = m.addConstr(
+                            self.u[j, k]
+                            >= self.u[i, k]
+                            + self.demand[j]
+                            - self.M_cap * (1 - self.x[i, j, k])
+                        )
+        return c
+
+    def _link_arc(self, i, j, k, var, cost):
+        """Puts arc variable x[i, j, k] into every row it belongs to."""
+        m, rows = self.m, self.rows
+        m.chgCoeff(rows["max_dist", k], var, -cost)
+        if i in self.demand:
+            m.chgCoeff(rows["flow", i, k], var, -1.0)
+        else:
+            m.chgCoeff(rows["dep_out", i, k], var, 1.0)
+            m.chgCoeff(rows["dep_bal", i, k], var, 1.0)
+            m.chgCoeff(rows["global", k], var, 1.0)
+        if j in self.demand:
+            m.chgCoeff(rows["flow", j, k], var, 1.0)
+            m.chgCoeff(rows["assign", j], var, 1.0)
+            m.chgCoeff(rows["min_load", j, k], var, -self.demand[j])
+        else:
+            m.chgCoeff(rows["dep_in", j, k], var, 1.0)
+            m.chgCoeff(rows["dep_bal", j, k], var, -1.0)
+
+    # ---------------------------
+    # Warm start
+    # ---------------------------
+
+    def _insert_into_routes(self, c):
+        """Cheapest feasible insertion of c into the previous incumbent."""
+        if self.depot is None:
+            return
+        best = None
+        for k, route in self.routes.items():
+            load = sum(self.demand[n] for n in route)
+            if load + self.demand[c] > self.fleet[k].capacity:
+                continue
+            nodes = [self.depot] + route + [self.depot]
+            for pos, (i, j) in enumerate(zip(nodes, nodes[1:])):
+                delta = self._dist(i, c) + self._dist(c, j) - self._dist(i, j)
+                delta *= self.fleet[k].cost_factor
+                if best is None or delta < best[0]:
+                    best = (delta, k, pos)
+        if best is not None:
+            _, k, pos = best
+            self.routes[k].insert(pos, c)
+
+    def _set_start(self):
+        """Previous incumbent (after the edits) as MIP start, in bulk."""
+        if self.depot is None:
+            return
+        m = self.m
+        z_start = [1.0 if d == self.depot else 0.0 for d in self.z]
+        m.setAttr("Start", list(self.z.values()), z_start)
+        active = set()
+        for k, route in self.routes.items():
+            if route:
+                nodes = [self.depot] + route + [self.depot]
+                active.update((i, j, k) for i, j in zip(nodes, nodes[1:]))
+        keys = list(self.x)
+        m.setAttr(
+            "Start",
+            [self.x[key] for key in keys],
+            [1.0 if key in active else 0.0 for key in keys],
+        )
+
+    def _log(self, op, start, **info):
+        self._pending.append(
+            {"op": op, "update_time": time.perf_counter() - start, **info}
+        )
@@ -1,23 +1,240 @@
 import gurobipy as gp
 from gurobipy import GRB
 import numpy as np
+import scipy.sparse as sp
+from common.distances import build_distance_matrix, truck_distance_matrix
+from common.gurobi_env import shared_env
+from common.timing import PhaseTimer
+from common.tuning import param_key, tuned_params
+from common.vehicles import identical_vehicle_groups
+from modules.heuristics import ConstructiveHeuristic, symmetry_order, symmetry_order_2e
+
+
+def build_adjacency(arcs, nodes):
+    """
+    Returns (out_nbrs, in_nbrs) dicts-of-lists for an arc list, so flow
+    constraints iterate only over existing arcs instead of scanning `arcs`.
+    """
+    out_nbrs = {n: [] for n in nodes}
+    in_nbrs = {n: [] for n in nodes}
+    for i, j in arcs:
+        out_nbrs[i].append(j)
+        in_nbrs[j].append(i)
+    return out_nbrs, in_nbrs
+
+
+FORMULATIONS = ("mtz", "dfj-lazy")
+BUILDERS = ("loops", "matrix")
+# Part of every ModelCache key; bump when a router's model layout changes
+MODEL_VERSION = 1
+# Stop statuses that still leave a usable incumbent (NodeLimit / SolutionLimit
+# stop like a TimeLimit)
+RESULT_STATUSES = (
+    GRB.OPTIMAL,
+    GRB.TIME_LIMIT,
+    GRB.NODE_LIMIT,
+    GRB.SOLUTION_LIMIT,
+    GRB.INTERRUPTED,
+)
+
+
+def merge_tuned_params(params, key):
+    """
+    Tuned parameters of the scenario class `key` (tuned_params.json, see
+    src/tune.py) under the explicit `params`, which take precedence.
+    """
+    tuned = tuned_params(key)
+    if tuned:
+        print(f"Tuned parameters ({key}): {tuned}")
+    return {**tuned, **(params or {})}
+
+
+def stall_callback(stall_time):
+    """
+    Terminates the solve when the incumbent has not improved for
+    `stall_time` seconds (only once an incumbent exists).
+    """
+    state = {"best": GRB.INFINITY, "since": 0.0}
+
+    def handler(model, where):
+        if where != GRB.Callback.MIP:
+            return
+        best = model.cbGet(GRB.Callback.MIP_OBJBST)
+        runtime = model.cbGet(GRB.Callback.RUNTIME)
+        if best < state["best"] - 1e-9:
+            state["best"], state["since"] = best, runtime
+        elif (
+            model.cbGet(GRB.Callback.MIP_SOLCNT) > 0
+            and runtime - state["since"] > stall_time
+        ):
+            model._stalled = True
+            model.terminate()
+
+    return handler
+
+
+def combine_callbacks(handlers):
+    """Single Gurobi callback dispatching to every handler (None if empty)."""
+    if not handlers:
+        return None
+
+    def callback(model, where):
+        for handler in handlers:
+            handler(model, where)
+
+    return callback
+
+
+def solution_values(m, var_dict):
+    """
+    Keys (as an int array, one row per variable) and values of a tupledict,
+    fetched with a single getAttr call.
+    """
+    keys = np.array(list(var_dict.keys()), dtype=int)
+    vals = np.array(m.getAttr("X", list(var_dict.values())))
+    return keys, vals
+
+
+def trace_route(arcs, start, num_depots, num_nodes):
+    """
+    Traces one vehicle's route from `start` through a successor array.
+    :param arcs: (a, 2) array of active (i, j) arcs of the vehicle
+    Returns (path, issues): customer node ids in visiting order, and a list
+    of detected problems ('branching', 'cycle', 'dangling', 'other_depot',
+    'subtour') — all empty for a well-formed MIP solution.
+    """
+    issues = []
+    succ = np.full(num_nodes, -1)
+    succ[arcs[:, 0]] = arcs[:, 1]
+    if np.bincount(arcs[:, 0], minlength=num_nodes).max() > 1:
+        issues.append("branching")
+
+    path = []
+    on_path = np.zeros(num_nodes, dtype=bool)
+    curr = start
+    while True:
+        nxt = succ[curr]
+        if nxt < 0:
+            if curr != start:
+                issues.append("dangling")
+            break
+        if nxt < num_depots:
+            if nxt != start:
+                issues.append("other_depot")
+            break
+        if on_path[nxt]:
+            issues.append("cycle")
+            break
+        on_path[nxt] = True
+        path.append(int(nxt))
+        curr = nxt
+
+    # Active arcs leaving nodes the route never reached form subtours
+    if (~on_path[arcs[:, 0]] & (arcs[:, 0] != start)).any():
+        issues.append("subtour")
+    return path, issues
+
+
+def _heuristic_summary(heuristic):
+    """JSON-friendly method/cost/time of the warm start (None if unused)."""
+    if heuristic is None:
+        return None
+    return {
+        "method": heuristic["method"],
+        "cost": heuristic["cost"],
+        "time": heuristic["time"],
+    }
+
+
+def find_subtours(arcs, roots):
+    """
+    Returns the node sets (lists) of cycles in `arcs` that are disconnected
+    from every node in `roots` (depots / main depot).
+    Used to separate DFJ subtour cuts on integer incumbents.
+    """
+    nbrs = {}
+    for i, j in arcs:
+        nbrs.setdefault(i, []).append(j)
+        nbrs.setdefault(j, []).append(i)
+
+    seen = set()
+    stack = [r for r in roots if r in nbrs]
+    seen.update(stack)
+    while stack:
+        n = stack.pop()
+        for nb in nbrs[n]:
+            if nb not in seen:
+                seen.add(nb)
+                stack.append(nb)
+
+    subtours = []
+    for start in nbrs:
+        if start in seen:
+            continue
+        comp = [start]
+        seen.add(start)
+        stack = [start]
+        while stack:
+            n = stack.pop()
+            for nb in nbrs[n]:
+                if nb not in seen:
+                    seen.add(nb)
+                    comp.append(nb)
+                    stack.append(nb)
+        subtours.append(comp)
+    return subtours
 
 
 class VRPRouter:
-    def __init__(self, instance, potential_depots, fleet):
+    def __init__(self, instance, potential_depots, fleet, timer=None):
         """
         :param instance: ProblemInstance (customers, main_depot)
         :param potential_depots: List/Array of [x,y] coordinates for candidate depots.
         :param fleet: List of VehicleType objects
+        :param timer: PhaseTimer receiving the router.* phases (optional)
         """
+        self.timer = timer if timer is not None else PhaseTimer()
         self.instance = instance
         self.potential_depots = potential_depots
         self.fleet = fleet
         self.num_veh = len(fleet)
+        self.demand = np.asarray(instance.demand, dtype=float)
+
+    def solve(
+        self,
+        open_loop=False,
+        formulation="mtz",
+        symmetry_breaking=False,
+        warm_start=False,
+        params=None,
+        stall_time=None,
+        tuned=True,
+    ):
+        """
+        :param formulation: 'mtz' (load-based MTZ rows) or 'dfj-lazy'
+            (subtour and capacity cuts added lazily on integer incumbents).
+        :param symmetry_breaking: Order identical vehicles by non-increasing
+            route length so permutations of equivalent vehicles are cut off.
+        :param warm_start: Feed the best savings/sweep solution as MIP start.
+        :param params: Gurobi parameters, e.g. {"TimeLimit": 600, "MIPGap": 0.01}
+        :param stall_time: Stop after this many seconds without incumbent improvement.
+        :param tuned: Apply the tuned parameters of the 'vrp/<loop>/<fleet>'
+            scenario class, if any (explicit params override them).
+        """
+        if formulation not in FORMULATIONS:
+            raise ValueError(f"Unknown formulation: {formulation}")
+        if tuned:
+            params = merge_tuned_params(params, param_key("vrp", open_loop, self.fleet))
+
+        heuristic = None
+        if warm_start:
+            with self.timer.phase("router.heuristic"):
+                heuristic = ConstructiveHeuristic(
+                    self.instance, self.potential_depots, self.fleet
+                ).solve_vrp(open_loop=open_loop)
 
-    def solve(self, open_loop=False):
-        m = gp.Model("VRP_Router")
-        # m.setParam("TimeLimit", 18000)
+        self.timer.start("router.build")
+        m = gp.Model("VRP_Router", env=shared_env())
 
         # ---------------------------
         # 1. Graph Construction
@@ -33,27 +250,11 @@ class VRPRouter:
         C_nodes = list(range(num_depots, num_depots + num_customers))
         All_nodes = D_nodes + C_nodes
 
-        coords = {}
-        for i in range(num_depots):
-            coords[i] = D[i]
-        for i in range(num_customers):
-            coords[num_depots + i] = C[i]
-
-        # Distance Matrix
+        # Distance Matrix (Depots + Customers + Main in one pass)
         # If Open Loop: Cost(Customer -> Depot) = 0
-        dist = np.zeros((len(All_nodes), len(All_nodes)))
-        for i in All_nodes:
-            for j in All_nodes:
-                cost = np.linalg.norm(coords[i] - coords[j])
-
-                # OPEN LOOP LOGIC:
-                # If i is customer and j is depot, cost = 0
-                if open_loop and i in C_nodes and j in D_nodes:
-                    cost = 0.0
-
-                dist[i, j] = cost
-
-        dist_main_to_D = np.linalg.norm(D - Main, axis=1)
+        full_dist = build_distance_matrix(D, C, Main, open_loop=open_loop)
+        dist = full_dist[: len(All_nodes), : len(All_nodes)]
+        dist_main_to_D = full_dist[len(All_nodes), :num_depots]
 
         # ---------------------------
         # 2. Variables
@@ -66,19 +267,21 @@ class VRPRouter:
             for j in All_nodes:
                 if i == j:
                     continue
-                if i in D_nodes and j in D_nodes:
+                if i < num_depots and j < num_depots:
                     continue
                 arcs.append((i, j))
+        out_nbrs, in_nbrs = build_adjacency(arcs, All_nodes)
 
         x = m.addVars(arcs, vehicles, vtype=GRB.BINARY, name="x")
-        u = m.addVars(
-            C_nodes,
-            vehicles,
-            vtype=GRB.CONTINUOUS,
-            lb=0,
-            ub=num_customers + 100,
-            name="u",
-        )  # Load variable
+        if formulation == "mtz":
+            u = m.addVars(
+                C_nodes,
+                vehicles,
+                vtype=GRB.CONTINUOUS,
+                lb=0,
+                ub=max(v.capacity for v in self.fleet) + 100,
+                name="u",
+            )  # Load variable
         W = m.addVar(vtype=GRB.CONTINUOUS, name="MaxDist")
 
         # ---------------------------
@@ -91,14 +294,14 @@ class VRPRouter:
 
             # Flow
             for h in C_nodes:
-                flow_in = gp.quicksum(x[i, h, k] for i in All_nodes if (i, h) in arcs)
-                flow_out = gp.quicksum(x[h, j, k] for j in All_nodes if (h, j) in arcs)
+                flow_in = gp.quicksum(x[i, h, k] for i in in_nbrs[h])
+                flow_out = gp.quicksum(x[h, j, k] for j in out_nbrs[h])
                 m.addConstr(flow_in == flow_out, f"Flow_{h}_{k}")
 
             # Depot Boundaries
             for d in D_nodes:
-                outflow = gp.quicksum(x[d, j, k] for j in C_nodes if (d, j) in arcs)
-                inflow = gp.quicksum(x[i, d, k] for i in C_nodes if (i, d) in arcs)
+                outflow = gp.quicksum(x[d, j, k] for j in out_nbrs[d])
+                inflow = gp.quicksum(x[i, d, k] for i in in_nbrs[d])
                 m.addConstr(outflow <= z[d])
                 m.addConstr(inflow <= z[d])
                 m.addConstr(
@@ -107,60 +310,94 @@ class VRPRouter:
 
             # Global limit
             m.addConstr(
-                gp.quicksum(
-                    x[d, j, k] for d in D_nodes for j in C_nodes if (d, j) in arcs
-                )
-                <= 1
+                gp.quicksum(x[d, j, k] for d in D_nodes for j in out_nbrs[d]) <= 1
             )
 
         # Assignments
         for j in C_nodes:
             m.addConstr(
-                gp.quicksum(
-                    x[i, j, k] for k in vehicles for i in All_nodes if (i, j) in arcs
-                )
-                == 1
+                gp.quicksum(x[i, j, k] for k in vehicles for i in in_nbrs[j]) == 1
             )
 
         # Capacity & MTZ (Combined logic)
         # u[j,k] = Load on vehicle k AFTER visiting node j
-        # Assuming demand = 1 per customer for now (User didn't specify load, but implied 'capacity' matters)
-        # Let's use demand=1 per customer for generic capacity or generate random
-        # Wait, previous plan mentioned 30kg. Let's assume random loads or fixed 10kg in data gen?
-        # Demand Assumption
-        # Total Vehicles: Mix 1 (40+30+10+10 = 90)
-        # 20 Customers. If demand=5 => Total=100 > 90 (Infeasible).
-        # Let's set demand = 1 for now (Total=20) to ensure feasibility.
-        DEMAND = 1
+        # Demand comes from the instance (1 per customer for synthetic data,
+        # the DEMAND column for Solomon files)
+        DEMAND = {j: self.demand[j - num_depots] for j in C_nodes}
 
         M_cap = max(v.capacity for v in self.fleet) + 100
 
-        for k in vehicles:
-            cap = self.fleet[k].capacity
-            for i in C_nodes:
-                # Capacity Constraint
-                m.addConstr(u[i, k] <= cap, f"Cap_{i}_{k}")
-                m.addConstr(
-                    u[i, k]
-                    >= DEMAND
-                    * gp.quicksum(
-                        x[pre, i, k] for pre in All_nodes if (pre, i) in arcs
-                    ),
-                    f"MinLoad_{i}_{k}",
-                )
+        if formulation == "mtz":
+            for k in vehicles:
+                cap = self.fleet[k].capacity
+                for i in C_nodes:
+                    # Capacity Constraint
+                    m.addConstr(u[i, k] <= cap, f"Cap_{i}_{k}")
+                    m.addConstr(
+                        u[i, k]
+                        >= DEMAND[i]
+                        * gp.quicksum(x[pre, i, k] for pre in in_nbrs[i]),
+                        f"MinLoad_{i}_{k}",
+                    )
 
-                for j in C_nodes:
-                    if i != j:
-                        # If x[i,j,k]=1 => u[j] >= u[i] + dem
-                        m.addConstr(
-                            u[j, k] >= u[i, k] + DEMAND - M_cap * (1 - x[i, j, k]),
-                            f"LoadProp_{k}_{i}_{j}",
+                    for j in C_nodes:
+                        if i != j:
+                            # If x[i,j,k]=1 => u[j] >= u[i] + dem
+                            m.addConstr(
+                                u[j, k] >= u[i, k] + DEMAND[j] - M_cap * (1 - x[i, j, k]),
+                                f"LoadProp_{k}_{i}_{j}",
+                            )
+
+        # DFJ (Lazy): no load variables. On every integer incumbent:
+        # - Subtour: customer cycle S detached from the depot
+        #   => sum_k sum_{i,j in S} x[i,j,k] <= |S| - 1 (valid for all vehicles)
+        # - Capacity: vehicle k over capacity => add its load row
+        # Gurobi may report incumbents that violate earlier lazy rows, so
+        # every cut is re-added whenever it is violated.
+        m._lazy_cuts = 0
+
+        def lazy_cb(model, where):
+            if where != GRB.Callback.MIPSOL:
+                return
+            vals = model.cbGetSolution(x)
+            active = {k: [] for k in vehicles}
+            for (i, j, k), v in vals.items():
+                if v > 0.5:
+                    active[k].append((i, j))
+
+            cut_sets = set()
+            for k in vehicles:
+                for S in find_subtours(active[k], D_nodes):
+                    cut_sets.add(frozenset(S))
+
+                load = sum(DEMAND[j] for _, j in active[k] if j >= num_depots)
+                if load > self.fleet[k].capacity:
+                    model.cbLazy(
+                        gp.quicksum(
+                            DEMAND[j] * x[i, j, k] for j in C_nodes for i in in_nbrs[j]
                         )
+                        <= self.fleet[k].capacity
+                    )
+                    model._lazy_cuts += 1
+
+            for S in cut_sets:
+                model.cbLazy(
+                    gp.quicksum(
+                        x[i, j, k]
+                        for k in vehicles
+                        for i in S
+                        for j in S
+                        if i != j
+                    )
+                    <= len(S) - 1
+                )
+                model._lazy_cuts += 1
 
         # ---------------------------
         # 4. Objective
         # ---------------------------
         veh_dist_vars = []
+        veh_dist_exprs = {}
         for k in vehicles:
             # Cost Factor included? "cost_factor"
             # Objective says Minimize Total Distance.
@@ -171,6 +408,19 @@ class VRPRouter:
             d_k = gp.quicksum(dist[i, j] * x[i, j, k] for i, j in arcs)
             m.addConstr(W >= d_k, f"MaxDist_{k}")
             veh_dist_vars.append(d_k * self.fleet[k].cost_factor)
+            veh_dist_exprs[k] = d_k
+
+        # Symmetry Breaking: identical vehicles k1 < k2 => dist(k1) >= dist(k2)
+        # (unused vehicles drift to the end of each group)
+        symmetry_rows = 0
+        if symmetry_breaking:
+            for group in identical_vehicle_groups(self.fleet):
+                for k1, k2 in zip(group, group[1:]):
+                    m.addConstr(
+                        veh_dist_exprs[k1] >= veh_dist_exprs[k2],
+                        f"SymBreak_{k1}_{k2}",
+                    )
+                    symmetry_rows += 1
 
         truck_dist = gp.quicksum(z[d] * dist_main_to_D[d] for d in D_nodes)
         sum_sec_cost = gp.quicksum(veh_dist_vars)
@@ -178,58 +428,70 @@ class VRPRouter:
         obj = 1.0 * W + 0.001 * (truck_dist + sum_sec_cost)
         m.setObjective(obj, GRB.MINIMIZE)
 
-        m.optimize()
+        # Warm Start: heuristic routes as MIP start (u / W completed by Gurobi)
+        if heuristic is not None:
+            for d in D_nodes:
+                z[d].Start = 1 if d == heuristic["depot"] else 0
+            for var in x.values():
+                var.Start = 0
+            routes = symmetry_order(heuristic["routes"], self.fleet, heuristic["depot"], dist)
+            for k, route in routes.items():
+                if not route:
+                    continue
+                nodes = [heuristic["depot"]] + route + [heuristic["depot"]]
+                for i, j in zip(nodes, nodes[1:]):
+                    x[i, j, k].Start = 1
+
+        build_time = self.timer.stop("router.build")
+
+        # Termination criteria (TimeLimit / MIPGap / stall)
+        for key, val in (params or {}).items():
+            m.setParam(key, val)
+        m._stalled = False
+        callbacks = []
+        if formulation == "dfj-lazy":
+            m.setParam("LazyConstraints", 1)
+            callbacks.append(lazy_cb)
+        if stall_time is not None:
+            callbacks.append(stall_callback(stall_time))
+        self.timer.start("router.optimize")
+        m.optimize(combine_callbacks(callbacks))
+        optimize_time = self.timer.stop("router.optimize")
 
         # ---------------------------
         # 5. Result
         # ---------------------------
         if (
-            m.Status in [GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED]
+            m.Status in RESULT_STATUSES
             and m.SolCount > 0
         ):
-            selected_idx = -1
-            for d in D_nodes:
-                if z[d].X > 0.5:
-                    selected_idx = d
-                    break
+            self.timer.start("router.extract")
+            z_keys, z_vals = solution_values(m, z)
+            selected_idx = int(z_keys[np.argmax(z_vals)]) if z_vals.max() > 0.5 else -1
+
+            # All x values in one call; active arcs as an (a, 3) array (i, j, k)
+            x_keys, x_vals = solution_values(m, x)
+            active = x_keys[x_vals > 0.5]
 
             sol_assignments = {}
             sol_veh_dists = {}
+            route_issues = []
 
             for k in vehicles:
-                active_arcs = []
-                for i, j in arcs:
-                    if x[i, j, k].X > 0.5:
-                        active_arcs.append((i, j))
-
-                if not active_arcs:
+                arcs_k = active[active[:, 2] == k, :2]
+                if not len(arcs_k):
                     sol_assignments[k] = []
                     sol_veh_dists[k] = 0.0
                     continue
 
-                path = []
-                curr = selected_idx
-                # Trace path
-                for _ in range(len(active_arcs) + 5):
-                    next_n = None
-                    for u, v in active_arcs:
-                        if u == curr:
-                            next_n = v
-                            break
-                    if next_n is None:
-                        break
-                    if next_n in D_nodes:
-                        break  # End of loop
-
-                    path.append(next_n - num_depots)
-                    curr = next_n
-
-                sol_assignments[k] = path
-
-                d_val = 0
-                for u, v in active_arcs:
-                    d_val += dist[u, v]
-                sol_veh_dists[k] = d_val
+                path, issues = trace_route(
+                    arcs_k, selected_idx, num_depots, len(All_nodes)
+                )
+                if issues:
+                    route_issues.append({"vehicle": k, "issues": issues})
+
+                sol_assignments[k] = [n - num_depots for n in path]
+                sol_veh_dists[k] = float(dist[arcs_k[:, 0], arcs_k[:, 1]].sum())
 
             return {
                 "selected_depot_idx": selected_idx,
@@ -241,10 +503,21 @@ class VRPRouter:
                 "max_dist": W.X,
                 "total_sec_cost": sum(sol_veh_dists.values()),
                 "open_loop": open_loop,
+                "heuristic": _heuristic_summary(heuristic),
                 "solver_stats": {
                     "status": m.Status,
                     "mip_gap": m.MIPGap if m.IsMIP else 0.0,
                     "runtime": m.Runtime,
+                    "build_time": build_time,
+                    "optimize_time": optimize_time,
+                    "extract_time": self.timer.stop("router.extract"),
+                    "num_vars": m.NumVars,
+                    "num_constrs": m.NumConstrs,
+                    "formulation": formulation,
+                    "lazy_cuts": m._lazy_cuts,
+                    "symmetry_rows": symmetry_rows,
+                    "stalled": m._stalled,
+                    "route_issues": route_issues,
                 },
             }
         else:
@@ -252,12 +525,14 @@ class VRPRouter:
 
 
 class TwoEchelonRouter:
-    def __init__(self, instance, potential_depots, fleet):
+    def __init__(self, instance, potential_depots, fleet, timer=None):
         """
         :param instance: ProblemInstance (customers, main_depot)
         :param potential_depots: List/Array of Candidate Locations
         :param fleet: List of VehicleType objects (This fleet is available AT EACH DEPOT)
+        :param timer: PhaseTimer receiving the router.* phases (optional)
         """
+        self.timer = timer if timer is not None else PhaseTimer()
         self.instance = instance
         self.potential_depots = potential_depots
         # Fleet is duplicated per potential depot!
@@ -265,10 +540,73 @@ class TwoEchelonRouter:
         self.fleet_template = fleet
         self.num_sec_per_depot = len(fleet)
         self.num_candidates = len(potential_depots)
+        self.demand = np.asarray(instance.demand, dtype=float)
+
+    def solve(
+        self,
+        open_loop=False,
+        formulation="mtz",
+        symmetry_breaking=False,
+        warm_start=False,
+        params=None,
+        stall_time=None,
+        builder="loops",
+        model_cache=None,
+        tuned=True,
+    ):
+        """
+        :param formulation: 'mtz' (u_truck / u_sec MTZ rows) or 'dfj-lazy'
+            (truck and secondary subtour/capacity cuts added lazily).
+        :param symmetry_breaking: Within each depot, order identical vehicles
+            by non-increasing route cost.
+        :param warm_start: Feed the best savings/sweep solution (incl. the
+            truck tour) as MIP start.
+        :param params: Gurobi parameters, e.g. {"TimeLimit": 600, "MIPGap": 0.01}
+        :param stall_time: Stop after this many seconds without incumbent improvement.
+        :param builder: 'loops' (addVars/addConstr per row) or 'matrix'
+            (addMVar + sparse coefficient matrices, see _build_matrix).
+        :param model_cache: common.cache.ModelCache. The built model is read
+            back from it when the instance, candidates, fleet and model
+            options match a stored entry (no Python-side construction), and
+            stored after building otherwise.
+        :param tuned: Apply the tuned parameters of the '2e/<loop>/<fleet>'
+            scenario class, if any (explicit params override them).
+        """
+        if formulation not in FORMULATIONS:
+            raise ValueError(f"Unknown formulation: {formulation}")
+        if builder not in BUILDERS:
+            raise ValueError(f"Unknown builder: {builder}")
+        if tuned:
+            params = merge_tuned_params(
+                params, param_key("2e", open_loop, self.fleet_template)
+            )
 
-    def solve(self, open_loop=False):
-        m = gp.Model("2E_LRP_Router")
-        # m.setParam("TimeLimit", 18000)
+        heuristic = None
+        if warm_start:
+            with self.timer.phase("router.heuristic"):
+                heuristic = ConstructiveHeuristic(
+                    self.instance, self.potential_depots, self.fleet_template
+                ).solve_two_echelon(open_loop=open_loop)
+
+        self.timer.start("router.build")
+        cache_key, cached = None, None
+        if model_cache is not None:
+            cache_key = model_cache.key(
+                self.instance,
+                self.fleet_template,
+                self.potential_depots,
+                model="2E_LRP_Router",
+                version=MODEL_VERSION,
+                open_loop=open_loop,
+                formulation=formulation,
+                symmetry_breaking=symmetry_breaking,
+                builder=builder,
+            )
+            cached = model_cache.get(cache_key)
+        if cached is None:
+            m = gp.Model("2E_LRP_Router", env=shared_env())
+            # MemUsed is environment-wide; the delta over the build is this model
+            mem_before = m.MemUsed
 
         D = self.potential_depots
         C = self.instance.customers
@@ -285,262 +623,530 @@ class TwoEchelonRouter:
         C_nodes = list(range(num_depots, num_depots + num_customers))
         All_nodes = D_nodes + C_nodes
 
-        coords = {}
-        for i in range(num_depots):
-            coords[i] = D[i]
-        for i in range(num_customers):
-            coords[num_depots + i] = C[i]
+        full_dist = build_distance_matrix(D, C, Main, open_loop=open_loop)
 
         # 1. Distances (Secondary)
-        dist_sec = np.zeros((len(All_nodes), len(All_nodes)))
-        for i in All_nodes:
-            for j in All_nodes:
-                cost = np.linalg.norm(coords[i] - coords[j])
-                if open_loop and i in C_nodes and j in D_nodes:
-                    cost = 0.0
-                dist_sec[i, j] = cost
+        dist_sec = full_dist[: len(All_nodes), : len(All_nodes)]
 
         # 2. Distances (Truck)
-        dist_truck = np.zeros((num_depots + 1, num_depots + 1))
         # Index map: 0..D-1 = Depots, D = Main
         MAIN_IDX = num_depots
-
-        for i in range(num_depots):
-            for j in range(num_depots):
-                dist_truck[i, j] = np.linalg.norm(D[i] - D[j])
-            # Main links
-            d_m = np.linalg.norm(D[i] - Main)
-            dist_truck[i, MAIN_IDX] = d_m
-            dist_truck[MAIN_IDX, i] = d_m
+        dist_truck = truck_distance_matrix(full_dist, num_depots)
 
         # ---------------------------
-        # Variables
+        # Arcs
         # ---------------------------
 
-        z = m.addVars(D_nodes, vtype=GRB.BINARY, name="z")
-
         # Truck Routing (TSP on Main + Open Depots)
         # y[i,j] where nodes are D_nodes + MAIN_IDX
         truck_nodes = D_nodes + [MAIN_IDX]
         truck_arcs = [(i, j) for i in truck_nodes for j in truck_nodes if i != j]
-        y = m.addVars(truck_arcs, vtype=GRB.BINARY, name="y")
-
-        u_truck = m.addVars(
-            truck_nodes, vtype=GRB.CONTINUOUS, lb=0, ub=len(truck_nodes), name="u_truck"
-        )
+        truck_out, truck_in = build_adjacency(truck_arcs, truck_nodes)
 
-        # Secondary Routing
+        # Secondary Routing: vehicles of depot d only get the arcs incident
+        # to d plus the customer-customer arcs, so a vehicle can never start
+        # or end at another depot (no ghost rides, no binding rows needed).
+        # Every depot has the same local arc order: d->C, C->d, C->C.
         sec_vehs = list(range(self.num_sec_per_depot))
-        sec_arcs = []
-        for i in All_nodes:
-            for j in All_nodes:
-                if i == j:
-                    continue
-                # Block Depot-Depot for secondary
-                if i in D_nodes and j in D_nodes:
-                    continue
-                sec_arcs.append((i, j))
+        cc_arcs = [(i, j) for i in C_nodes for j in C_nodes if i != j]
+        sec_arcs = {
+            d: [(d, j) for j in C_nodes] + [(i, d) for i in C_nodes] + cc_arcs
+            for d in D_nodes
+        }
+        out_nbrs, in_nbrs = {}, {}
+        for d in D_nodes:
+            out_nbrs[d], in_nbrs[d] = build_adjacency(sec_arcs[d], [d] + C_nodes)
 
-        # x[depot, vehicle, from, to]
-        x = m.addVars(D_nodes, sec_vehs, sec_arcs, vtype=GRB.BINARY, name="x")
+        DEMAND = {j: self.demand[j - num_depots] for j in C_nodes}
+        M_cap = max(v.capacity for v in self.fleet_template) + 100
 
-        # ---------------------------
-        # Constraints
-        # ---------------------------
+        if cached is not None:
+            m, groups, meta = cached
+            z, y, x = groups["z"], groups["y"], groups["x"]
+            print(f"Model cache hit ({cache_key[:12]}): skipped model construction")
+        elif builder == "matrix":
+            z, y, x = self._build_matrix(
+                m, formulation, sec_vehs, truck_arcs, sec_arcs, dist_truck, dist_sec, M_cap
+            )
+        else:
+            # ---------------------------
+            # Variables
+            # ---------------------------
+
+            z = m.addVars(D_nodes, vtype=GRB.BINARY, name="z")
+
+            # Truck Routing (TSP on Main + Open Depots)
+            y = m.addVars(truck_arcs, vtype=GRB.BINARY, name="y")
+
+            if formulation == "mtz":
+                u_truck = m.addVars(
+                    truck_nodes,
+                    vtype=GRB.CONTINUOUS,
+                    lb=0,
+                    ub=len(truck_nodes),
+                    name="u_truck",
+                )
 
-        # A. At least 1 depot
-        m.addConstr(z.sum() >= 1, "AtLeastOneDepot")
+            # x[depot, vehicle, from, to], only over the depot's own arcs
+            x = gp.tupledict()
+            for d in D_nodes:
+                x.update(m.addVars([d], sec_vehs, sec_arcs[d], vtype=GRB.BINARY, name="x"))
 
-        # B. Truck Routing Flow
-        for d in D_nodes:
-            # If z[d]=1, must have 1 in, 1 out. If 0, 0.
-            m.addConstr(
-                gp.quicksum(y[i, d] for i in truck_nodes if (i, d) in truck_arcs)
-                == z[d]
-            )
-            m.addConstr(
-                gp.quicksum(y[d, j] for j in truck_nodes if (d, j) in truck_arcs)
-                == z[d]
-            )
+            # ---------------------------
+            # Constraints
+            # ---------------------------
 
-        # Main Flow (Always 1)
-        m.addConstr(
-            gp.quicksum(
-                y[i, MAIN_IDX] for i in truck_nodes if (i, MAIN_IDX) in truck_arcs
-            )
-            == 1
-        )
-        m.addConstr(
-            gp.quicksum(
-                y[MAIN_IDX, j] for j in truck_nodes if (MAIN_IDX, j) in truck_arcs
-            )
-            == 1
-        )
+            # A. At least 1 depot
+            m.addConstr(z.sum() >= 1, "AtLeastOneDepot")
 
-        # Truck MTZ
-        m.addConstr(u_truck[MAIN_IDX] == 0)
-        for i in D_nodes:
-            for j in D_nodes:
-                if i != j:
-                    m.addConstr(
-                        u_truck[j] >= u_truck[i] + 1 - len(truck_nodes) * (1 - y[i, j])
-                    )
+            # B. Truck Routing Flow
+            for d in D_nodes:
+                # If z[d]=1, must have 1 in, 1 out. If 0, 0.
+                m.addConstr(gp.quicksum(y[i, d] for i in truck_in[d]) == z[d])
+                m.addConstr(gp.quicksum(y[d, j] for j in truck_out[d]) == z[d])
+
+            # Main Flow (Always 1)
+            m.addConstr(gp.quicksum(y[i, MAIN_IDX] for i in truck_in[MAIN_IDX]) == 1)
+            m.addConstr(gp.quicksum(y[MAIN_IDX, j] for j in truck_out[MAIN_IDX]) == 1)
+
+            # Truck MTZ
+            if formulation == "mtz":
+                m.addConstr(u_truck[MAIN_IDX] == 0)
+                for i in D_nodes:
+                    for j in D_nodes:
+                        if i != j:
+                            m.addConstr(
+                                u_truck[j]
+                                >= u_truck[i] + 1 - len(truck_nodes) * (1 - y[i, j])
+                            )
 
-        # C. Secondary Routing
-        for d in D_nodes:
-            for k in sec_vehs:
-                outflow = gp.quicksum(
-                    x[d, k, d, j] for j in C_nodes if (d, j) in sec_arcs
-                )
-                inflow = gp.quicksum(
-                    x[d, k, i, d] for i in C_nodes if (i, d) in sec_arcs
-                )
+            # C. Secondary Routing
+            for d in D_nodes:
+                for k in sec_vehs:
+                    outflow = gp.quicksum(x[d, k, d, j] for j in out_nbrs[d][d])
+                    inflow = gp.quicksum(x[d, k, i, d] for i in in_nbrs[d][d])
 
-                m.addConstr(outflow <= z[d])
-                m.addConstr(inflow <= z[d])
-                m.addConstr(outflow == inflow)
+                    m.addConstr(outflow <= z[d])
+                    m.addConstr(inflow <= z[d])
+                    m.addConstr(outflow == inflow)
 
-                for h in C_nodes:
-                    f_in = gp.quicksum(
-                        x[d, k, i, h] for i in All_nodes if (i, h) in sec_arcs
-                    )
-                    f_out = gp.quicksum(
-                        x[d, k, h, j] for j in All_nodes if (h, j) in sec_arcs
+                    for h in C_nodes:
+                        f_in = gp.quicksum(x[d, k, i, h] for i in in_nbrs[d][h])
+                        f_out = gp.quicksum(x[d, k, h, j] for j in out_nbrs[d][h])
+                        m.addConstr(f_in == f_out)
+
+            # D. Assignment
+            for h in C_nodes:
+                m.addConstr(
+                    gp.quicksum(
+                        x[d, k, i, h]
+                        for d in D_nodes
+                        for k in sec_vehs
+                        for i in in_nbrs[d][h]
                     )
-                    m.addConstr(f_in == f_out)
+                    == 1
+                )
 
-        # D. Assignment
-        for h in C_nodes:
-            m.addConstr(
-                gp.quicksum(
-                    x[d, k, i, h]
-                    for d in D_nodes
-                    for k in sec_vehs
-                    for i in All_nodes
-                    if (i, h) in sec_arcs
+            # E. Capacity
+            if formulation == "mtz":
+                u_sec = m.addVars(
+                    D_nodes,
+                    sec_vehs,
+                    C_nodes,
+                    vtype=GRB.CONTINUOUS,
+                    lb=0,
+                    ub=M_cap,
                 )
-                == 1
-            )
 
-        # E. Capacity
-        DEMAND = 1
-        M_cap = max(v.capacity for v in self.fleet_template) + 100
-        u_sec = m.addVars(
-            D_nodes,
-            sec_vehs,
-            C_nodes,
-            vtype=GRB.CONTINUOUS,
-            lb=0,
-            ub=num_customers + 10,
-        )
+            if formulation == "mtz":
+                for d in D_nodes:
+                    for k in sec_vehs:
+                        cap = self.fleet_template[k].capacity
+                        for i in C_nodes:
+                            m.addConstr(u_sec[d, k, i] <= cap)
+                            m.addConstr(u_sec[d, k, i] >= DEMAND[i])
+
+                            for j in C_nodes:
+                                if i != j:
+                                    m.addConstr(
+                                        u_sec[d, k, j]
+                                        >= u_sec[d, k, i]
+                                        + DEMAND[j]
+                                        - M_cap * (1 - x[d, k, i, j])
+                                    )
+
+            # ---------------------------
+            # Objective
+            # ---------------------------
+            truck_cost = gp.quicksum(dist_truck[i, j] * y[i, j] for i, j in truck_arcs)
+
+            sec_cost_vars = []
+            for d in D_nodes:
+                for k in sec_vehs:
+                    cost_k = gp.quicksum(
+                        dist_sec[i, j] * x[d, k, i, j] for i, j in sec_arcs[d]
+                    )
+                    sec_cost_vars.append(cost_k * self.fleet_template[k].cost_factor)
+
+            total_sec_cost = gp.quicksum(sec_cost_vars)
+
+            m.setObjective(truck_cost + total_sec_cost, GRB.MINIMIZE)
+        # DFJ (Lazy): on every integer incumbent
+        # - Truck subtour among depots detached from Main => y-SEC
+        # - Secondary customer cycle S detached from all depots
+        #   => sum_{d,k} sum_{i,j in S} x[d,k,i,j] <= |S| - 1
+        # - Vehicle (d,k) over capacity => add its load row
+        # (re-added whenever violated, as in VRPRouter)
+        m._lazy_cuts = 0
+
+        def lazy_cb(model, where):
+            if where != GRB.Callback.MIPSOL:
+                return
+            y_vals = model.cbGetSolution(y)
+            truck_active = [a for a, v in y_vals.items() if v > 0.5]
+            for S in find_subtours(truck_active, [MAIN_IDX]):
+                model.cbLazy(
+                    gp.quicksum(y[i, j] for i in S for j in S if i != j)
+                    <= len(S) - 1
+                )
+                model._lazy_cuts += 1
 
-        # F. Fleet-Depot Binding (Fix Ghost Rides)
-        for d in D_nodes:
-            for k in sec_vehs:
-                for p in D_nodes:
-                    if p != d:
-                        # Ban starting at p
-                        for j in All_nodes:
-                            if (p, j) in sec_arcs:
-                                m.addConstr(x[d, k, p, j] == 0)
-                        # Ban ending at p
-                        for i in All_nodes:
-                            if (i, p) in sec_arcs:
-                                m.addConstr(x[d, k, i, p] == 0)
+            x_vals = model.cbGetSolution(x)
+            active = {}
+            for (d, k, i, j), v in x_vals.items():
+                if v > 0.5:
+                    active.setdefault((d, k), []).append((i, j))
+
+            cut_sets = set()
+            for (d, k), arcs_dk in active.items():
+                for S in find_subtours(arcs_dk, D_nodes):
+                    cut_sets.add(frozenset(S))
 
-        for d in D_nodes:
-            for k in sec_vehs:
                 cap = self.fleet_template[k].capacity
-                for i in C_nodes:
-                    m.addConstr(u_sec[d, k, i] <= cap)
-                    m.addConstr(u_sec[d, k, i] >= DEMAND)
+                load = sum(DEMAND[j] for _, j in arcs_dk if j >= num_depots)
+                if load > cap:
+                    model.cbLazy(
+                        gp.quicksum(
+                            DEMAND[j] * x[d, k, i, j]
+                            for j in C_nodes
+                            for i in in_nbrs[d][j]
+                        )
+                        <= cap
+                    )
+                    model._lazy_cuts += 1
+
+            for S in cut_sets:
+                model.cbLazy(
+                    gp.quicksum(
+                        x[d, k, i, j]
+                        for d in D_nodes
+                        for k in sec_vehs
+                        for i in S
+                        for j in S
+                        if i != j
+                    )
+                    <= len(S) - 1
+                )
+                model._lazy_cuts += 1
+
+        # Symmetry Breaking: per depot, identical vehicles k1 < k2
+        # => dist(d, k1) >= dist(d, k2)
+        symmetry_rows = 0 if cached is None else meta["symmetry_rows"]
+        if symmetry_breaking and cached is None:
+            def sec_cost_expr(d, k):
+                arcs = sec_arcs[d]
+                return gp.LinExpr(
+                    [dist_sec[i, j] for i, j in arcs], [x[d, k, i, j] for i, j in arcs]
+                )
 
-                    for j in C_nodes:
-                        if i != j:
-                            m.addConstr(
-                                u_sec[d, k, j]
-                                >= u_sec[d, k, i] + DEMAND - M_cap * (1 - x[d, k, i, j])
-                            )
+            for group in identical_vehicle_groups(self.fleet_template):
+                for d in D_nodes:
+                    for k1, k2 in zip(group, group[1:]):
+                        m.addConstr(
+                            sec_cost_expr(d, k1) >= sec_cost_expr(d, k2),
+                            f"SymBreak_{d}_{k1}_{k2}",
+                        )
+                        symmetry_rows += 1
 
-        # ---------------------------
-        # Objective
-        # ---------------------------
-        truck_cost = gp.quicksum(dist_truck[i, j] * y[i, j] for i, j in truck_arcs)
+        # Warm Start: depots, truck tour and secondary routes as MIP start
+        if heuristic is not None:
+            for d in D_nodes:
+                z[d].Start = 1 if d in heuristic["open_depots"] else 0
+            for var in y.values():
+                var.Start = 0
+            tour = heuristic["truck_tour"]
+            for i, j in zip(tour, tour[1:]):
+                y[i, j].Start = 1
+            for var in x.values():
+                var.Start = 0
+            for (d, k), route in symmetry_order_2e(
+                heuristic["routes"], self.fleet_template, dist_sec
+            ).items():
+                if not route:
+                    continue
+                nodes = [d] + route + [d]
+                for i, j in zip(nodes, nodes[1:]):
+                    x[d, k, i, j].Start = 1
 
-        sec_cost_vars = []
-        for d in D_nodes:
-            for k in sec_vehs:
-                cost_k = gp.quicksum(
-                    dist_sec[i, j] * x[d, k, i, j] for i, j in sec_arcs
+        m.update()
+        if cached is not None:
+            sparsity = meta["sparsity"]
+        else:
+            sparsity = self._sparsity_report(m, builder, len(sec_vehs), mem_before)
+            if model_cache is not None:
+                # Start values and parameters are not part of the MPS file
+                model_cache.put(
+                    cache_key,
+                    m,
+                    {"z": z, "y": y, "x": x},
+                    meta={"symmetry_rows": symmetry_rows, "sparsity": sparsity},
                 )
-                sec_cost_vars.append(cost_k * self.fleet_template[k].cost_factor)
-
-        total_sec_cost = gp.quicksum(sec_cost_vars)
+        build_time = self.timer.stop("router.build")
+        print(
+            f"Depot-bound arcs: {sparsity['vars_avoided']} x vars and "
+            f"{sparsity['constrs_avoided']} rows avoided vs. the all-depot layout "
+            f"(~{sparsity['mem_saved_mb']:.1f} MB saved)"
+        )
 
-        m.setObjective(truck_cost + total_sec_cost, GRB.MINIMIZE)
-        m.optimize()
+        # Termination criteria (TimeLimit / MIPGap / stall)
+        for key, val in (params or {}).items():
+            m.setParam(key, val)
+        m._stalled = False
+        callbacks = []
+        if formulation == "dfj-lazy":
+            m.setParam("LazyConstraints", 1)
+            callbacks.append(lazy_cb)
+        if stall_time is not None:
+            callbacks.append(stall_callback(stall_time))
+        self.timer.start("router.optimize")
+        m.optimize(combine_callbacks(callbacks))
+        optimize_time = self.timer.stop("router.optimize")
 
         if (
-            m.Status in [GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED]
+            m.Status in RESULT_STATUSES
             and m.SolCount > 0
         ):
-            open_depots = [d for d in D_nodes if z[d].X > 0.5]
-
-            # Truck Route
-            # Truck Route Assignment
-
-            # Simple extraction for now
-            # Since it might visit multiple, just list them or try to trace
-            # Careful with loops or time limit
+            self.timer.start("router.extract")
+            z_keys, z_vals = solution_values(m, z)
+            open_depots = z_keys[z_vals > 0.5].tolist()
+
+            # Truck Route: active edges (the tour itself is drawn from them)
+            y_keys, y_vals = solution_values(m, y)
+            truck_edges = [tuple(e) for e in y_keys[y_vals > 0.5].tolist()]
+
+            # All x values in one call; active arcs as an (a, 4) array (d, k, i, j)
+            x_keys, x_vals = solution_values(m, x)
+            active = x_keys[x_vals > 0.5]
+
+            edges = np.asarray(truck_edges, dtype=int).reshape(-1, 2)
+            truck_dist = float(dist_truck[edges[:, 0], edges[:, 1]].sum())
+            cost_factors = np.array([v.cost_factor for v in self.fleet_template])
+            total_sec_cost = float(
+                (
+                    cost_factors[active[:, 1]] * dist_sec[active[:, 2], active[:, 3]]
+                ).sum()
+            )
 
-            # Let's just collect edges
-            truck_edges = []
-            for i, j in truck_arcs:
-                if y[i, j].X > 0.5:
-                    truck_edges.append((i, j))
-
-            sec_assignments = {}
-            for d in open_depots:
-                sec_assignments[d] = {}
-                for k in sec_vehs:
-                    path = []
-                    curr_node = d
-                    # Trace
-                    visited = set()
-                    while True:
-                        next_n = None
-                        for target in All_nodes:
-                            if (curr_node, target) in sec_arcs and x[
-                                d, k, curr_node, target
-                            ].X > 0.5:
-                                next_n = target
-                                break
-                        if next_n is None:
-                            break
-                        if next_n in D_nodes:
-                            break
-                        if next_n in visited:
-                            break  # Loop guard
-                        visited.add(next_n)
-
-                        path.append(next_n - num_depots)
-                        curr_node = next_n
-
-                    if path:
-                        sec_assignments[d][k] = path
+            sec_assignments = {d: {} for d in open_depots}
+            route_issues = []
+            for d, k in np.unique(active[:, :2], axis=0).tolist():
+                arcs_dk = active[(active[:, 0] == d) & (active[:, 1] == k), 2:]
+                path, issues = trace_route(arcs_dk, d, num_depots, len(All_nodes))
+                if d not in sec_assignments:
+                    issues.append("closed_depot")
+                if issues:
+                    route_issues.append({"depot": d, "vehicle": k, "issues": issues})
+                if path and d in sec_assignments:
+                    sec_assignments[d][k] = [n - num_depots for n in path]
 
             return {
                 "open_depots": open_depots,
                 "open_depot_locs": [D[d] for d in open_depots],
                 "truck_edges": truck_edges,
-                "truck_dist": truck_cost.getValue(),
+                "truck_dist": truck_dist,
                 "sec_assignments": sec_assignments,
                 "max_dist": 0.0,
-                "total_sec_cost": total_sec_cost.getValue(),
+                "total_sec_cost": total_sec_cost,
+                "heuristic": _heuristic_summary(heuristic),
                 "solver_stats": {
                     "status": m.Status,
                     "mip_gap": m.MIPGap if m.IsMIP else 0.0,
                     "runtime": m.Runtime,
+                    "build_time": build_time,
+                    "optimize_time": optimize_time,
+                    "extract_time": self.timer.stop("router.extract"),
+                    "num_vars": m.NumVars,
+                    "num_constrs": m.NumConstrs,
+                    "formulation": formulation,
+                    "lazy_cuts": m._lazy_cuts,
+                    "symmetry_rows": symmetry_rows,
+                    "stalled": m._stalled,
+                    "route_issues": route_issues,
+                    "sparsity": sparsity,
                 },
             }
         return None
+
+    def _sparsity_report(self, m, builder, num_vehs, mem_before):
+        """
+        Size of the built model against the previous all-depot layout, where
+        every vehicle had x over all depot<->customer arcs and arcs at other
+        depots were fixed to 0 (binding rows in the loop builder, bounds in
+        the matrix builder). Memory is scaled from the model's share of
+        Gurobi's MemUsed per variable/row/nonzero actually built.
+        """
+        N = self.num_candidates
+        M = len(self.demand)
+        blocks = N * num_vehs
+        # Ghost arcs per (d, k) block: other depot -> customer and back
+        ghost = (N - 1) * 2 * M
+        vars_avoided = blocks * ghost
+        constrs_avoided = vars_avoided if builder == "loops" else 0
+        # other depot -> h sits in h's flow and assignment rows, h -> other
+        # depot in h's flow row; binding rows add one more nonzero each
+        nnz_avoided = blocks * (N - 1) * M * 3 + constrs_avoided
+
+        elements = m.NumVars + m.NumConstrs + m.NumNZs
+        model_bytes = max(m.MemUsed - mem_before, 0.0) * 1e9
+        bytes_per_element = model_bytes / elements if elements else 0.0
+        saved = vars_avoided + constrs_avoided + nnz_avoided
+        return {
+            "x_vars": blocks * (2 * M + M * (M - 1)),
+            "vars_avoided": vars_avoided,
+            "constrs_avoided": constrs_avoided,
+            "nnz_avoided": nnz_avoided,
+            "mem_saved_mb": saved * bytes_per_element / 1024**2,
+        }
+
+    def _build_matrix(
+        self, m, formulation, sec_vehs, truck_arcs, sec_arcs, dist_truck, dist_sec, M_cap
+    ):
+        """
+        Matrix-API twin of the loop builder in solve(): same variables,
+        feasible set and objective, built from sparse coefficient matrices.
+        All depots share one local arc layout (d->C, C->d, C->C), so every
+        (d, k) block has the same coefficient pattern and the secondary
+        constraints are Kronecker products of a single block. The u_sec load
+        limits are variable bounds instead of rows.
+        Returns z, y, x as tupledicts keyed like the loop builder, so lazy
+        cuts, symmetry rows, warm starts and extraction are shared.
+        """
+        N = self.num_candidates
+        M = len(self.demand)
+        K = len(sec_vehs)
+        NK = N * K
+        MAIN_IDX = N
+        caps = np.array([v.capacity for v in self.fleet_template], dtype=float)
+        cost_factors = np.array([v.cost_factor for v in self.fleet_template])
+
+        def incidence(heads, n_rows):
+            """(n_rows x len(heads)) 0/1 matrix with a 1 at (heads[a], a)."""
+            cols = np.arange(len(heads))
+            return sp.csr_matrix(
+                (np.ones(len(heads)), (heads, cols)), shape=(n_rows, len(heads))
+            )
+
+        # ---------------------------
+        # Truck: z, y (+ MTZ)
+        # ---------------------------
+        ta = np.array(truck_arcs)
+        z = m.addMVar(N, vtype=GRB.BINARY, name="z")
+        y = m.addMVar(len(ta), vtype=GRB.BINARY, name="y")
+        t_out = incidence(ta[:, 0], N + 1)
+        t_in = incidence(ta[:, 1], N + 1)
+
+        m.addConstr(z.sum() >= 1, "AtLeastOneDepot")
+        m.addConstr(t_in[:N] @ y == z)
+        m.addConstr(t_out[:N] @ y == z)
+        m.addConstr(t_in[MAIN_IDX] @ y == 1)
+        m.addConstr(t_out[MAIN_IDX] @ y == 1)
+
+        if formulation == "mtz":
+            L = N + 1
+            u_truck = m.addMVar(L, lb=0, ub=L, name="u_truck")
+            m.addConstr(u_truck[MAIN_IDX] == 0)
+            dd = np.flatnonzero((ta[:, 0] < N) & (ta[:, 1] < N))
+            rows = np.arange(len(dd))
+            U = sp.csr_matrix(
+                (
+                    np.r_[np.ones(len(dd)), -np.ones(len(dd))],
+                    (np.r_[rows, rows], np.r_[ta[dd, 1], ta[dd, 0]]),
+                ),
+                shape=(len(dd), L),
+            )
+            Y = sp.csr_matrix(
+                (np.full(len(dd), -float(L)), (rows, dd)), shape=(len(dd), len(ta))
+            )
+            # u_j >= u_i + 1 - L (1 - y_ij)
+            m.addConstr(U @ u_truck + Y @ y >= np.full(len(dd), 1.0 - L))
+
+        # ---------------------------
+        # Secondary: x blocks (d, k), each over the depot's own arcs
+        # ---------------------------
+        # Local nodes of a block: 0 = its depot, 1..M = customers
+        sa = np.array(sec_arcs[0])
+        local = np.where(sa < N, 0, sa - N + 1)
+        A = len(local)
+        a_out = incidence(local[:, 0], M + 1)
+        a_in = incidence(local[:, 1], M + 1)
+        x = m.addMVar(NK * A, vtype=GRB.BINARY, name="x")
+
+        # C. Depot out/in flow of each block at its own depot d = b // K
+        Zsel = incidence(np.repeat(np.arange(N), K), N).T.tocsr()
+        O = sp.kron(sp.identity(NK), a_out[0], format="csr")
+        I = sp.kron(sp.identity(NK), a_in[0], format="csr")
+        m.addConstr(O @ x - Zsel @ z <= 0)
+        m.addConstr(I @ x - Zsel @ z <= 0)
+        m.addMConstr(O - I, x, "=", np.zeros(NK))
+
+        # Customer flow conservation per block
+        F = (a_in[1:] - a_out[1:]).tocsr()
+        m.addMConstr(sp.kron(sp.identity(NK), F, format="csr"), x, "=", np.zeros(NK * M))
+
+        # D. Assignment: every customer entered exactly once over all blocks
+        m.addMConstr(
+            sp.kron(np.ones((1, NK)), a_in[1:], format="csr"), x, "=", np.ones(M)
+        )
+
+        # E. Capacity (MTZ load propagation on customer-customer arcs)
+        if formulation == "mtz":
+            block_cap = caps[np.tile(np.arange(K), N)]
+            u_sec = m.addMVar(
+                NK * M,
+                lb=np.tile(self.demand, NK),
+                ub=np.repeat(block_cap, M),
+                name="u_sec",
+            )
+            cc = np.arange(2 * M, A)
+            bb = np.repeat(np.arange(NK), len(cc))
+            aa = np.tile(cc, NK)
+            rows = np.arange(len(aa))
+            ci, cj = local[aa, 0] - 1, local[aa, 1] - 1
+            U = sp.csr_matrix(
+                (
+                    np.r_[np.ones(len(aa)), -np.ones(len(aa))],
+                    (np.r_[rows, rows], np.r_[bb * M + cj, bb * M + ci]),
+                ),
+                shape=(len(aa), NK * M),
+            )
+            X = sp.csr_matrix(
+                (np.full(len(aa), -float(M_cap)), (rows, bb * A + aa)),
+                shape=(len(aa), NK * A),
+            )
+            # u_j >= u_i + dem_j - M (1 - x_ij)
+            m.addConstr(U @ u_sec + X @ x >= self.demand[cj] - M_cap)
+
+        # ---------------------------
+        # Objective
+        # ---------------------------
+        c_y = dist_truck[ta[:, 0], ta[:, 1]]
+        dist_d = np.stack([dist_sec[tuple(np.array(sec_arcs[d]).T)] for d in range(N)])
+        c_x = (cost_factors[:K][None, :, None] * dist_d[:, None, :]).ravel()
+        m.setObjective(c_y @ y + c_x @ x, GRB.MINIMIZE)
+
+        x_keys = [(d, k, i, j) for d in range(N) for k in sec_vehs for i, j in sec_arcs[d]]
+        return (
+            gp.tupledict(zip(range(N), z.tolist())),
+            gp.tupledict(zip(truck_arcs, y.tolist())),
+            gp.tupledict(zip(x_keys, x.tolist())),
+        )
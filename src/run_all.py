@@ -1,9 +1,95 @@
+import argparse
 import itertools
 from common.runner import ExperimentRunner
+from common.scheduler import BudgetScheduler
+
+# Phases (common.timing.PhaseTimer names) exported to the CSV summary
+CSV_PHASES = [
+    "data",
+    "locator",
+    "router",
+    "router.build",
+    "router.optimize",
+    "router.extract",
+    "plot",
+    "report",
+]
 
 
 def main():
-    runner = ExperimentRunner(output_base="comprehensive_results")
+    parser = argparse.ArgumentParser(description="Run the full experiment suite")
+    parser.add_argument(
+        "--total-budget",
+        type=float,
+        default=None,
+        help="Suite wall-clock budget in seconds (default: unlimited)",
+    )
+    parser.add_argument(
+        "--min-per-run",
+        type=float,
+        default=60.0,
+        help="Minimum TimeLimit per experiment when budgeting",
+    )
+    parser.add_argument(
+        "--mip-gap", type=float, default=None, help="MIPGap termination per run"
+    )
+    parser.add_argument(
+        "--stall-time",
+        type=float,
+        default=None,
+        help="Stop a run after N seconds without incumbent improvement",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Experiments run in parallel"
+    )
+    parser.add_argument(
+        "--threads-per-job",
+        type=int,
+        default=None,
+        help="Gurobi Threads per experiment (default: cores // workers)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a cProfile dump (profile.prof) for every run",
+    )
+    parser.add_argument(
+        "--plot",
+        type=str,
+        default="async",
+        choices=["sync", "async", "false"],
+        help="Plot rendering (async: background process, off the solve path)",
+    )
+    parser.add_argument(
+        "--mem-limit",
+        type=float,
+        default=None,
+        help="Gurobi MemLimit (GB) of the shared environment",
+    )
+    parser.add_argument(
+        "--nodefile-start",
+        type=float,
+        default=None,
+        help="Gurobi NodefileStart (GB): write B&B nodes to disk beyond this",
+    )
+    parser.add_argument(
+        "--gurobi-log",
+        type=str,
+        default=None,
+        help="Gurobi LogFile of the shared environment ({pid} = worker process id)",
+    )
+    args = parser.parse_args()
+
+    # One Gurobi environment per worker process, capped per worker
+    runner = ExperimentRunner(
+        output_base="comprehensive_results",
+        env_params={
+            "Threads": args.threads_per_job,
+            "MemLimit": args.mem_limit,
+            "NodefileStart": args.nodefile_start,
+            "LogFile": args.gurobi_log,
+        },
+    )
 
     experiments = []
 
@@ -77,18 +163,22 @@ def main():
 
     print(f"Total Experiments Defined: {len(experiments)}")
 
-    # Execution Loop
-    results = []
-    for i, config in enumerate(experiments):
+    # Execution Loop (budgeted: unused time of fast runs flows to later ones)
+    for config in experiments:
         config["seed"] = 42  # Consistent seed for comparison
-        print(f"\n[{i + 1}/{len(experiments)}] Running {config['run_name']}...")
+        config["profile"] = args.profile
+        config["plot"] = args.plot
 
-        try:
-            metrics = runner.run_experiment(config)
-            results.append(metrics)
-        except Exception as e:
-            print(f"Error running {config['run_name']}: {e}")
-            results.append({"config": config, "solved": False, "error": str(e)})
+    scheduler = BudgetScheduler(
+        total_budget=args.total_budget,
+        min_per_run=args.min_per_run,
+        mip_gap=args.mip_gap,
+        stall_time=args.stall_time,
+    )
+    results = scheduler.run(
+        runner, experiments, workers=args.workers, threads_per_job=args.threads_per_job
+    )
+    runner.wait_plots()
 
     # ---------------------------------------------------------
     # Report Generation
@@ -130,7 +220,11 @@ def main():
             "truck_dist",
             "sec_cost",
             "time_s",
+            "lazy_cuts",
+            "time_budget_s",
         ]
+        for phase in CSV_PHASES:
+            fieldnames += [f"{phase}_wall_s", f"{phase}_cpu_s"]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
 
@@ -153,7 +247,14 @@ def main():
                 if res.get("solved")
                 else "",
                 "time_s": f"{res.get('elapsed_time', 0):.2f}",
+                "lazy_cuts": res.get("lazy_cuts", 0),
+                "time_budget_s": res.get("time_budget") or "",
             }
+            phases = res.get("phases", {})
+            for phase in CSV_PHASES:
+                if phase in phases:
+                    row[f"{phase}_wall_s"] = f"{phases[phase]['wall']:.3f}"
+                    row[f"{phase}_cpu_s"] = f"{phases[phase]['cpu']:.3f}"
             writer.writerow(row)
 
     print("\nSummary saved to comprehensive_results/summary_table.csv")
@@ -0,0 +1,133 @@
+import argparse
+import itertools
+import numpy as np
+from gurobipy import GRB
+from common.cache import ModelCache
+from common.data_gen import generate_instances
+from common.tuning import (
+    TUNED_PARAMS_PATH,
+    candidate_params,
+    param_key,
+    race,
+    save_tuned_params,
+)
+from common.vehicles import create_fleet
+from modules.routers import TwoEchelonRouter, VRPRouter
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tune Gurobi parameters per scenario class (racing search)"
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=["vrp", "2e"],
+        choices=["vrp", "2e"],
+        help="vrp: VRPRouter (Scenarios 0-2), 2e: TwoEchelonRouter (Scenario 3)",
+    )
+    parser.add_argument(
+        "--loop-types", nargs="+", default=["closed", "open"], choices=["closed", "open"]
+    )
+    parser.add_argument(
+        "--fleets",
+        nargs="+",
+        default=["homog", "mix_1", "mix_2"],
+        choices=["homog", "mix_1", "mix_2"],
+    )
+    parser.add_argument("--instances", type=int, default=4, help="Tuning instances per class")
+    parser.add_argument(
+        "--data-mode", type=str, default="uniform", choices=["uniform", "clustered"]
+    )
+    parser.add_argument("--n-customers", type=int, default=8)
+    parser.add_argument("--n-candidates", type=int, default=3)
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=30.0,
+        help="TimeLimit per solve; unsolved runs score 2x this (PAR2)",
+    )
+    parser.add_argument(
+        "--max-candidates",
+        type=int,
+        default=16,
+        help="Parameter sets raced per class (defaults + random grid sample)",
+    )
+    parser.add_argument(
+        "--keep", type=float, default=0.5, help="Fraction of sets kept after each instance"
+    )
+    parser.add_argument("--threads", type=int, default=None, help="Gurobi Threads per solve")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=TUNED_PARAMS_PATH)
+    args = parser.parse_args()
+
+    instances = generate_instances(
+        args.instances,
+        mode=args.data_mode,
+        seed=args.seed,
+        n_customers=args.n_customers,
+        n_candidates=args.n_candidates,
+    )
+    candidates = candidate_params(max_candidates=args.max_candidates, seed=args.seed)
+    model_cache = ModelCache()
+    saved = []
+
+    for model, loop, fleet_mode in itertools.product(args.models, args.loop_types, args.fleets):
+        fleet = create_fleet(fleet_mode)
+        open_loop = loop == "open"
+        key = param_key(model, open_loop, fleet)
+        print(f"Tuning {key}: {len(candidates)} parameter sets x {len(instances)} instances")
+
+        def evaluate(params, inst):
+            solve_params = {**params, "TimeLimit": args.time_limit, "OutputFlag": 0}
+            if args.threads is not None:
+                solve_params["Threads"] = args.threads
+            if model == "2e":
+                # Every parameter set re-solves the same models: build them once
+                res = TwoEchelonRouter(inst, inst.mobile_depots, fleet).solve(
+                    open_loop=open_loop,
+                    params=solve_params,
+                    model_cache=model_cache,
+                    tuned=False,
+                )
+            else:
+                res = VRPRouter(inst, inst.mobile_depots, fleet).solve(
+                    open_loop=open_loop, params=solve_params, tuned=False
+                )
+            if res is None or res["solver_stats"]["status"] != GRB.OPTIMAL:
+                return 2 * args.time_limit
+            return res["solver_stats"]["runtime"]
+
+        best, scores = race(evaluate, candidates, instances, keep=args.keep)
+        default_score = float(np.mean(scores[0]))
+        best_score = float(np.mean(scores[best]))
+        if best == 0 or best_score >= default_score:
+            # Nothing beats the defaults: keep any earlier set of this class
+            print(f"Defaults are best for {key} ({default_score:.3f} s), nothing saved")
+            continue
+        print(
+            f"Best for {key}: {candidates[best]} "
+            f"({best_score:.3f} s vs. {default_score:.3f} s with defaults)"
+        )
+        save_tuned_params(
+            key,
+            candidates[best],
+            path=args.output,
+            score=best_score,
+            default_score=default_score,
+            instances=args.instances,
+            data_mode=args.data_mode,
+            n_customers=args.n_customers,
+            n_candidates=args.n_candidates,
+            time_limit=args.time_limit,
+        )
+        saved.append(key)
+
+    if saved:
+        print(f"Tuned parameters of {', '.join(saved)} saved to {args.output}")
+    else:
+        print(f"No parameter set beat the defaults; {args.output} unchanged")
+
+
+if __name__ == "__main__":
+    main()
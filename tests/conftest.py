@@ -0,0 +1,8 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from common.gurobi_env import configure_env  # noqa: E402
+
+configure_env(OutputFlag=0)
@@ -0,0 +1,36 @@
+import pytest
+from common.data_gen import generate_data
+from common.vehicles import create_fleet
+from modules.alns import ALNSRouter
+from modules.routers import TwoEchelonRouter
+
+
+def total_cost(res):
+    return res["truck_dist"] + res["total_sec_cost"]
+
+
+# Instances where the best solution opens the other depot than the
+# initial insertion does: only the depot operator can swap them
+@pytest.mark.parametrize("seed", [0, 6, 13, 14])
+def test_two_echelon_alns_reaches_exact_optimum(seed):
+    data = generate_data(seed, "uniform", None, n_customers=6, n_candidates=2)
+    fleet = create_fleet("homog")
+    exact = TwoEchelonRouter(data, data.mobile_depots, fleet).solve(
+        params={"MIPGap": 0, "OutputFlag": 0}, tuned=False
+    )
+    alns = ALNSRouter(
+        data, data.mobile_depots, fleet, two_echelon=True, max_iterations=2000, seed=0
+    ).solve()
+
+    assert "depot" in alns["solver_stats"]["operator_weights"]
+    assert alns["open_depots"] == exact["open_depots"]
+    assert total_cost(alns) == pytest.approx(total_cost(exact), abs=1e-6)
+
+
+def test_vrp_alns_has_no_depot_operator():
+    data = generate_data(0, "uniform", None, n_customers=6, n_candidates=2)
+    res = ALNSRouter(
+        data, data.mobile_depots, create_fleet("homog"), max_iterations=200
+    ).solve()
+
+    assert "depot" not in res["solver_stats"]["operator_weights"]
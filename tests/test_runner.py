@@ -0,0 +1,60 @@
+import os
+import sys
+import pytest
+from common.runner import ExperimentRunner
+
+C101 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "c101.txt")
+
+
+@pytest.mark.parametrize(
+    "scenario, fleet_mode, candidates",
+    [(0, "homog", 1), (2, "mix_1", 1), (3, "mix_2", 4)],
+)
+def test_solomon_demand_exceeding_fleet_capacity(tmp_path, scenario, fleet_mode, candidates):
+    # c101's first 20 customers demand 360 units
+    runner = ExperimentRunner(output_base=str(tmp_path), cache_dir=None, store_name=None)
+    config = {
+        "scenario": scenario,
+        "fleet_mode": fleet_mode,
+        "candidates": candidates,
+        "data_mode": "solomon",
+        "data_file": C101,
+    }
+    with pytest.raises(ValueError, match="exceeds the fleet capacity"):
+        runner.run_experiment(config)
+
+
+def test_failed_profiled_run_stops_profiler(tmp_path):
+    runner = ExperimentRunner(output_base=str(tmp_path), cache_dir=None, store_name=None)
+    config = {
+        "scenario": 0,
+        "fleet_mode": "mix_2",
+        "data_mode": "solomon",
+        "data_file": C101,
+        "profile": True,
+    }
+    for _ in range(2):
+        with pytest.raises(ValueError, match="exceeds the fleet capacity"):
+            runner.run_experiment(config)
+        assert sys.getprofile() is None
+
+
+def test_fixed_locator_capacity_uses_all_returned_depots(tmp_path):
+    # 8 customers demand 130: above one homog fleet (120), within the fleets
+    # of the 4 depots the fixed locator returns whatever `candidates` says
+    runner = ExperimentRunner(output_base=str(tmp_path), cache_dir=None, store_name=None)
+    config = {
+        "scenario": 3,
+        "locator": "fixed",
+        "candidates": 1,
+        "fleet_mode": "homog",
+        "data_mode": "solomon",
+        "data_file": C101,
+        "n_customers": 8,
+        "router": "alns",
+        "alns_iterations": 200,
+        "plot": "false",
+    }
+    metrics = runner.run_experiment(config)
+
+    assert metrics["solved"]
@@ -0,0 +1,51 @@
+import pytest
+from common import scheduler as scheduler_module
+from common.scheduler import BudgetScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+class StubRunner:
+    """run_many with 2 lanes: A and B start at t=0, A ends at t=1, then C starts."""
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def run_many(self, configs, workers=1, threads_per_job=None, prepare=None):
+        prepare(0, configs[0])
+        prepare(1, configs[1])
+        self.clock.now = 1.0
+        yield 0, {}
+        prepare(2, configs[2])
+        yield 1, {}
+        yield 2, {}
+
+
+def test_late_run_capped_at_suite_deadline(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module, "time", clock)
+    experiments = [
+        {"run_name": "A", "scenario": 2, "loop_type": "open"},
+        {"run_name": "B", "scenario": 2, "loop_type": "open"},
+        {"run_name": "C", "scenario": 3},
+    ]
+    scheduler = BudgetScheduler(total_budget=100.0, min_per_run=0.0)
+
+    results = scheduler.run(StubRunner(clock), experiments, workers=2)
+
+    assert [m["time_budget"] for m in results[:2]] == [pytest.approx(40.0)] * 2
+    # (200 - 41) * 3/3 = 159 lane-seconds are left, but only 99 s to the deadline
+    assert results[2]["time_budget"] == pytest.approx(99.0)
+
+
+def test_min_per_run_may_exceed_deadline():
+    scheduler = BudgetScheduler(total_budget=100.0, min_per_run=60.0)
+    scheduler.workers = 2
+
+    assert scheduler.time_limit(3.0, 3.0, committed=150.0, elapsed=90.0) == 60.0
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from common.data_gen import ProblemInstance
+from common.distances import build_distance_matrix
+from common.vehicles import create_fleet, identical_vehicle_groups
+from modules.heuristics import ConstructiveHeuristic, route_length, symmetry_order
+from modules.routers import TwoEchelonRouter, VRPRouter
+
+# Root node only, no Gurobi heuristics: an incumbent can only come from the MIP start
+ROOT_ONLY = {"NodeLimit": 0, "Heuristics": 0, "OutputFlag": 0}
+
+
+def make_instance(seed):
+    # Demand 10 vs. capacity 30: the heuristic needs several routes per depot
+    rng = np.random.default_rng(seed)
+    return ProblemInstance(
+        np.array([0, 0]),
+        rng.uniform(10, 30, (2, 2)),
+        rng.uniform(30, 80, (8, 2)),
+        demand=np.full(8, 10.0),
+    )
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_symmetry_order_sorts_identical_vehicles(seed):
+    inst = make_instance(seed)
+    fleet = create_fleet("homog")
+    heuristic = ConstructiveHeuristic(inst, inst.mobile_depots, fleet).solve_vrp()
+    dist = build_distance_matrix(inst.mobile_depots, inst.customers, inst.main_depot)
+    depot = heuristic["depot"]
+
+    routes = symmetry_order(heuristic["routes"], fleet, depot, dist)
+
+    assert sorted(map(tuple, routes.values())) == sorted(
+        map(tuple, heuristic["routes"].values())
+    )
+    for group in identical_vehicle_groups(fleet):
+        lengths = [route_length(routes[k], depot, dist) for k in group]
+        assert lengths == sorted(lengths, reverse=True)
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_vrp_warm_start_with_symmetry_breaking(seed):
+    inst = make_instance(seed)
+    fleet = create_fleet("homog")
+    res = VRPRouter(inst, inst.mobile_depots, fleet).solve(
+        symmetry_breaking=True, warm_start=True, params=ROOT_ONLY, tuned=False
+    )
+
+    assert res is not None
+    assert res["solver_stats"]["symmetry_rows"] > 0
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_two_echelon_warm_start_with_symmetry_breaking(seed):
+    inst = make_instance(seed)
+    fleet = create_fleet("homog")
+    res = TwoEchelonRouter(inst, inst.mobile_depots, fleet).solve(
+        symmetry_breaking=True, warm_start=True, params=ROOT_ONLY, tuned=False
+    )
+
+    assert res is not None
+    assert res["solver_stats"]["symmetry_rows"] > 0
+
+
+def test_sweep_without_customers_returns_empty_assignment():
+    inst = make_instance(1)
+    fleet = create_fleet("homog")
+    heuristic = ConstructiveHeuristic(inst, inst.mobile_depots, fleet)
+    dist = build_distance_matrix(inst.mobile_depots, inst.customers, inst.main_depot)
+
+    assert heuristic.sweep(0, [], dist) == {}
+    assert heuristic.vehicle_cost(heuristic.sweep(0, [], dist), 0, dist) == 0